@@ -8,6 +8,7 @@
  * para regenerar data/base_conhecimento.json
  */
 
+import { createHash } from 'crypto'
 import { readFileSync, existsSync } from 'fs'
 import { join } from 'path'
 
@@ -17,6 +18,8 @@ export interface ItemAlimentar {
   quantidade: string
   tipo: 'cafe_manha' | 'almoco' | 'lanche_tarde' | 'jantar'
   condicao_digestiva: string
+  /** Mesmo alimento canônico para variações do nome (scripts/nomes_canonicos.py) */
+  alimento_id?: string
   pagina_origem?: number
   observacoes?: string
   fonte?: string
@@ -30,27 +33,116 @@ export interface PratoCompleto {
   condicao_digestiva: string[]
 }
 
+/**
+ * Índices gerados pelo extrator (scripts/indices_base.py): IDs de itens
+ * agrupados, sempre na ordem de BASE_CONHECIMENTO. Ficam em
+ * data/base_conhecimento.indices.json, fora do JSON servido ao navegador,
+ * com o total e o hash dos IDs da base para a qual foram gerados.
+ */
+export interface IndicesBase {
+  total_itens: number
+  /** SHA-256 dos IDs da base, em ordem, separados por '\n' (indices_base.hash_ids) */
+  hash_ids: string
+  por_condicao_tipo: Record<string, Record<string, string[]>>
+  por_condicao: Record<string, string[]>
+  por_nome: Record<string, string[]>
+}
+
+/** Mesmo cálculo de indices_base.hash_ids */
+function hashIds(itens: ItemAlimentar[]): string {
+  return createHash('sha256').update(itens.map(item => item.id).join('\n'), 'utf8').digest('hex')
+}
+
+/** Os índices foram gerados para esta base? (arquivos regenerados separadamente não batem) */
+function indicesCorrespondem(itens: ItemAlimentar[], indices: IndicesBase | null): boolean {
+  return (
+    !!indices?.por_condicao_tipo &&
+    indices.total_itens === itens.length &&
+    indices.hash_ids === hashIds(itens)
+  )
+}
+
 // Carregar base do JSON (gerado dos .docx)
-function carregarBaseDoJson(): ItemAlimentar[] {
+function carregarBaseDoJson(): { itens: ItemAlimentar[]; indices: IndicesBase | null } {
   if (typeof process === 'undefined' || !process.versions?.node) {
-    return []
+    return { itens: [], indices: null }
   }
   try {
     const filePath = join(process.cwd(), 'data', 'base_conhecimento.json')
     if (existsSync(filePath)) {
       const content = readFileSync(filePath, 'utf-8')
       const data = JSON.parse(content)
-      return Array.isArray(data.itens) ? data.itens : []
+      const indicesPath = join(process.cwd(), 'data', 'base_conhecimento.indices.json')
+      // Bases antigas traziam os índices dentro de base_conhecimento.json
+      const indices = existsSync(indicesPath)
+        ? JSON.parse(readFileSync(indicesPath, 'utf-8'))
+        : data.indices
+      const itens: ItemAlimentar[] = Array.isArray(data.itens) ? data.itens : []
+      return {
+        itens,
+        // Sem correspondência, as buscas usam o filtro linear
+        indices: indicesCorrespondem(itens, indices) ? indices : null,
+      }
     }
   } catch (_) {
     // Fallback: base vazia
   }
-  return []
+  return { itens: [], indices: null }
 }
 
-export const BASE_CONHECIMENTO: ItemAlimentar[] = carregarBaseDoJson()
+const baseCarregada = carregarBaseDoJson()
+
+export const BASE_CONHECIMENTO: ItemAlimentar[] = baseCarregada.itens
+export const INDICES_BASE: IndicesBase | null = baseCarregada.indices
 export const PRATOS_COMPLETOS: PratoCompleto[] = []
 
+// Posição de cada ID em BASE_CONHECIMENTO, refeita se a base for recarregada
+// (carregar_base.ts); null se os índices não forem desta base
+let posicoesCache: {
+  tamanho: number
+  primeiroId?: string
+  mapa: Map<string, number> | null
+} | null = null
+
+function posicoesPorId(): Map<string, number> | null {
+  const primeiroId = BASE_CONHECIMENTO[0]?.id
+  if (
+    !posicoesCache ||
+    posicoesCache.tamanho !== BASE_CONHECIMENTO.length ||
+    posicoesCache.primeiroId !== primeiroId
+  ) {
+    let mapa: Map<string, number> | null = null
+    if (indicesCorrespondem(BASE_CONHECIMENTO, INDICES_BASE)) {
+      mapa = new Map<string, number>()
+      BASE_CONHECIMENTO.forEach((item, i) => mapa!.set(item.id, i))
+    }
+    posicoesCache = { tamanho: BASE_CONHECIMENTO.length, primeiroId, mapa }
+  }
+  return posicoesCache.mapa
+}
+
+/**
+ * Junta os buckets do índice em itens, na ordem da base e sem repetições.
+ * Retorna null se não houver índice ou se ele não corresponder à base
+ * carregada; nesse caso o chamador usa o filtro linear.
+ */
+function itensDosBuckets(buckets: (string[] | undefined)[]): ItemAlimentar[] | null {
+  if (!INDICES_BASE) return null
+  const posicoes = posicoesPorId()
+  if (!posicoes) return null
+  const encontradas = new Set<number>()
+  for (const ids of buckets) {
+    for (const id of ids ?? []) {
+      const pos = posicoes.get(id)
+      if (pos === undefined) return null
+      encontradas.add(pos)
+    }
+  }
+  return Array.from(encontradas)
+    .sort((a, b) => a - b)
+    .map(pos => BASE_CONHECIMENTO[pos])
+}
+
 /**
  * Busca itens alimentares por tipo de refeição e condição digestiva
  * Considera itens da condição específica ou 'geral'
@@ -59,6 +151,13 @@ export function buscarItens(
   tipoRefeicao: ItemAlimentar['tipo'],
   condicaoDigestiva: string
 ): ItemAlimentar[] {
+  const porCondicaoTipo = INDICES_BASE?.por_condicao_tipo
+  const viaIndice = porCondicaoTipo && itensDosBuckets([
+    porCondicaoTipo[condicaoDigestiva]?.[tipoRefeicao],
+    porCondicaoTipo['geral']?.[tipoRefeicao],
+  ])
+  if (viaIndice) return viaIndice
+
   return BASE_CONHECIMENTO.filter(
     item =>
       item.tipo === tipoRefeicao &&
@@ -79,6 +178,12 @@ export function buscarItensMultiplasCondicoes(
     return buscarItens(tipoRefeicao, 'geral')
   }
   const setCond = new Set([...condicoes, 'geral'])
+  const porCondicaoTipo = INDICES_BASE?.por_condicao_tipo
+  const viaIndice = porCondicaoTipo && itensDosBuckets(
+    Array.from(setCond, condicao => porCondicaoTipo[condicao]?.[tipoRefeicao])
+  )
+  if (viaIndice) return viaIndice
+
   const itens = BASE_CONHECIMENTO.filter(
     item =>
       item.tipo === tipoRefeicao &&
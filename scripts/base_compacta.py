@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Formatos compactos da base de conhecimento, gravados junto com
+data/base_conhecimento.json por extrair_docx_base_conhecimento.py:
+
+- base_conhecimento.min.json: o mesmo conteúdo, sem indentação.
+- base_conhecimento.colunar.json: uma coluna por campo (inclusive os
+  quantidade_*, que ficam fora da base servida); os campos de
+  CAMPOS_INTERNADOS (condicao_digestiva, tipo, fonte...) viram índices
+  inteiros em tabelas de strings internadas, e
+  os IDs dos 'indices' de busca viram posições na lista de itens.
+
+Leitura:
+    from base_compacta import carregar_colunar
+    base = carregar_colunar(Path('data/base_conhecimento.colunar.json'))
+    base['itens']  # mesma lista de base_conhecimento.json
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import gravacao_json
+
+# Incrementar quando o formato mudar (2: 'indices' como posições; alimento_id
+# e quantidade_* nos itens). Leitores de outra versão recusam o arquivo
+VERSAO_COLUNAR = 2
+
+# Campos com poucos valores distintos, gravados como índices em tabelas
+CAMPOS_INTERNADOS = ('condicao_digestiva', 'tipo', 'fonte', 'alimento_id', 'quantidade_unidade')
+
+def _mapear_indices(indices: Any, converter) -> Any:
+    """Aplica `converter` a cada lista de IDs/posições dos índices de busca"""
+    if isinstance(indices, list):
+        return [converter(v) for v in indices]
+    if isinstance(indices, dict):
+        return {chave: _mapear_indices(valor, converter) for chave, valor in indices.items()}
+    return indices  # total_itens, hash_ids
+
+def para_colunar(resultado: Dict[str, Any]) -> Dict[str, Any]:
+    """Converte o resultado da extração (com 'itens') para o formato colunar"""
+    itens = resultado['itens']
+    campos = list(itens[0]) if itens else []
+    for item in itens:
+        if list(item) != campos:
+            raise ValueError(f"Item {item.get('id')} com campos diferentes de {campos}")
+
+    tabelas: Dict[str, List[str]] = {}
+    colunas: Dict[str, List[Any]] = {}
+    for campo in campos:
+        valores = [item[campo] for item in itens]
+        if campo in CAMPOS_INTERNADOS:
+            codigos: Dict[str, int] = {}
+            colunas[campo] = [codigos.setdefault(v, len(codigos)) for v in valores]
+            tabelas[campo] = list(codigos)
+        else:
+            colunas[campo] = valores
+
+    metadados = {k: v for k, v in resultado.items() if k != 'itens'}
+    if 'indices' in metadados:
+        posicao = {item['id']: i for i, item in enumerate(itens)}
+        metadados['indices'] = _mapear_indices(metadados['indices'], posicao.__getitem__)
+    return {
+        'versao': VERSAO_COLUNAR,
+        'campos': campos,
+        'tabelas': tabelas,
+        'colunas': colunas,
+        'metadados': metadados,
+    }
+
+def de_colunar(colunar: Dict[str, Any]) -> Dict[str, Any]:
+    """Reconstrói o resultado original (mesmas chaves e ordem) a partir do colunar"""
+    if colunar.get('versao') != VERSAO_COLUNAR:
+        raise ValueError(f"Versão colunar não suportada: {colunar.get('versao')}")
+
+    campos = colunar['campos']
+    tabelas = colunar['tabelas']
+    colunas = [
+        [tabelas[campo][i] for i in colunar['colunas'][campo]] if campo in tabelas
+        else colunar['colunas'][campo]
+        for campo in campos
+    ]
+    itens = [dict(zip(campos, valores)) for valores in zip(*colunas)]
+
+    resultado = {'itens': itens}
+    resultado.update(colunar['metadados'])
+    if 'indices' in resultado:
+        resultado['indices'] = _mapear_indices(
+            resultado['indices'], lambda posicao: itens[posicao]['id']
+        )
+    return resultado
+
+def exportar(
+    resultado: Dict[str, Any], caminho_base: Path, colunar: Optional[Dict[str, Any]] = None
+) -> Dict[str, Path]:
+    """Grava as variantes .min.json e .colunar.json ao lado de `caminho_base`.
+
+    `colunar`, se informado, é o conteúdo da variante colunar (com campos
+    que ficam fora da base servida); senão, o mesmo `resultado`.
+    """
+    caminhos = {
+        'min': caminho_base.with_suffix('.min.json'),
+        'colunar': caminho_base.with_suffix('.colunar.json'),
+    }
+    gravacao_json.gravar_json(resultado, caminhos['min'], 'compacto')
+    gravacao_json.gravar_json(para_colunar(colunar or resultado), caminhos['colunar'], 'compacto')
+    return caminhos
+
+def carregar_colunar(caminho: Path) -> Dict[str, Any]:
+    """Lê base_conhecimento.colunar.json e devolve o resultado no formato original"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return de_colunar(json.load(f))
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Base de conhecimento em SQLite (saída opcional de
+extrair_docx_base_conhecimento.py --sqlite), ao lado do JSON.
+
+Tabelas:
+- fontes:     um .docx por linha, com o SHA-256 do arquivo, o hash dos
+              itens que ele gerou, sua ordem na base e o número do ID
+              do seu primeiro item;
+- condicoes:  as condições digestivas presentes;
+- itens:      os mesmos campos de base_conhecimento.json, por (fonte,
+              índice do item na fonte); o ID é guardado relativo ao da
+              fonte e, no lugar do alimento_id, a chave canônica do
+              nome; índice em (condicao_digestiva, tipo);
+- itens_base: visão com os itens como no JSON (ID e alimento_id globais)
+              e a ordem da base;
+- alimentos:  alimento_id -> chave canônica (nomes_canonicos.py);
+- chaves_alimentos: chave canônica de cada nome -> alimento_id;
+- metadados:  os demais campos do JSON (fontes, origem).
+
+A sincronização é incremental por fonte: se o SHA-256 do .docx e o hash
+dos seus itens (já numerados e deduplicados) não mudaram, os itens dela
+não são tocados. IDs, posições e alimento_id são globais, mas ficam
+fora das linhas dos itens: quando um documento ganha ou perde itens (ou
+nomes novos), as fontes seguintes só têm a ordem e o ID inicial
+atualizados, e chaves_alimentos é regravada. Tudo acontece numa única
+transação, e leitores concorrentes (WAL) veem a base antiga ou a nova
+inteira.
+
+Leitura:
+    from base_sqlite import abrir, consultar_itens
+    conexao = abrir(Path('data/base_conhecimento.sqlite3'))
+    consultar_itens(conexao, 'colite', 'cafe_manha')
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import indices_base
+import nomes_canonicos
+
+# Campos dos itens, na ordem em que aparecem em base_conhecimento.json
+CAMPOS_ITEM = (
+    'nome', 'quantidade', 'tipo', 'condicao_digestiva', 'fonte', 'trecho', 'id',
+    'alimento_id', 'quantidade_valor', 'quantidade_unidade', 'quantidade_gramas',
+)
+# Gravados na linha do item (fonte e ID vêm da chave e da fonte; alimento_id,
+# numerado na base inteira, vem de chaves_alimentos)
+CAMPOS_LINHA = tuple(campo for campo in CAMPOS_ITEM if campo not in ('fonte', 'id', 'alimento_id'))
+
+# user_version do SQLite; bancos de outra versão têm itens e fontes recriados
+VERSAO_ESQUEMA = 3
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS condicoes (
+    codigo TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS fontes (
+    nome TEXT PRIMARY KEY,
+    sha256 TEXT,
+    hash_itens TEXT NOT NULL,
+    total_itens INTEGER NOT NULL,
+    ordem INTEGER NOT NULL,
+    id_inicial INTEGER NOT NULL,
+    atualizado_em REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS itens (
+    fonte TEXT NOT NULL REFERENCES fontes (nome),
+    indice INTEGER NOT NULL,
+    id_relativo INTEGER NOT NULL,
+    nome TEXT NOT NULL,
+    quantidade TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    condicao_digestiva TEXT NOT NULL REFERENCES condicoes (codigo),
+    trecho TEXT,
+    chave_alimento TEXT NOT NULL,
+    quantidade_valor NUMERIC,
+    quantidade_unidade TEXT,
+    quantidade_gramas NUMERIC,
+    PRIMARY KEY (fonte, indice)
+);
+CREATE INDEX IF NOT EXISTS itens_condicao_tipo ON itens (condicao_digestiva, tipo);
+CREATE TABLE IF NOT EXISTS alimentos (
+    id TEXT PRIMARY KEY,
+    chave TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chaves_alimentos (
+    chave TEXT PRIMARY KEY,
+    alimento_id TEXT NOT NULL
+);
+CREATE VIEW IF NOT EXISTS itens_base AS
+    SELECT itens.*, printf('docx_%04d', fontes.id_inicial + itens.id_relativo) AS id,
+           chaves_alimentos.alimento_id, fontes.ordem AS ordem_fonte
+    FROM itens JOIN fontes ON fontes.nome = itens.fonte
+    LEFT JOIN chaves_alimentos ON chaves_alimentos.chave = itens.chave_alimento;
+CREATE TABLE IF NOT EXISTS metadados (
+    chave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+def abrir(caminho: Path) -> sqlite3.Connection:
+    """Abre (criando as tabelas se preciso) a base SQLite"""
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    conexao = sqlite3.connect(caminho, timeout=30)
+    conexao.row_factory = sqlite3.Row
+    conexao.execute('PRAGMA journal_mode=WAL')
+    if conexao.execute('PRAGMA user_version').fetchone()[0] != VERSAO_ESQUEMA:
+        # Esquema anterior (IDs globais nos itens): a próxima sincronização regrava tudo
+        conexao.executescript(
+            'DROP VIEW IF EXISTS itens_base; DROP TABLE IF EXISTS itens; DROP TABLE IF EXISTS fontes;'
+        )
+        conexao.execute(f'PRAGMA user_version = {VERSAO_ESQUEMA}')
+    conexao.executescript(ESQUEMA)
+    return conexao
+
+def _numero_id(item: Dict[str, Any]) -> int:
+    return int(item['id'].rsplit('_', 1)[1])
+
+def _linhas_fonte(nome: str, itens: List[Dict[str, Any]], id_inicial: int,
+                  chaves: List[str]) -> List[tuple]:
+    """Linhas da tabela itens de uma fonte: nada nelas depende das outras fontes"""
+    return [
+        (nome, indice, _numero_id(item) - id_inicial, chave, *(item.get(campo) for campo in CAMPOS_LINHA))
+        for indice, (item, chave) in enumerate(zip(itens, chaves))
+    ]
+
+def _hash_linhas(linhas: List[tuple]) -> str:
+    h = hashlib.sha256()
+    for linha in linhas:
+        h.update(json.dumps(linha, ensure_ascii=False).encode('utf-8'))
+    return h.hexdigest()
+
+def sincronizar(
+    conexao: sqlite3.Connection, resultado: Dict[str, Any], hashes: Dict[str, str]
+) -> Dict[str, int]:
+    """Grava o resultado de construir_base numa única transação.
+
+    `hashes` é {nome do .docx: SHA-256 do arquivo}. Só as fontes cujo
+    .docx ou itens mudaram têm os itens regravados. Retorna quantas
+    fontes foram atualizadas, mantidas e removidas.
+    """
+    por_fonte: Dict[str, List[Dict[str, Any]]] = {}
+    for item in resultado['itens']:
+        por_fonte.setdefault(item['fonte'], []).append(item)
+
+    anteriores = {
+        linha['nome']: (linha['sha256'], linha['hash_itens'])
+        for linha in conexao.execute('SELECT nome, sha256, hash_itens FROM fontes')
+    }
+    estatisticas = {'atualizadas': 0, 'mantidas': 0, 'removidas': 0}
+    # Chave canônica de cada nome (só do próprio item) -> alimento_id (da base inteira)
+    alimento_por_chave: Dict[str, str] = {}
+
+    with conexao:
+        fontes = [nome for nome in resultado['fontes'] if nome in hashes]
+        for ordem, nome in enumerate(fontes):
+            itens = por_fonte.get(nome, [])
+            id_inicial = _numero_id(itens[0]) if itens else 0
+            chaves = [nomes_canonicos.chave_canonica(item['nome']) for item in itens]
+            for item, chave in zip(itens, chaves):
+                if item.get('alimento_id'):
+                    alimento_por_chave.setdefault(chave, item['alimento_id'])
+            linhas = _linhas_fonte(nome, itens, id_inicial, chaves)
+            hash_itens = _hash_linhas(linhas)
+            if anteriores.get(nome) == (hashes[nome], hash_itens):
+                # Itens iguais; só a posição da fonte na base pode ter mudado
+                conexao.execute(
+                    'UPDATE fontes SET ordem = ?, id_inicial = ? WHERE nome = ?',
+                    (ordem, id_inicial, nome)
+                )
+                estatisticas['mantidas'] += 1
+                continue
+
+            conexao.execute('DELETE FROM itens WHERE fonte = ?', (nome,))
+            conexao.execute(
+                'INSERT OR REPLACE INTO fontes'
+                ' (nome, sha256, hash_itens, total_itens, ordem, id_inicial, atualizado_em)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (nome, hashes[nome], hash_itens, len(itens), ordem, id_inicial, time.time())
+            )
+            conexao.executemany(
+                'INSERT OR IGNORE INTO condicoes (codigo) VALUES (?)',
+                {(item['condicao_digestiva'],) for item in itens}
+            )
+            conexao.executemany(
+                f"INSERT INTO itens (fonte, indice, id_relativo, chave_alimento, {', '.join(CAMPOS_LINHA)})"
+                f" VALUES (?, ?, ?, ?{', ?' * len(CAMPOS_LINHA)})",
+                linhas
+            )
+            estatisticas['atualizadas'] += 1
+
+        # Fontes que saíram da lista, alimentos, condições órfãs e metadados
+        for nome in set(anteriores) - set(hashes).intersection(resultado['fontes']):
+            conexao.execute('DELETE FROM itens WHERE fonte = ?', (nome,))
+            conexao.execute('DELETE FROM fontes WHERE nome = ?', (nome,))
+            estatisticas['removidas'] += 1
+        conexao.execute(
+            'DELETE FROM condicoes WHERE codigo NOT IN (SELECT condicao_digestiva FROM itens)'
+        )
+        conexao.execute('DELETE FROM alimentos')
+        conexao.executemany(
+            'INSERT INTO alimentos (id, chave) VALUES (?, ?)', resultado.get('alimentos', {}).items()
+        )
+        conexao.execute('DELETE FROM chaves_alimentos')
+        conexao.executemany(
+            'INSERT INTO chaves_alimentos (chave, alimento_id) VALUES (?, ?)', alimento_por_chave.items()
+        )
+        conexao.executemany(
+            'INSERT OR REPLACE INTO metadados (chave, valor) VALUES (?, ?)',
+            [(chave, json.dumps(resultado[chave], ensure_ascii=False)) for chave in ('fontes', 'origem')]
+        )
+    return estatisticas
+
+def _item(linha: sqlite3.Row) -> Dict[str, Any]:
+    """Item como em base_conhecimento.json, a partir de uma linha de itens_base"""
+    return {campo: linha[campo] for campo in CAMPOS_ITEM}
+
+def consultar_itens(
+    conexao: sqlite3.Connection, condicao: str, tipo: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Itens de uma condição (e tipo de refeição), na ordem da base"""
+    if tipo is None:
+        linhas = conexao.execute(
+            'SELECT * FROM itens_base WHERE condicao_digestiva = ? ORDER BY ordem_fonte, indice',
+            (condicao,)
+        )
+    else:
+        linhas = conexao.execute(
+            'SELECT * FROM itens_base WHERE condicao_digestiva = ? AND tipo = ?'
+            ' ORDER BY ordem_fonte, indice',
+            (condicao, tipo)
+        )
+    return [_item(linha) for linha in linhas]
+
+def exportar_resultado(conexao: sqlite3.Connection) -> Dict[str, Any]:
+    """Reconstrói o resultado de construir_base a partir do SQLite
+    (com o trecho dos itens e os índices; ver base_servida)"""
+    itens = [_item(linha) for linha in conexao.execute('SELECT * FROM itens_base ORDER BY ordem_fonte, indice')]
+    metadados = {
+        linha['chave']: json.loads(linha['valor'])
+        for linha in conexao.execute('SELECT chave, valor FROM metadados')
+    }
+    return {
+        'itens': itens,
+        'total_itens': len(itens),
+        'fontes': metadados.get('fontes', []),
+        'origem': metadados.get('origem', ''),
+        'alimentos': dict(conexao.execute('SELECT id, chave FROM alimentos ORDER BY id').fetchall()),
+        'indices': indices_base.construir_indices(itens),
+    }
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos scripts de ingestão com corpora sintéticos.
+
+Gera documentos .docx e dumps extracao_*.json sintéticos em escalas
+relativas ao corpus atual (16 .docx, 191 páginas) e mede cada etapa:
+    - docx:           extrair_docx_base_conhecimento.construir_base
+    - estruturar:     estruturar_dados.main
+    - processar_base: processar_base_conhecimento.processar_pdf_extraido
+    - ocr_lotes:      extrair_pdf_lotes.processar_lote com OCR simulado
+
+Cada etapa roda num processo novo para medir tempo de parede, tempo de
+CPU e pico de RSS isoladamente. Os resultados são acrescentados a um
+histórico JSON junto com o commit atual, e cada execução é comparada
+com a anterior da mesma etapa/escala para acusar regressões.
+
+Roda 100% offline: pdf2image e pytesseract são substituídos por stubs,
+então não é preciso Tesseract nem poppler.
+
+--micro-regex compara, no texto das páginas do dump sintético, as três
+buscas antigas de estruturar_dados (identificar_refeicoes,
+identificar_dias_semana, extrair_medidas) com a varredura única de
+analisar_texto, e confere que os resultados são iguais.
+
+Uso:
+    python3 scripts/benchmark_ingestao.py                  # escalas 10, 100, 1000
+    python3 scripts/benchmark_ingestao.py --escalas 10 --etapas docx,estruturar
+    python3 scripts/benchmark_ingestao.py --escalas 100 --micro-regex
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import subprocess
+import contextlib
+import io
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+SCRIPTS_DIR = Path(__file__).parent
+BASE_DIR = SCRIPTS_DIR.parent
+CACHE_DIR = BASE_DIR / 'data' / '.cache'
+
+# Tamanho do corpus real (escala 1)
+DOCX_BASE = 16
+PAGINAS_BASE = 191
+
+# Incrementar quando os geradores mudarem (invalida os corpora em disco)
+VERSAO_GERADOR = 1
+
+ETAPAS = ['docx', 'estruturar', 'processar_base', 'ocr_lotes']
+
+# Acima desta variação de tempo em relação à execução anterior, acusa regressão
+LIMIAR_REGRESSAO = 0.20
+
+ALIMENTOS = [
+    'Mingau de aveia', 'Banana madura', 'Chá de camomila', 'Frango grelhado',
+    'Arroz branco', 'Abobrinha cozida', 'Cenoura no vapor', 'Azeite',
+    'Pera madura', 'Bolachas de arroz', 'Pasta de grão-de-bico suave',
+    'Sopa cremosa de mandioquinha', 'Peixe assado', 'Batata-doce cozida',
+    'Iogurte sem lactose', 'Mamão papaia', 'Pão sem glúten', 'Ovo cozido',
+    'Quinoa cozida', 'Tapioca', 'Chuchu refogado', 'Maçã assada',
+]
+MEDIDAS = [
+    '{n} colheres de sopa ({g} g)', '{n} unidade média ({g} g)',
+    '1 xícara ({ml} ml)', '1 filé médio ({g} g)', '{n} fatias ({g} g)',
+    '1 colher de chá ({ml} ml)', '1 prato fundo ({ml} ml)', '{g}g',
+]
+REFEICOES = ['Café da Manhã:', 'Almoço:', 'Lanche da Tarde:', 'Jantar:']
+DIAS = ['Segunda-feira', 'Terça-feira', 'Quarta-feira', 'Quinta-feira',
+        'Sexta-feira', 'Sábado', 'Domingo']
+
+# ---------------------------------------------------------------------------
+# Geradores de corpus sintético
+# ---------------------------------------------------------------------------
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/'
+    '2006/relationships/officeDocument" Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+def _paragrafo_xml(texto):
+    return f'<w:p><w:r><w:t xml:space="preserve">{escape(texto)}</w:t></w:r></w:p>'
+
+def _linha_item(rng):
+    medida = rng.choice(MEDIDAS).format(
+        n=rng.randint(1, 4), g=rng.randint(1, 30) * 10, ml=rng.randint(1, 20) * 10
+    )
+    return f"{rng.choice(ALIMENTOS)}: {medida}."
+
+def gerar_docx(caminho, rng, semanas=1):
+    """Grava um .docx mínimo (só word/document.xml) no formato dos cardápios.
+
+    O XML é escrito direto no zip, sem python-docx, para que gerar o corpus
+    de 1000× não domine o tempo do benchmark.
+    """
+    corpo = [_paragrafo_xml(f"Plano de Cardápio Semanal: {caminho.stem}")]
+    corpo.append(_paragrafo_xml("Princípios Chave: evitar frituras, preferir cozidos."))
+    for _ in range(semanas):
+        for dia in DIAS:
+            corpo.append(_paragrafo_xml(dia))
+            for refeicao in REFEICOES:
+                corpo.append(_paragrafo_xml(refeicao))
+                for _ in range(rng.randint(3, 5)):
+                    corpo.append(_paragrafo_xml(_linha_item(rng)))
+    # Uma tabela por documento, para exercitar o caminho de tabelas
+    linhas_tabela = ''.join(
+        '<w:tr>'
+        f'<w:tc>{_paragrafo_xml(refeicao)}</w:tc>'
+        f'<w:tc>{_paragrafo_xml(_linha_item(rng))}</w:tc>'
+        '</w:tr>'
+        for refeicao in REFEICOES
+    )
+    corpo.append(f'<w:tbl>{linhas_tabela}</w:tbl>')
+    documento = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{"".join(corpo)}<w:sectPr/></w:body></w:document>'
+    )
+    with zipfile.ZipFile(caminho, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        z.writestr('_rels/.rels', _RELS)
+        z.writestr('word/document.xml', documento)
+
+def _texto_pagina(rng):
+    linhas = [rng.choice(DIAS)]
+    for refeicao in rng.sample(REFEICOES, rng.randint(1, 4)):
+        linhas.append(refeicao.rstrip(':'))
+        for _ in range(rng.randint(2, 6)):
+            linhas.append(f"- {_linha_item(rng)}")
+    return '\n'.join(linhas)
+
+def gerar_extracao_json(caminho, num_paginas, rng):
+    """Grava um dump no formato de extracao_completa.json / extracao_ocr_completa.json"""
+    paginas = []
+    total_caracteres = 0
+    for numero in range(1, num_paginas + 1):
+        texto = _texto_pagina(rng)
+        total_caracteres += len(texto)
+        paginas.append({
+            'numero': numero,
+            'texto_completo': texto,
+            'tabelas': [[['Refeição', 'Item'], ['Almoço', 'Arroz 4 colheres']]] if numero % 7 == 0 else [],
+            'tem_imagem': numero % 3 == 0,
+            'ocr_necessario': False,
+            'ocr_aplicado': True,
+        })
+    dados = {
+        'total_paginas': num_paginas,
+        'paginas': paginas,
+        'metadados': {'metodo_extracao': 'sintetico', 'total_caracteres': total_caracteres},
+    }
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+
+def preparar_corpus(escala, raiz):
+    """Gera (ou reaproveita) o corpus sintético de uma escala"""
+    destino = raiz / f"escala_{escala}_v{VERSAO_GERADOR}"
+    marcador = destino / 'pronto.json'
+    if marcador.exists():
+        return destino
+
+    print(f"   🧪 Gerando corpus sintético {escala}×...")
+    docx_dir = destino / 'docx'
+    docx_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(escala)
+    arquivos = []
+    for i in range(DOCX_BASE * escala):
+        nome = f"condicao_{i:05d}.docx"
+        gerar_docx(docx_dir / nome, rng)
+        arquivos.append(nome)
+    gerar_extracao_json(destino / 'extracao.json', PAGINAS_BASE * escala, rng)
+
+    with open(marcador, 'w', encoding='utf-8') as f:
+        json.dump({'arquivos': arquivos}, f, ensure_ascii=False)
+    return destino
+
+# ---------------------------------------------------------------------------
+# Etapas (cada uma roda num processo próprio)
+# ---------------------------------------------------------------------------
+
+def _dados_tesseract(texto):
+    """Dicionário no formato de image_to_data (uma linha do Tesseract por linha do texto)"""
+    dados = {chave: [] for chave in ('text', 'conf', 'page_num', 'block_num', 'par_num', 'line_num')}
+    for num_linha, linha in enumerate(texto.split('\n'), start=1):
+        for palavra in linha.split():
+            for chave, valor in zip(dados, (palavra, 95.0, 1, 1, 1, num_linha)):
+                dados[chave].append(valor)
+    return dados
+
+def _instalar_stubs_ocr():
+    """Substitui pdf2image/PIL/pytesseract por stubs determinísticos"""
+    import types
+
+    class ImagemFalsa:
+        def __init__(self, numero):
+            self.numero = numero
+
+        def close(self):
+            pass
+
+    pdf2image = types.ModuleType('pdf2image')
+    pdf2image.convert_from_path = lambda caminho, dpi=200, first_page=1, last_page=1, **kw: [
+        ImagemFalsa(n) for n in range(first_page, last_page + 1)
+    ]
+    pdf2image.pdfinfo_from_path = lambda caminho, **kw: {'Pages': 0}
+    pytesseract = types.ModuleType('pytesseract')
+    pytesseract.image_to_string = lambda imagem, lang=None, config=None: _texto_pagina(
+        random.Random(imagem.numero)
+    )
+    pytesseract.image_to_data = lambda imagem, lang=None, config=None, output_type=None: _dados_tesseract(
+        pytesseract.image_to_string(imagem)
+    )
+    pytesseract.Output = types.SimpleNamespace(DICT='dict')
+    pytesseract.get_tesseract_version = lambda: 'stub'
+    # preprocessamento_ocr (importado pelos extratores) usa Image e ImageOps
+    pil = types.ModuleType('PIL')
+    pil.Image = types.ModuleType('PIL.Image')
+    pil.ImageOps = types.ModuleType('PIL.ImageOps')
+    sys.modules.update({
+        'pdf2image': pdf2image, 'pytesseract': pytesseract,
+        'PIL': pil, 'PIL.Image': pil.Image, 'PIL.ImageOps': pil.ImageOps,
+    })
+
+def _etapa_docx(corpus, saida):
+    import extrair_docx_base_conhecimento as docx_base
+    with open(corpus / 'pronto.json', encoding='utf-8') as f:
+        arquivos = json.load(f)['arquivos']
+    resultado = docx_base.construir_base(corpus / 'docx', arquivos)
+    with open(saida / 'base_conhecimento.json', 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    return resultado['total_itens']
+
+def _etapa_estruturar(corpus, saida):
+    import estruturar_dados
+    dados = estruturar_dados.main(corpus / 'extracao.json', saida / 'dados_estruturados.json')
+    return dados['total_paginas_estruturadas']
+
+def _etapa_processar_base(corpus, saida):
+    import processar_base_conhecimento
+    base = processar_base_conhecimento.processar_pdf_extraido(corpus / 'extracao.json')
+    with open(saida / 'base_conhecimento_pdf.json', 'w', encoding='utf-8') as f:
+        json.dump(base, f, ensure_ascii=False, indent=2)
+    return base['total_itens']
+
+def _etapa_ocr_lotes(corpus, saida):
+    _instalar_stubs_ocr()
+    import extrair_pdf_lotes
+    with open(corpus / 'extracao.json', encoding='utf-8') as f:
+        total = json.load(f)['total_paginas']
+    journal = saida / 'extracao_progresso.jsonl'
+    progresso = extrair_pdf_lotes.carregar_progresso(journal)
+    tamanho_lote = 10
+    for inicio in range(1, total + 1, tamanho_lote):
+        fim = min(inicio + tamanho_lote - 1, total)
+        extrair_pdf_lotes.processar_lote(corpus / 'stub.pdf', inicio, fim, progresso, journal)
+    extrair_pdf_lotes.compactar_journal(journal, progresso)
+    dados = extrair_pdf_lotes.montar_dados(progresso)
+    with open(saida / 'extracao_ocr_completa.json', 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+    return dados['metadados']['paginas_processadas']
+
+_FUNCOES_ETAPA = {
+    'docx': _etapa_docx,
+    'estruturar': _etapa_estruturar,
+    'processar_base': _etapa_processar_base,
+    'ocr_lotes': _etapa_ocr_lotes,
+}
+
+def _executar_etapa(etapa, corpus, saida):
+    """Roda uma etapa no processo atual (filho) e retorna as medições"""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    saida.mkdir(parents=True, exist_ok=True)
+
+    inicio_parede = time.perf_counter()
+    inicio_cpu = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        itens = _FUNCOES_ETAPA[etapa](corpus, saida)
+    tempo = time.perf_counter() - inicio_parede
+    cpu = time.process_time() - inicio_cpu
+
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+    return {
+        'tempo_s': round(tempo, 4),
+        'cpu_s': round(cpu, 4),
+        'rss_pico_mb': round(rss_mb, 1),
+        'itens': itens,
+        'itens_por_s': round(itens / tempo, 1) if tempo > 0 else None,
+    }
+
+# ---------------------------------------------------------------------------
+# Micro-benchmark das regex de estruturar_dados
+# ---------------------------------------------------------------------------
+
+def _melhor_tempo(funcao, textos, repeticoes):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for texto in textos:
+            funcao(texto)
+        tempo = time.perf_counter() - inicio
+        melhor = tempo if melhor is None else min(melhor, tempo)
+    return melhor
+
+def micro_regex(corpus, repeticoes=5):
+    """Tempo por página das buscas separadas e da varredura única (melhor de `repeticoes`)"""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    import estruturar_dados
+
+    def buscas_separadas(texto):
+        return (
+            estruturar_dados.identificar_refeicoes(texto),
+            estruturar_dados.identificar_dias_semana(texto),
+            estruturar_dados.extrair_medidas(texto),
+        )
+
+    with open(corpus / 'extracao.json', encoding='utf-8') as f:
+        textos = [p.get('texto_completo', '') for p in json.load(f)['paginas']]
+    divergentes = sum(
+        1 for texto in textos if estruturar_dados.analisar_texto(texto) != buscas_separadas(texto)
+    )
+    separadas = _melhor_tempo(buscas_separadas, textos, repeticoes)
+    unica = _melhor_tempo(estruturar_dados.analisar_texto, textos, repeticoes)
+    return {
+        'paginas': len(textos),
+        'separadas_us': round(separadas / len(textos) * 1e6, 1),
+        'unica_us': round(unica / len(textos) * 1e6, 1),
+        'aceleracao': round(separadas / unica, 2) if unica > 0 else None,
+        'divergentes': divergentes,
+    }
+
+# ---------------------------------------------------------------------------
+# Histórico
+# ---------------------------------------------------------------------------
+
+def commit_atual():
+    """Hash curto do commit atual (None fora de um repositório git)"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def carregar_historico(caminho):
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'execucoes': []}
+
+def ultima_execucao(historico, etapa, escala):
+    for registro in reversed(historico['execucoes']):
+        if registro['etapa'] == etapa and registro['escala'] == escala:
+            return registro
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dos scripts de ingestão')
+    parser.add_argument('--escalas', default='10,100,1000',
+                        help='múltiplos do corpus atual, separados por vírgula')
+    parser.add_argument('--etapas', default=','.join(ETAPAS),
+                        help=f"etapas a medir ({', '.join(ETAPAS)})")
+    parser.add_argument('--max-escala-ocr', type=int, default=100,
+                        help='maior escala em que a etapa ocr_lotes é executada')
+    parser.add_argument('--dir-corpus', type=Path, default=CACHE_DIR / 'bench_corpus',
+                        help='onde gerar/reaproveitar os corpora sintéticos')
+    parser.add_argument('--historico', type=Path, default=CACHE_DIR / 'benchmark_historico.json',
+                        help='arquivo JSON com o histórico de execuções')
+    parser.add_argument('--micro-regex', action='store_true',
+                        help='só compara as regex de estruturar_dados (buscas separadas × varredura única)')
+    args = parser.parse_args()
+
+    escalas = [int(e) for e in args.escalas.split(',') if e.strip()]
+    etapas = [e.strip() for e in args.etapas.split(',') if e.strip()]
+    desconhecidas = set(etapas) - set(ETAPAS)
+    if desconhecidas:
+        print(f"❌ Etapas desconhecidas: {', '.join(sorted(desconhecidas))}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.micro_regex:
+        print(f"⏱️  Regex de estruturar_dados: buscas separadas × varredura única\n")
+        for escala in escalas:
+            corpus = preparar_corpus(escala, args.dir_corpus)
+            medicao = micro_regex(corpus)
+            print(
+                f"   ✓ {escala}× ({medicao['paginas']} páginas): {medicao['separadas_us']:.1f} µs → "
+                f"{medicao['unica_us']:.1f} µs por página ({medicao['aceleracao'] or 0:.2f}×)"
+            )
+            if medicao['divergentes']:
+                print(f"   ❌ {medicao['divergentes']} páginas com resultado diferente", file=sys.stderr)
+                sys.exit(1)
+        return
+
+    commit = commit_atual()
+    historico = carregar_historico(args.historico)
+    contexto = multiprocessing.get_context('spawn')
+
+    print(f"⏱️  Benchmark de ingestão (commit {commit or '?'})")
+    print(f"   Escalas: {', '.join(f'{e}×' for e in escalas)}")
+    print(f"   Etapas: {', '.join(etapas)}\n")
+
+    regressoes = []
+    for escala in escalas:
+        print(f"📦 Escala {escala}×")
+        corpus = preparar_corpus(escala, args.dir_corpus)
+
+        for etapa in etapas:
+            if etapa == 'ocr_lotes' and escala > args.max_escala_ocr:
+                print(f"   ⏭️  {etapa}: pulado (acima de --max-escala-ocr {args.max_escala_ocr})")
+                continue
+
+            saida = corpus / 'saida' / etapa
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                medicao = executor.submit(_executar_etapa, etapa, corpus, saida).result()
+
+            anterior = ultima_execucao(historico, etapa, escala)
+            variacao = ''
+            if anterior and anterior['tempo_s'] > 0:
+                delta = medicao['tempo_s'] / anterior['tempo_s'] - 1
+                variacao = f" ({delta:+.0%} vs {anterior.get('commit') or '?'})"
+                if delta > LIMIAR_REGRESSAO:
+                    regressoes.append(f"{etapa} @ {escala}×{variacao}")
+
+            print(
+                f"   ✓ {etapa}: {medicao['tempo_s']:.3f} s{variacao}, "
+                f"CPU {medicao['cpu_s']:.3f} s, RSS pico {medicao['rss_pico_mb']:.1f} MB, "
+                f"{medicao['itens']} itens ({medicao['itens_por_s'] or 0:,.0f}/s)"
+            )
+
+            historico['execucoes'].append({
+                'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'commit': commit,
+                'escala': escala,
+                'etapa': etapa,
+                **medicao,
+            })
+        print()
+
+    args.historico.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.historico, 'w', encoding='utf-8') as f:
+        json.dump(historico, f, ensure_ascii=False, indent=2)
+
+    print(f"💾 Histórico salvo em: {args.historico}")
+    if regressoes:
+        print(f"\n⚠️  Possíveis regressões (> {LIMIAR_REGRESSAO:.0%} mais lento):")
+        for regressao in regressoes:
+            print(f"   - {regressao}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Índice invertido de busca textual sobre os itens da base de conhecimento.
+
+Cada item é indexado pelo nome e pelo trecho (linha do .docx de onde
+saiu, com o modo de preparo e observações). O texto é tokenizado como em
+nomes_canonicos: sem acentos, minúsculo, plurais reduzidos ("Batatas
+cozidas" -> batata, cozida) e sem palavras vazias (de, com, ou...).
+
+Gravado por extrair_docx_base_conhecimento.py em
+data/base_conhecimento.busca.json:
+    {'versao': 1, 'ids': [id do item em cada posição],
+     'termos': {termo: [[posições com o termo no nome],
+                        [posições com o termo só no trecho]]}}
+
+Consulta (todas as palavras precisam aparecer; a última vale como
+prefixo, "avei" encontra "aveia"):
+    from busca_base import carregar_indice_busca
+    indice = carregar_indice_busca(Path('data/base_conhecimento.busca.json'))
+    indice.buscar('aveia cozida')  # IDs, mais relevantes primeiro
+
+Uso: python3 scripts/busca_base.py aveia [--limite N]
+"""
+
+import argparse
+import bisect
+import json
+import math
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import gravacao_json
+from indices_base import normalizar_nome
+from nomes_canonicos import singular
+
+VERSAO_BUSCA = 1
+
+PADRAO_TERMO = re.compile(r'[a-z0-9]+')
+PALAVRAS_VAZIAS = {
+    'a', 'o', 'as', 'os', 'e', 'ou', 'de', 'da', 'do', 'das', 'dos', 'em', 'no', 'na',
+    'nos', 'nas', 'ao', 'aos', 'com', 'para', 'por', 'um', 'uma', 'ex',
+}
+
+# Ocorrência no nome pesa mais que ocorrência só no trecho
+PESO_NOME = 2.0
+PESO_TRECHO = 1.0
+
+def tokenizar(texto: str) -> List[str]:
+    """Termos de busca do texto, na ordem ("Batatas cozidas (90 g)" -> ['batata', 'cozida', 'g'])"""
+    return [
+        singular(palavra)
+        for palavra in PADRAO_TERMO.findall(normalizar_nome(texto))
+        if palavra not in PALAVRAS_VAZIAS and not palavra.isdigit()
+    ]
+
+def construir_indice_busca(itens: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Monta as listas de posições de cada termo (nome e trecho), na ordem dos itens"""
+    termos: Dict[str, List[List[int]]] = {}
+    for posicao, item in enumerate(itens):
+        no_nome = set(tokenizar(item['nome']))
+        no_trecho = set(tokenizar(item.get('trecho', ''))) - no_nome
+        for termo in no_nome:
+            termos.setdefault(termo, [[], []])[0].append(posicao)
+        for termo in no_trecho:
+            termos.setdefault(termo, [[], []])[1].append(posicao)
+    return {
+        'versao': VERSAO_BUSCA,
+        'ids': [item['id'] for item in itens],
+        'termos': {termo: termos[termo] for termo in sorted(termos)},
+    }
+
+class IndiceBusca:
+    """Consultas sobre o índice de construir_indice_busca"""
+
+    def __init__(self, dados: Dict[str, Any]):
+        if dados.get('versao') != VERSAO_BUSCA:
+            raise ValueError(f"Versão do índice de busca não suportada: {dados.get('versao')}")
+        self.ids = dados['ids']
+        self.termos = dados['termos']
+        self.vocabulario = sorted(self.termos)
+        total = len(self.ids)
+        # IDF suavizado: termos raros valem mais
+        self.idf = {
+            termo: math.log(1 + total / (len(nome) + len(trecho)))
+            for termo, (nome, trecho) in self.termos.items()
+        }
+
+    def _expandir(self, termo: str, prefixo: bool) -> List[str]:
+        if not prefixo:
+            return [termo] if termo in self.termos else []
+        inicio = bisect.bisect_left(self.vocabulario, termo)
+        fim = bisect.bisect_left(self.vocabulario, termo + '\uffff', inicio)
+        return self.vocabulario[inicio:fim]
+
+    def _pontuar_termo(self, termo: str, prefixo: bool) -> Dict[int, float]:
+        """{posição: pontuação} dos itens com o termo (ou um termo que começa com ele)"""
+        pontos: Dict[int, float] = {}
+        for variante in self._expandir(termo, prefixo):
+            idf = self.idf[variante]
+            nome, trecho = self.termos[variante]
+            for posicao in trecho:
+                if pontos.get(posicao, 0.0) < idf * PESO_TRECHO:
+                    pontos[posicao] = idf * PESO_TRECHO
+            for posicao in nome:
+                if pontos.get(posicao, 0.0) < idf * PESO_NOME:
+                    pontos[posicao] = idf * PESO_NOME
+        return pontos
+
+    def buscar(self, consulta: str, limite: int = 20, prefixo: bool = True) -> List[str]:
+        """IDs dos itens que contêm todos os termos da consulta, mais relevantes
+        primeiro (empate: ordem da base). Com `prefixo`, o último termo
+        também casa com termos que começam com ele.
+        """
+        termos = tokenizar(consulta)
+        if not termos:
+            return []
+
+        resultado = None
+        for i, termo in enumerate(termos):
+            pontos = self._pontuar_termo(termo, prefixo and i == len(termos) - 1)
+            if resultado is None:
+                resultado = pontos
+            else:
+                resultado = {p: resultado[p] + v for p, v in pontos.items() if p in resultado}
+            if not resultado:
+                return []
+
+        ordenados = sorted(resultado, key=lambda p: (-resultado[p], p))
+        return [self.ids[p] for p in ordenados[:limite]]
+
+def exportar_indice_busca(indice: Dict[str, Any], caminho: Path) -> Path:
+    """Grava o índice em JSON compacto"""
+    return gravacao_json.gravar_json(indice, caminho, 'compacto')
+
+def carregar_indice_busca(caminho: Path) -> IndiceBusca:
+    """Lê base_conhecimento.busca.json"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return IndiceBusca(json.load(f))
+
+def main():
+    parser = argparse.ArgumentParser(description='Busca textual na base de conhecimento')
+    parser.add_argument('consulta', nargs='+')
+    parser.add_argument('--limite', type=int, default=20)
+    args = parser.parse_args()
+
+    base_dir = Path(__file__).parent.parent
+    indice = carregar_indice_busca(base_dir / 'data' / 'base_conhecimento.busca.json')
+    with open(base_dir / 'data' / 'base_conhecimento.json', 'r', encoding='utf-8') as f:
+        itens = {item['id']: item for item in json.load(f)['itens']}
+
+    consulta = ' '.join(args.consulta)
+    inicio = time.perf_counter()
+    ids = indice.buscar(consulta, args.limite)
+    duracao = time.perf_counter() - inicio
+
+    print(f"🔎 '{consulta}': {len(ids)} itens em {duracao * 1000:.3f} ms")
+    for id_item in ids:
+        item = itens[id_item]
+        print(f"   - {id_item} {item['nome']} — {item['quantidade']} ({item['tipo']}, {item['condicao_digestiva']})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Cache persistente de resultados de OCR (SQLite em data/.cache/ocr.sqlite3).
+
+A chave é o SHA-256 dos pixels da página rasterizada mais os parâmetros
+que mudam o resultado: idioma, config do Tesseract (--psm...), dpi e
+versão do Tesseract. Reprocessar um livro em que só algumas páginas
+mudaram custa apenas o OCR dessas páginas.
+
+Também guarda a confiança média do Tesseract calculada por confianca_ocr
+(pré-processamento adaptativo, ver preprocessamento_ocr.py).
+
+O cache tem limite de tamanho (soma dos textos) e descarta as entradas
+usadas há mais tempo (LRU). Pode ser passado para workers de um
+ProcessPoolExecutor: cada processo abre a própria conexão.
+"""
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pytesseract
+
+CAMINHO_PADRAO = Path(__file__).parent.parent / 'data' / '.cache' / 'ocr.sqlite3'
+LIMITE_PADRAO_MB = 256
+
+class CacheOCR:
+    """Cache de texto OCR por hash de imagem + parâmetros do Tesseract"""
+
+    def __init__(self, caminho: Path = CAMINHO_PADRAO, limite_mb: float = LIMITE_PADRAO_MB):
+        self.caminho = Path(caminho)
+        self.limite_bytes = int(limite_mb * 1024 * 1024)
+        try:
+            self.versao_tesseract = str(pytesseract.get_tesseract_version())
+        except Exception:
+            self.versao_tesseract = 'desconhecida'
+        self._conexao = None
+
+    def __getstate__(self):
+        # A conexão SQLite não atravessa processos; o worker reabre a sua
+        estado = self.__dict__.copy()
+        estado['_conexao'] = None
+        return estado
+
+    @property
+    def conexao(self) -> sqlite3.Connection:
+        if self._conexao is None:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            self._conexao = sqlite3.connect(self.caminho, timeout=30)
+            self._conexao.execute('PRAGMA journal_mode=WAL')
+            self._conexao.execute(
+                'CREATE TABLE IF NOT EXISTS ocr ('
+                ' chave TEXT PRIMARY KEY,'
+                ' texto TEXT NOT NULL,'
+                ' tamanho INTEGER NOT NULL,'
+                ' ultimo_acesso REAL NOT NULL,'
+                ' confianca REAL)'
+            )
+            # Caches criados antes da coluna de confiança
+            colunas = {linha[1] for linha in self._conexao.execute('PRAGMA table_info(ocr)')}
+            if 'confianca' not in colunas:
+                self._conexao.execute('ALTER TABLE ocr ADD COLUMN confianca REAL')
+            self._conexao.execute(
+                'CREATE INDEX IF NOT EXISTS ocr_ultimo_acesso ON ocr (ultimo_acesso)'
+            )
+            self._conexao.commit()
+        return self._conexao
+
+    def chave(self, imagem, lang: str, config: str, dpi: int) -> str:
+        """Hash dos pixels da imagem + parâmetros do OCR"""
+        h = hashlib.sha256()
+        h.update(f"{imagem.mode}|{imagem.size}|{lang}|{config}|{dpi}|{self.versao_tesseract}|".encode())
+        h.update(imagem.tobytes())
+        return h.hexdigest()
+
+    def obter(self, chave: str) -> Optional[str]:
+        registro = self.obter_registro(chave)
+        return None if registro is None else registro[0]
+
+    def obter_registro(self, chave: str) -> Optional[Tuple[str, Optional[float]]]:
+        """(texto, confiança) da entrada, ou None"""
+        linha = self.conexao.execute(
+            'SELECT texto, confianca FROM ocr WHERE chave = ?', (chave,)
+        ).fetchone()
+        if linha is None:
+            return None
+        with self.conexao:
+            self.conexao.execute(
+                'UPDATE ocr SET ultimo_acesso = ? WHERE chave = ?', (time.time(), chave)
+            )
+        return linha[0], linha[1]
+
+    def gravar(self, chave: str, texto: str, confianca: Optional[float] = None) -> None:
+        tamanho = len(texto.encode('utf-8'))
+        with self.conexao:
+            self.conexao.execute(
+                'INSERT OR REPLACE INTO ocr (chave, texto, tamanho, ultimo_acesso, confianca)'
+                ' VALUES (?, ?, ?, ?, ?)',
+                (chave, texto, tamanho, time.time(), confianca)
+            )
+            self._descartar_excesso()
+
+    def _descartar_excesso(self) -> None:
+        """Remove as entradas menos recentes até caber no limite (LRU)"""
+        total = self.conexao.execute('SELECT COALESCE(SUM(tamanho), 0) FROM ocr').fetchone()[0]
+        if total <= self.limite_bytes:
+            return
+        excesso = total - self.limite_bytes
+        descartar = []
+        for chave, tamanho in self.conexao.execute(
+            'SELECT chave, tamanho FROM ocr ORDER BY ultimo_acesso'
+        ):
+            descartar.append((chave,))
+            excesso -= tamanho
+            if excesso <= 0:
+                break
+        self.conexao.executemany('DELETE FROM ocr WHERE chave = ?', descartar)
+
+    def fechar(self) -> None:
+        if self._conexao is not None:
+            self._conexao.close()
+            self._conexao = None
+
+def ocr_com_cache(imagem, cache: Optional[CacheOCR], lang: str, config: str = '', dpi: int = 300) -> str:
+    """pytesseract.image_to_string consultando/alimentando o cache (se houver).
+
+    Erros do Tesseract são propagados e nunca vão para o cache.
+    """
+    if cache is None:
+        return pytesseract.image_to_string(imagem, lang=lang, config=config)
+
+    chave = cache.chave(imagem, lang, config, dpi)
+    texto = cache.obter(chave)
+    if texto is None:
+        texto = pytesseract.image_to_string(imagem, lang=lang, config=config)
+        cache.gravar(chave, texto)
+    return texto
+
+def confianca_media(dados) -> Optional[float]:
+    """Confiança média (0-100) a partir do dicionário de image_to_data,
+    ponderada pelo tamanho de cada palavra; None se o Tesseract não
+    reconheceu nenhuma palavra.
+    """
+    soma = peso = 0.0
+    for palavra, conf in zip(dados['text'], dados['conf']):
+        palavra = (palavra or '').strip()
+        conf = float(conf)
+        if not palavra or conf < 0:
+            continue
+        soma += conf * len(palavra)
+        peso += len(palavra)
+    return soma / peso if peso else None
+
+def confianca_ocr(
+    imagem, cache: Optional[CacheOCR], lang: str, config: str = '', dpi: int = 300
+) -> Optional[float]:
+    """Confiança média do Tesseract na imagem (image_to_data), com cache.
+
+    Só a confiança: o texto continua vindo de image_to_string
+    (ocr_com_cache), o mesmo do OCR sem pré-processamento.
+    """
+    chave = None
+    if cache is not None:
+        # Marcador na config: a entrada de image_to_string da mesma imagem não serve
+        chave = cache.chave(imagem, lang, config + '|confianca', dpi)
+        registro = cache.obter_registro(chave)
+        if registro is not None:
+            return registro[1]
+
+    dados = pytesseract.image_to_data(
+        imagem, lang=lang, config=config, output_type=pytesseract.Output.DICT
+    )
+    confianca = confianca_media(dados)
+    if cache is not None:
+        cache.gravar(chave, '', confianca)
+    return confianca
@@ -2,23 +2,58 @@
 """
 Script para estruturar os dados extraídos do PDF em formato organizado.
 Este script organiza por: Página → Dia → Refeição → Itens
+
+As páginas são estruturadas e gravadas uma a uma, com o resumo somado no
+caminho (uma única passada).
+
+Uso: python3 scripts/estruturar_dados.py [--formato indentado|compacto|ndjson] [--profile [CAMINHO]]
+       [--entrada CAMINHO] [--pagina N]
+
+A entrada pode ser o .json ou o .ndjson da extração; no NDJSON as
+páginas são lidas uma a uma (ver paginas_ndjson.py) e --pagina N
+estrutura só a página N, sem ler as outras.
+
+Refeições, dias e medidas de cada página saem de uma única varredura do
+texto (analisar_texto); benchmark_ingestao.py --micro-regex compara com
+as buscas separadas.
 """
 
+import sys
 import json
 import re
+import argparse
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import gravacao_json
+import perfil
+from paginas_ndjson import PaginasNDJSON, abrir_paginas, resolver_entrada
+from perfil import SEM_PERFIL
+
+# Padrões de refeições (regex, no texto em minúsculas), dias da semana e
+# medidas, como as buscas originais os usam
+PADROES_REFEICOES = [
+    r'café\s+da\s+manhã',
+    r'lanche\s+da\s+manhã',
+    r'almoço',
+    r'lanche\s+da\s+tarde',
+    r'jantar',
+    r'ceia',
+]
+DIAS_SEMANA = ['segunda', 'terça', 'quarta', 'quinta', 'sexta', 'sábado', 'domingo']
+PADROES_MEDIDAS = [
+    (r'(\d+)\s*g\b', 'gramas'),
+    (r'(\d+)\s*ml\b', 'mililitros'),
+    (r'(\d+)\s*kg\b', 'quilogramas'),
+    (r'(\d+)\s*colher(?:es)?\s*(?:de\s*)?(?:sopa|chá)', 'colher'),
+    (r'(\d+)\s*xícara(?:s)?', 'xícara'),
+    (r'(\d+)\s*unidade(?:s)?', 'unidade'),
+]
 
 def identificar_refeicoes(texto: str) -> List[str]:
     """Identifica tipos de refeições no texto"""
-    refeicoes_padrao = [
-        r'café\s+da\s+manhã',
-        r'lanche\s+da\s+manhã',
-        r'almoço',
-        r'lanche\s+da\s+tarde',
-        r'jantar',
-        r'ceia',
-    ]
+    refeicoes_padrao = PADROES_REFEICOES
     
     refeicoes_encontradas = []
     texto_lower = texto.lower()
@@ -31,7 +66,7 @@ def identificar_refeicoes(texto: str) -> List[str]:
 
 def identificar_dias_semana(texto: str) -> List[str]:
     """Identifica dias da semana no texto"""
-    dias = ['segunda', 'terça', 'quarta', 'quinta', 'sexta', 'sábado', 'domingo']
+    dias = DIAS_SEMANA
     dias_encontrados = []
     texto_lower = texto.lower()
     
@@ -46,14 +81,7 @@ def extrair_medidas(texto: str) -> List[Dict[str, str]]:
     medidas = []
     
     # Padrões de medidas
-    padroes = [
-        (r'(\d+)\s*g\b', 'gramas'),
-        (r'(\d+)\s*ml\b', 'mililitros'),
-        (r'(\d+)\s*kg\b', 'quilogramas'),
-        (r'(\d+)\s*colher(?:es)?\s*(?:de\s*)?(?:sopa|chá)', 'colher'),
-        (r'(\d+)\s*xícara(?:s)?', 'xícara'),
-        (r'(\d+)\s*unidade(?:s)?', 'unidade'),
-    ]
+    padroes = PADROES_MEDIDAS
     
     for padrao, tipo in padroes:
         matches = re.finditer(padrao, texto, re.IGNORECASE)
@@ -66,16 +94,102 @@ def extrair_medidas(texto: str) -> List[Dict[str, str]]:
     
     return medidas
 
+# Letras do português da mais frequente para a mais rara: a âncora de cada
+# palavra na varredura é a sua letra mais rara
+LETRAS_POR_FREQUENCIA = 'aeosrindmutclpvgãhqébçfáízjóxêúâõôkwyà'
+# Prefixo comum dos PADROES_MEDIDAS; o resto é a unidade
+PREFIXO_MEDIDA = r'(\d+)\s*'
+
+def _partir_na_ancora(padrao: str) -> Tuple[str, str, str]:
+    """(antes, âncora, depois) de um padrão de palavra.
+
+    A âncora é a letra mais rara da primeira palavra (antes de qualquer
+    \s+), para que o lookbehind `antes` tenha tamanho fixo.
+    """
+    primeira = padrao.split('\\', 1)[0]
+    posicao = max(
+        range(len(primeira)),
+        key=lambda i: (LETRAS_POR_FREQUENCIA.find(primeira[i]) % len(LETRAS_POR_FREQUENCIA), -i)
+    )
+    return padrao[:posicao], padrao[posicao], padrao[posicao + 1:]
+
+def _montar_varredura() -> re.Pattern:
+    """Regex única de analisar_texto (aplicada ao texto em minúsculas).
+
+    Montada a partir de PADROES_REFEICOES, DIAS_SEMANA e PADROES_MEDIDAS.
+    Começa por uma classe com os dígitos e as âncoras (_partir_na_ancora),
+    o que deixa o re pular direto para as posições candidatas; cada ramo
+    confere o resto com lookbehind/lookahead e se identifica por um grupo
+    nomeado (r<i>: refeição, d<i>: dia, m<i>: unidade da medida). Palavras
+    só consomem a âncora, então ocorrências sobrepostas continuam sendo
+    achadas; medidas consomem só os dígitos, como o (\d+) de extrair_medidas.
+    """
+    unidades = []
+    for i, (padrao, _) in enumerate(PADROES_MEDIDAS):
+        assert padrao.startswith(PREFIXO_MEDIDA), padrao
+        unidades.append(f'(?P<m{i}>{padrao[len(PREFIXO_MEDIDA):]})')
+    ramos = [rf"(?<=\d)\d*(?=\s*(?:{'|'.join(unidades)}))"]
+    ancoras = set()
+    for letra, padroes in (('r', PADROES_REFEICOES), ('d', DIAS_SEMANA)):
+        for i, padrao in enumerate(padroes):
+            antes, ancora, depois = _partir_na_ancora(padrao)
+            ramos.append(f'(?<={antes}{ancora})(?P<{letra}{i}>)(?={depois})')
+            ancoras.add(ancora)
+    return re.compile(rf"[\d{''.join(sorted(ancoras))}](?:{'|'.join(ramos)})")
+
+_VARREDURA = _montar_varredura()
+
+# Letras que o re com IGNORECASE iguala às das unidades ('i', 's') sem que
+# lower() as converta: com elas no texto, vale a busca sem atalhos
+_CASOS_ESPECIAIS = ('ı', 'ſ')
+
+def analisar_texto(texto: str) -> Tuple[List[str], List[str], List[Dict[str, str]]]:
+    """(refeições, dias, medidas) do texto numa única passada.
+
+    Mesmo resultado, na mesma ordem, de identificar_refeicoes,
+    identificar_dias_semana e extrair_medidas, que fariam 19 buscas.
+    Se lower() mudar o tamanho do texto (as posições deixariam de
+    corresponder) ou houver letras de _CASOS_ESPECIAIS, usa as três.
+    """
+    texto_lower = texto.lower()
+    if len(texto_lower) != len(texto) or any(letra in texto_lower for letra in _CASOS_ESPECIAIS):
+        return identificar_refeicoes(texto), identificar_dias_semana(texto), extrair_medidas(texto)
+    
+    refeicoes = [False] * len(PADROES_REFEICOES)
+    dias = [False] * len(DIAS_SEMANA)
+    medidas = [[] for _ in PADROES_MEDIDAS]
+    for match in _VARREDURA.finditer(texto_lower):
+        grupo = match.lastgroup
+        tipo, i = grupo[0], int(grupo[1:])
+        if tipo == 'r':
+            refeicoes[i] = True
+        elif tipo == 'd':
+            dias[i] = True
+        else:
+            inicio = match.start()
+            medidas[i].append({
+                'valor': texto[inicio:match.end()],
+                'tipo': PADROES_MEDIDAS[i][1],
+                'texto_completo': texto[inicio:match.end(grupo)]
+            })
+    
+    return (
+        [PADROES_REFEICOES[i].replace(r'\s+', ' ') for i, achou in enumerate(refeicoes) if achou],
+        [DIAS_SEMANA[i] for i, achou in enumerate(dias) if achou],
+        [medida for por_tipo in medidas for medida in por_tipo],
+    )
+
 def estruturar_pagina(pagina_data: Dict) -> Dict:
     """Estrutura os dados de uma página"""
     texto = pagina_data.get('texto_completo', '')
+    refeicoes, dias, medidas = analisar_texto(texto)
     
     estrutura = {
         'numero_pagina': pagina_data['numero'],
         'texto_bruto': texto,
-        'refeicoes_encontradas': identificar_refeicoes(texto),
-        'dias_encontrados': identificar_dias_semana(texto),
-        'medidas_encontradas': extrair_medidas(texto),
+        'refeicoes_encontradas': refeicoes,
+        'dias_encontrados': dias,
+        'medidas_encontradas': medidas,
         'tem_tabelas': len(pagina_data.get('tabelas', [])) > 0,
         'num_tabelas': len(pagina_data.get('tabelas', [])),
         'tem_imagem': pagina_data.get('tem_imagem', False),
@@ -83,60 +197,125 @@ def estruturar_pagina(pagina_data: Dict) -> Dict:
     
     return estrutura
 
-def main():
+def entrada_padrao() -> Path:
+    """data/extracao_completa.json (ou .ndjson, se a extração foi gravada assim)"""
+    return resolver_entrada(Path(__file__).parent.parent / 'data' / 'extracao_completa.json')
+
+def ler_pagina(input_path: Path, numero: int) -> Dict:
+    """Só a página `numero` da extração (direto pelo índice, se a entrada for NDJSON)"""
+    if input_path.suffix == '.ndjson':
+        with PaginasNDJSON(input_path) as paginas:
+            return paginas.pagina(numero)
+    with abrir_paginas(input_path) as (_, paginas):
+        for pagina_data in paginas:
+            if pagina_data['numero'] == numero:
+                return pagina_data
+    raise KeyError(numero)
+
+def estruturar_uma_pagina(input_path: Path, numero: int, perfil=SEM_PERFIL) -> Dict:
+    """Estrutura só a página `numero`, medindo as mesmas etapas de main()"""
+    with perfil.etapa('json_leitura'):
+        pagina_data = ler_pagina(input_path, numero)
+    with perfil.etapa('regex', pagina=numero):
+        return estruturar_pagina(pagina_data)
+
+def novo_resumo() -> Dict[str, int]:
+    """Contadores do resumo, zerados (atualizados por estruturar_paginas)"""
+    return {
+        'paginas_com_refeicoes': 0,
+        'paginas_com_dias': 0,
+        'paginas_com_tabelas': 0,
+        'total_medidas': 0,
+    }
+
+def estruturar_paginas(paginas: Iterable[Dict], resumo: Dict[str, int],
+                       perfil=SEM_PERFIL) -> Iterator[Dict]:
+    """Estrutura as páginas à medida que são lidas, somando cada uma ao `resumo`"""
+    for pagina_data in paginas:
+        with perfil.etapa('regex', pagina=pagina_data['numero']):
+            estrutura = estruturar_pagina(pagina_data)
+        resumo['paginas_com_refeicoes'] += bool(estrutura['refeicoes_encontradas'])
+        resumo['paginas_com_dias'] += bool(estrutura['dias_encontrados'])
+        resumo['paginas_com_tabelas'] += estrutura['tem_tabelas']
+        resumo['total_medidas'] += len(estrutura['medidas_encontradas'])
+        yield estrutura
+
+def main(input_path=None, output_path=None, perfil=SEM_PERFIL, formato='indentado'):
+    """Estrutura o dump da extração em uma passada, gravando cada página assim
+    que fica pronta. Com entrada .ndjson, a memória não depende do número
+    de páginas.
+    
+    Retorna os metadados, o resumo e o total de páginas estruturadas (as
+    páginas ficam só no arquivo de saída).
+    """
     # Carregar dados extraídos
-    input_path = Path(__file__).parent.parent / 'data' / 'extracao_completa.json'
+    if input_path is None:
+        input_path = entrada_padrao()
     
     if not input_path.exists():
         print(f"❌ Arquivo não encontrado: {input_path}", file=sys.stderr)
         sys.exit(1)
     
+    if output_path is None:
+        output_path = Path(__file__).parent.parent / 'data' / 'dados_estruturados.json'
+    
     print(f"📖 Carregando dados de: {input_path}")
     
-    with open(input_path, 'r', encoding='utf-8') as f:
-        dados_extraidos = json.load(f)
-    
-    print(f"📄 Processando {dados_extraidos['total_paginas']} páginas...\n")
-    
-    # Estruturar cada página
-    paginas_estruturadas = []
-    
-    for pagina_data in dados_extraidos['paginas']:
-        estrutura = estruturar_pagina(pagina_data)
-        paginas_estruturadas.append(estrutura)
-    
-    # Criar estrutura final
-    dados_estruturados = {
-        'metadados': {
-            'total_paginas': dados_extraidos['total_paginas'],
-            'total_caracteres': dados_extraidos['metadados']['total_caracteres'],
-            'data_extracao': dados_extraidos['metadados'].get('data_extracao', ''),
-        },
-        'paginas': paginas_estruturadas,
-        'resumo': {
-            'paginas_com_refeicoes': sum(1 for p in paginas_estruturadas if p['refeicoes_encontradas']),
-            'paginas_com_dias': sum(1 for p in paginas_estruturadas if p['dias_encontrados']),
-            'paginas_com_tabelas': sum(1 for p in paginas_estruturadas if p['tem_tabelas']),
-            'total_medidas': sum(len(p['medidas_encontradas']) for p in paginas_estruturadas),
+    resumo = novo_resumo()
+    with ExitStack() as pilha:
+        # No .json o documento é carregado aqui; no .ndjson, só o índice
+        with perfil.etapa('json_leitura'):
+            campos, paginas = pilha.enter_context(abrir_paginas(input_path))
+        
+        print(f"📄 Processando {campos['total_paginas']} páginas...\n")
+        
+        metadados = {
+            'total_paginas': campos['total_paginas'],
+            'total_caracteres': campos['metadados']['total_caracteres'],
+            'data_extracao': campos['metadados'].get('data_extracao', ''),
         }
-    }
-    
-    # Salvar dados estruturados
-    output_path = Path(__file__).parent.parent / 'data' / 'dados_estruturados.json'
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(dados_estruturados, f, ensure_ascii=False, indent=2)
+        
+        # Cada página estruturada vai direto para a saída (arquivo trocado só no fim)
+        gravador = pilha.enter_context(gravacao_json.GravadorPaginas(
+            output_path, formato, campo_numero='numero_pagina'
+        ))
+        gravador.iniciar({'metadados': metadados})
+        for estrutura in estruturar_paginas(paginas, resumo, perfil):
+            with perfil.etapa('json', pagina=estrutura['numero_pagina']):
+                gravador.adicionar(estrutura)
+        gravador.concluir({'resumo': resumo})
+    output_path = gravador.caminho
     
     print(f"✅ Estruturação completa!")
     print(f"💾 Dados salvos em: {output_path}\n")
     
     print(f"📊 Resumo:")
-    print(f"   - Páginas com refeições identificadas: {dados_estruturados['resumo']['paginas_com_refeicoes']}")
-    print(f"   - Páginas com dias da semana: {dados_estruturados['resumo']['paginas_com_dias']}")
-    print(f"   - Páginas com tabelas: {dados_estruturados['resumo']['paginas_com_tabelas']}")
-    print(f"   - Total de medidas encontradas: {dados_estruturados['resumo']['total_medidas']}")
+    print(f"   - Páginas com refeições identificadas: {resumo['paginas_com_refeicoes']}")
+    print(f"   - Páginas com dias da semana: {resumo['paginas_com_dias']}")
+    print(f"   - Páginas com tabelas: {resumo['paginas_com_tabelas']}")
+    print(f"   - Total de medidas encontradas: {resumo['total_medidas']}")
     
-    return dados_estruturados
+    return {'metadados': metadados, 'resumo': resumo, 'total_paginas_estruturadas': gravador.total}
 
 if __name__ == '__main__':
-    import sys
-    main()
+    parser = argparse.ArgumentParser(description='Estrutura os dados extraídos do PDF por página')
+    parser.add_argument('--formato', choices=gravacao_json.FORMATOS, default='indentado',
+                        help='formato da saída (padrão: indentado; ndjson grava uma página por linha)')
+    parser.add_argument('--entrada', type=Path, default=None,
+                        help='dump da extração, .json ou .ndjson (padrão: data/extracao_completa.json)')
+    parser.add_argument('--pagina', type=int, default=None,
+                        help='estrutura só a página N e imprime o resultado')
+    perfil.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    medicao = perfil.de_argumentos(args, 'estruturar_dados')
+    if args.pagina is not None:
+        entrada = args.entrada or entrada_padrao()
+        try:
+            estrutura = estruturar_uma_pagina(entrada, args.pagina, medicao)
+        except KeyError:
+            print(f"❌ Página {args.pagina} não está em {entrada}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(estrutura, ensure_ascii=False, indent=2))
+    else:
+        main(args.entrada, perfil=medicao, formato=args.formato)
+    medicao.finalizar()
@@ -2,13 +2,69 @@
 """
 Extrai base de conhecimento dos arquivos .docx do Planeta Intestino.
 FONTE ÚNICA: data/pdfs/*.docx (NUNCA usar cardapios-planeta-intestino.pdf)
+
+Reconstrução incremental: os itens de cada .docx ficam em cache em
+data/.cache/docx_itens.json, indexados pelo SHA-256 do arquivo e pela
+VERSAO_EXTRATOR; só os documentos alterados são lidos de novo.
+Use --no-cache para forçar a leitura de todos.
+
+Com --jobs N os documentos que precisam ser lidos são processados em
+N processos; o resultado é juntado na ordem canônica de ARQUIVOS_PERMITIDOS,
+então IDs e deduplicação são os mesmos do modo sequencial.
+
+O texto é lido como blocos (parágrafos e células de tabela) na ordem do
+documento, então itens de uma tabela recebem o tipo de refeição do
+cabeçalho que a precede. --ordem legado reproduz a ordem antiga (todos
+os parágrafos e depois todas as células).
+
+data/base_conhecimento.json, servido inteiro por /api/base-conhecimento,
+leva só os itens: os índices de lookup (indices_base.py) vão para
+data/base_conhecimento.indices.json, lido por lib/base_conhecimento.ts, e
+o trecho de origem de cada item só entra em data/base_conhecimento.busca.json,
+o índice de busca textual por nome e trecho (ver busca_base.py). A
+quantidade interpretada (quantidade_valor/unidade/gramas, quantidades.py)
+fica só na variante colunar e no SQLite.
+
+Com --sqlite a base também é gravada em data/base_conhecimento.sqlite3
+(ver base_sqlite.py); só as fontes cujos itens mudaram são regravadas.
+
+--profile grava o tempo de cada etapa (cache, leitura, canonicalização,
+gravação...) num relatório JSON (ver perfil.py).
+
+--leitor streaming troca o python-docx pelo leitor leve de
+leitor_docx_streaming.py (iterparse direto do zip, sem árvore de objetos).
 """
 
+import argparse
+import hashlib
 import json
 import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from docx import Document
-from typing import List, Dict, Any, Optional
+from docx.table import Table
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+import base_compacta
+import base_sqlite
+import busca_base
+import gravacao_json
+import indices_base
+import leitor_docx_streaming
+import nomes_canonicos
+import perfil
+import quantidades
+from perfil import SEM_PERFIL
+
+# Incrementar sempre que a lógica de extração mudar (invalida o cache)
+VERSAO_EXTRATOR = 3
+
+# Campos usados só na indexação, fora do base_conhecimento.json servido
+CAMPOS_SO_INDEXACAO = ('trecho',)
+# Derivados de 'quantidade' (quantidades.py): só na variante colunar, onde a
+# unidade vira índice numa tabela internada, fora do JSON servido e do .min.json
+CAMPOS_SO_COLUNAR = ('quantidade_valor', 'quantidade_unidade', 'quantidade_gramas')
 
 # Mapeamento: nome do arquivo (sem extensão) -> condicao_digestiva
 MAPEAMENTO_CONDICAO = {
@@ -38,28 +94,93 @@ PALAVRAS_REFEICAO = {
     'jantar': ['jantar', 'ceia', 'jantar casual'],
 }
 
-def extrair_texto_docx(caminho: Path) -> str:
-    """Extrai todo o texto de um arquivo .docx"""
+# Quantidade: 100g, 200ml, 2 colheres, 1 xícara, 1 unidade, etc.
+QUANT = (
+    r'\d+[,.]?\d*\s*'
+    r'(?:g|kg|ml|l|colher|colheres|xícara|xícaras|fatia|fatias|unidade|unidades|'
+    r'prato|porção|porções|gramas|ml|copo|copos|colher de sopa|colher de chá)\b'
+)
+
+# Alternativa: quantidade no final da linha, depois de um traço (" - 100g")
+QUANT_FINAL = r'\d+[,.]?\d*\s*(?:g|kg|ml|l|colher|colheres|xícara|fatia|unidade|prato|porção|gramas|copo)s?'
+
+PADRAO_PREFIXO_NOME = re.compile(r'^[-•\d.)\s]+')
+PADRAO_ESPACOS = re.compile(r'\s+')
+
+# Tipo de refeição: um ramo por tipo, na ordem de PALAVRAS_REFEICAO (que é a
+# prioridade: um tipo anterior vence mesmo que sua palavra apareça depois na
+# linha), com o grupo vazio de nome = tipo. O primeiro lookahead, com todas as
+# palavras, descarta numa varredura as linhas sem palavra-chave (a maioria).
+TIPOS_REFEICAO = (
+    r'(?=.*?(?:' + '|'.join(
+        re.escape(p) for palavras in PALAVRAS_REFEICAO.values() for p in palavras
+    ) + r'))(?:' + '|'.join(
+        rf'(?=.*?(?:{"|".join(map(re.escape, palavras))}))(?P<{tipo}>)'
+        for tipo, palavras in PALAVRAS_REFEICAO.items()
+    ) + r')'
+)
+PADRAO_TIPO_REFEICAO = re.compile(TIPOS_REFEICAO, re.DOTALL)
+
+# Uma linha inteira num único match, com o que ela é em match.lastgroup:
+# cabeçalho de refeição (nome do tipo; só em linhas com menos de 80
+# caracteres), 'quantidade' (primeira quantidade da linha) ou 'final'
+# (" - 100g" no fim), nessa ordem de prioridade, como os testes em sequência
+# de antes. Os padrões são aplicados à linha em minúsculas (ver minusculas()):
+# bem mais rápido que re.IGNORECASE com acentos.
+PADRAO_LINHA = re.compile(
+    r'(?=.{0,79}\Z)' + TIPOS_REFEICAO
+    + r'|.*?(?P<quantidade>' + QUANT + r')'
+    + r'|.*?(?P<final>[-–—]\s*(?P<quantidade_final>' + QUANT_FINAL + r')\s*$)',
+    re.DOTALL
+)
+
+def iterar_blocos_docx(caminho: Path) -> Iterator[Dict[str, Any]]:
+    """Parágrafos e células de tabela de um .docx, na ordem do documento.
+    
+    Blocos: {'bloco': 'paragrafo', 'texto'} ou
+    {'bloco': 'celula', 'texto', 'tabela', 'linha'}; textos vazios são
+    omitidos e células mescladas (repetidas por row.cells) saem uma vez.
+    """
     doc = Document(caminho)
-    partes = []
-    for para in doc.paragraphs:
-        if para.text.strip():
-            partes.append(para.text)
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                if cell.text.strip():
-                    partes.append(cell.text)
-    return '\n'.join(partes)
+    num_tabela = -1
+    for conteudo in doc.iter_inner_content():
+        if isinstance(conteudo, Table):
+            num_tabela += 1
+            vistas = set()
+            for num_linha, row in enumerate(conteudo.rows):
+                for cell in row.cells:
+                    if cell._tc in vistas:
+                        continue
+                    vistas.add(cell._tc)
+                    if cell.text.strip():
+                        yield {'bloco': 'celula', 'texto': cell.text,
+                               'tabela': num_tabela, 'linha': num_linha}
+        elif conteudo.text.strip():
+            yield {'bloco': 'paragrafo', 'texto': conteudo.text}
+
+def texto_dos_blocos(blocos: Iterable[Dict[str, Any]], ordem: str = 'documento') -> str:
+    """Junta os blocos em linhas de texto para extrair_itens_texto.
+    
+    'documento' mantém a ordem dos blocos; 'legado' põe todos os parágrafos
+    antes de todas as células, como a extração original.
+    """
+    if ordem == 'legado':
+        blocos = list(blocos)
+        blocos = (
+            [b for b in blocos if b['bloco'] == 'paragrafo']
+            + [b for b in blocos if b['bloco'] == 'celula']
+        )
+    return '\n'.join(bloco['texto'] for bloco in blocos)
+
+def minusculas(texto: str) -> str:
+    """Texto em minúsculas com o mesmo comprimento (posições valem no original)"""
+    # 'İ' é o único caractere que .lower() transforma em dois
+    return texto.replace('İ', 'I').lower()
 
 def identificar_tipo_refeicao(texto_antes: str) -> Optional[str]:
     """Identifica tipo de refeição pelo contexto do texto anterior"""
-    texto_lower = texto_antes.lower()
-    for tipo, palavras in PALAVRAS_REFEICAO.items():
-        for p in palavras:
-            if p in texto_lower:
-                return tipo
-    return None
+    match = PADRAO_TIPO_REFEICAO.match(minusculas(texto_antes))
+    return match.lastgroup if match else None
 
 def extrair_itens_texto(texto: str, condicao: str, nome_arquivo: str) -> List[Dict[str, Any]]:
     """Extrai itens alimentares (nome + quantidade) do texto"""
@@ -67,37 +188,27 @@ def extrair_itens_texto(texto: str, condicao: str, nome_arquivo: str) -> List[Di
     linhas = texto.split('\n')
     tipo_atual = 'almoco'  # default
     
-    # Padrões para quantidade: 100g, 200ml, 2 colheres, 1 xícara, 1 unidade, etc.
-    padrao_quant = re.compile(
-        r'(\d+[,.]?\d*)\s*'
-        r'(g|kg|ml|l|colher|colheres|xícara|xícaras|fatia|fatias|unidade|unidades|'
-        r'prato|porção|porções|gramas|ml|copo|copos|colher de sopa|colher de chá)\b',
-        re.IGNORECASE
-    )
-    
-    # Padrão alternativo: quantidade no final da linha
-    padrao_quant_final = re.compile(r'[-–—]\s*(\d+[,.]?\d*\s*(?:g|kg|ml|l|colher|colheres|xícara|fatia|unidade|prato|porção|gramas|copo)s?)\s*$', re.IGNORECASE)
-    
     for i, linha in enumerate(linhas):
         linha = linha.strip()
         if len(linha) < 4:
             continue
         
-        # Verificar se é cabeçalho de seção
-        tipo_detectado = identificar_tipo_refeicao(linha)
-        if tipo_detectado and len(linha) < 80:
-            tipo_atual = tipo_detectado
+        match = PADRAO_LINHA.match(minusculas(linha))
+        if not match:
             continue
         
-        # Tentar extrair item com quantidade
-        match = padrao_quant.search(linha)
-        if match:
-            qtd_inicio = match.start()
-            nome = linha[:qtd_inicio].strip()
-            quantidade = match.group(0).strip()
+        # Cabeçalho de seção
+        if match.lastgroup in PALAVRAS_REFEICAO:
+            tipo_atual = match.lastgroup
+            continue
+        
+        # Item com quantidade
+        if match.lastgroup == 'quantidade':
+            nome = linha[:match.start('quantidade')].strip()
+            quantidade = linha[match.start('quantidade'):match.end('quantidade')].strip()
             # Limpar nome
-            nome = re.sub(r'^[-•\d.)\s]+', '', nome).strip()
-            nome = re.sub(r'\s+', ' ', nome)
+            nome = PADRAO_PREFIXO_NOME.sub('', nome).strip()
+            nome = PADRAO_ESPACOS.sub(' ', nome)
             if nome and len(nome) > 2 and len(nome) < 100:
                 itens.append({
                     'nome': nome,
@@ -105,111 +216,334 @@ def extrair_itens_texto(texto: str, condicao: str, nome_arquivo: str) -> List[Di
                     'tipo': tipo_atual,
                     'condicao_digestiva': condicao,
                     'fonte': nome_arquivo,
+                    'trecho': linha,
                 })
             continue
         
         # Padrão " - 100g" no final
-        match_final = padrao_quant_final.search(linha)
-        if match_final:
-            nome = linha[:match_final.start()].strip()
-            quantidade = match_final.group(1).strip()
-            nome = re.sub(r'^[-•\d.)\s]+', '', nome).strip()
-            if nome and len(nome) > 2:
-                itens.append({
-                    'nome': nome,
-                    'quantidade': quantidade,
-                    'tipo': tipo_atual,
-                    'condicao_digestiva': condicao,
-                    'fonte': nome_arquivo,
-                })
+        nome = linha[:match.start('final')].strip()
+        quantidade = linha[match.start('quantidade_final'):match.end('quantidade_final')].strip()
+        nome = PADRAO_PREFIXO_NOME.sub('', nome).strip()
+        if nome and len(nome) > 2:
+            itens.append({
+                'nome': nome,
+                'quantidade': quantidade,
+                'tipo': tipo_atual,
+                'condicao_digestiva': condicao,
+                'fonte': nome_arquivo,
+                'trecho': linha,
+            })
     
     return itens
 
-def processar_docx(caminho: Path) -> List[Dict[str, Any]]:
-    """Processa um arquivo .docx e retorna lista de itens"""
+# Leitores de blocos disponíveis (--leitor) e ordens de junção (--ordem)
+LEITORES = {
+    'python-docx': iterar_blocos_docx,
+    'streaming': leitor_docx_streaming.iterar_blocos,
+}
+ORDENS = ['documento', 'legado']
+
+def extrair_texto_docx(caminho: Path, leitor: str = 'python-docx', ordem: str = 'documento') -> str:
+    """Extrai todo o texto de um arquivo .docx"""
+    return texto_dos_blocos(LEITORES[leitor](caminho), ordem)
+
+def extrair_itens_docx(
+    caminho: Path, leitor: str = 'python-docx', ordem: str = 'documento'
+) -> List[Dict[str, Any]]:
+    """Extrai os itens de um arquivo .docx (propaga erros de leitura)"""
     nome_base = caminho.stem
     condicao = MAPEAMENTO_CONDICAO.get(nome_base, 'geral')
-    
+    texto = extrair_texto_docx(caminho, leitor, ordem)
+    return extrair_itens_texto(texto, condicao, nome_base + '.docx')
+
+def processar_docx(caminho: Path) -> List[Dict[str, Any]]:
+    """Processa um arquivo .docx e retorna lista de itens"""
     try:
-        texto = extrair_texto_docx(caminho)
-        itens = extrair_itens_texto(texto, condicao, nome_base + '.docx')
-        return itens
+        return extrair_itens_docx(caminho)
     except Exception as e:
         print(f"  ⚠ Erro ao processar {caminho.name}: {e}")
         return []
 
-def main():
-    base_dir = Path(__file__).parent.parent
-    pdfs_dir = base_dir / 'data' / 'pdfs'
-    output_path = base_dir / 'data' / 'base_conhecimento.json'
+def hash_arquivo(caminho: Path) -> str:
+    """SHA-256 do conteúdo do arquivo"""
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 16), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+def carregar_cache(caminho: Path) -> Dict[str, Any]:
+    """Carrega o cache de itens por arquivo (vazio se ausente ou inválido)"""
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache.get('arquivos', {}) if isinstance(cache, dict) else {}
+
+def salvar_cache(caminho: Path, arquivos: Dict[str, Any]) -> None:
+    """Grava o cache de itens por arquivo"""
+    gravacao_json.gravar_json({'arquivos': arquivos}, caminho, 'compacto')
+
+def consultar_cache(caminho: Path, cache: Dict[str, Any], opcoes: Dict[str, str]):
+    """Retorna (sha256, itens) — itens é None se o arquivo, a versão do
+    extrator ou as opções de leitura (leitor/ordem) mudaram desde a
+    última leitura.
+    """
+    digest = hash_arquivo(caminho)
+    entrada = cache.get(caminho.name)
+    if (
+        entrada
+        and entrada.get('sha256') == digest
+        and entrada.get('versao_extrator') == VERSAO_EXTRATOR
+        and entrada.get('opcoes') == opcoes
+    ):
+        return digest, [dict(item) for item in entrada['itens']]
+    return digest, None
+
+def registrar_cache(
+    caminho: Path, cache: Dict[str, Any], digest: str, itens: List[Dict[str, Any]],
+    opcoes: Dict[str, str],
+) -> None:
+    """Guarda os itens lidos de `caminho` no cache"""
+    cache[caminho.name] = {
+        'sha256': digest,
+        'versao_extrator': VERSAO_EXTRATOR,
+        'opcoes': dict(opcoes),
+        'itens': [dict(item) for item in itens],
+    }
+
+def extrair_itens_docx_seguro(caminho: Path, opcoes: Dict[str, str]):
+    """(itens, erro) em vez de exceção — executado nos workers de --jobs"""
+    try:
+        return extrair_itens_docx(caminho, **opcoes), None
+    except Exception as e:
+        return [], str(e)
+
+# Arquivos permitidos (apenas .docx, NUNCA o PDF), em ordem canônica de IDs
+ARQUIVOS_PERMITIDOS = [
+    'Azia e Refluxo.docx',
+    'Bloqueio Defecatório.docx',
+    'Colite.docx',
+    'Dieta Anti-inflamatória.docx',
+    'Disbiose.docx',
+    'Diverticulite.docx',
+    'Divertículos_.docx',
+    'Gases.docx',
+    'INTESTINO PRESO.docx',
+    'Intolerancia à Lactose.docx',
+    'Má Digestão.docx',
+    'Prevenção a diarreia.docx',
+    'sem gluten e lactose.docx',
+    'Sem Gluten.docx',
+    'SII.docx',
+    'zJantar casual_romantico.docx',
+]
+
+def construir_base(
+    pdfs_dir: Path,
+    arquivos_permitidos: List[str],
+    cache_path: Optional[Path] = None,
+    usar_cache: bool = True,
+    jobs: int = 1,
+    leitor: str = 'python-docx',
+    ordem: str = 'documento',
+    perfil=SEM_PERFIL,
+) -> Dict[str, Any]:
+    """Extrai, numera e deduplica os itens dos .docx na ordem informada.
     
-    # Arquivos permitidos (apenas .docx, NUNCA o PDF)
-    arquivos_permitidos = [
-        'Azia e Refluxo.docx',
-        'Bloqueio Defecatório.docx',
-        'Colite.docx',
-        'Dieta Anti-inflamatória.docx',
-        'Disbiose.docx',
-        'Diverticulite.docx',
-        'Divertículos_.docx',
-        'Gases.docx',
-        'INTESTINO PRESO.docx',
-        'Intolerancia à Lactose.docx',
-        'Má Digestão.docx',
-        'Prevenção a diarreia.docx',
-        'sem gluten e lactose.docx',
-        'Sem Gluten.docx',
-        'SII.docx',
-        'zJantar casual_romantico.docx',
-    ]
+    Com `cache_path`, reaproveita (e atualiza) o cache incremental;
+    `usar_cache=False` ignora o conteúdo anterior mas regrava o cache.
+    Com `jobs` > 1, os documentos fora do cache são lidos em paralelo.
+    `leitor` escolhe como os blocos são lidos (chaves de LEITORES) e
+    `ordem` como são juntados (ORDENS). `perfil` mede cada etapa.
+    """
+    opcoes = {'leitor': leitor, 'ordem': ordem}
+    cache = {}
     
-    print("📚 Extraindo base de conhecimento dos arquivos .docx")
-    print("   Fonte: data/pdfs/*.docx (PDF excluído permanentemente)\n")
+    # 1) Cache: o que não estiver lá fica pendente de leitura
+    documentos = []
+    pendentes = []
+    with perfil.etapa('cache'):
+        cache_anterior = carregar_cache(cache_path) if cache_path and usar_cache else {}
+        for nome_arquivo in arquivos_permitidos:
+            caminho = pdfs_dir / nome_arquivo
+            if not caminho.exists():
+                documentos.append((nome_arquivo, caminho, None, None))
+                continue
+            
+            if nome_arquivo in cache_anterior:
+                cache[nome_arquivo] = cache_anterior[nome_arquivo]
+            digest, itens = consultar_cache(caminho, cache, opcoes)
+            documentos.append((nome_arquivo, caminho, digest, itens))
+            if itens is None:
+                pendentes.append(caminho)
     
+    # 2) Leitura dos pendentes (map preserva a ordem de entrada)
+    with perfil.etapa('ler_docx'):
+        if jobs > 1 and len(pendentes) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(pendentes))) as executor:
+                lidos = dict(zip(
+                    pendentes, executor.map(extrair_itens_docx_seguro, pendentes, repeat(opcoes))
+                ))
+        else:
+            lidos = {caminho: extrair_itens_docx_seguro(caminho, opcoes) for caminho in pendentes}
+    
+    # 3) Junção na ordem canônica: IDs sequenciais por documento
     todos_itens = []
     contador_ids = 0
-    
-    for nome_arquivo in arquivos_permitidos:
-        caminho = pdfs_dir / nome_arquivo
-        if not caminho.exists():
+    for nome_arquivo, caminho, digest, itens in documentos:
+        if digest is None:
             print(f"  ⚠ Não encontrado: {nome_arquivo}")
             continue
         
-        itens = processar_docx(caminho)
+        do_cache = itens is not None
+        if not do_cache:
+            itens, erro = lidos[caminho]
+            if erro is not None:
+                print(f"  ⚠ Erro ao processar {nome_arquivo}: {erro}")
+                cache.pop(nome_arquivo, None)
+            else:
+                registrar_cache(caminho, cache, digest, itens, opcoes)
+        
         for item in itens:
             contador_ids += 1
             item['id'] = f"docx_{contador_ids:04d}"
             todos_itens.append(item)
         
-        print(f"  ✓ {nome_arquivo}: {len(itens)} itens")
+        print(f"  ✓ {nome_arquivo}: {len(itens)} itens{' (cache)' if do_cache else ''}")
+    
+    if cache_path:
+        with perfil.etapa('cache'):
+            salvar_cache(cache_path, cache)
+    
+    # Alimento canônico de cada item ("Banana madura:" e "Para 2 pessoas:
+    # 2 bananas maduras," -> mesmo alimento_id) e quantidade numérica em lote
+    with perfil.etapa('canonicalizar'):
+        alimentos = nomes_canonicos.atribuir_alimentos(todos_itens)
+    with perfil.etapa('quantidades'):
+        quantidades.anexar_quantidades(todos_itens)
     
-    # Deduplicar por (nome, quantidade, tipo, condicao) mantendo primeira ocorrência
+    # Deduplicar por (alimento, quantidade, tipo, condicao) mantendo primeira ocorrência;
+    # "120g" e "120 g" contam como a mesma quantidade
     vistos = set()
     itens_unicos = []
     for item in todos_itens:
-        chave = (item['nome'].lower(), item['quantidade'], item['tipo'], item['condicao_digestiva'])
+        if item['quantidade_valor'] is not None:
+            quantidade = (item['quantidade_valor'], item['quantidade_unidade'])
+        else:
+            quantidade = item['quantidade']
+        chave = (item['alimento_id'], quantidade, item['tipo'], item['condicao_digestiva'])
         if chave not in vistos:
             vistos.add(chave)
             itens_unicos.append(item)
     
-    resultado = {
+    # Índices de busca prontos para os montadores (verificados antes de gravar)
+    with perfil.etapa('indices'):
+        indices = indices_base.construir_indices(itens_unicos)
+        indices_base.verificar_indices(itens_unicos, indices)
+    
+    return {
         'itens': itens_unicos,
         'total_itens': len(itens_unicos),
-        'fontes': arquivos_permitidos,
+        'fontes': list(arquivos_permitidos),
         'origem': 'Arquivos .docx do Planeta Intestino (PDF excluído)',
+        'alimentos': alimentos,
+        'indices': indices,
     }
+
+def base_servida(
+    resultado: Dict[str, Any], sem_campos: Iterable[str] = CAMPOS_SO_INDEXACAO + CAMPOS_SO_COLUNAR
+) -> Dict[str, Any]:
+    """O resultado de construir_base sem os 'indices' e sem os campos
+    `sem_campos` nos itens (por padrão, a base servida)"""
+    sem_campos = set(sem_campos)
+    servida = {chave: valor for chave, valor in resultado.items() if chave != 'indices'}
+    servida['itens'] = [
+        {campo: valor for campo, valor in item.items() if campo not in sem_campos}
+        for item in resultado['itens']
+    ]
+    return servida
+
+def main():
+    parser = argparse.ArgumentParser(description='Extrai a base de conhecimento dos .docx')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='ignora o cache incremental e relê todos os .docx')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='processos para ler os .docx em paralelo (padrão: 1)')
+    parser.add_argument('--leitor', choices=list(LEITORES), default='python-docx',
+                        help='como ler o texto dos .docx (padrão: python-docx)')
+    parser.add_argument('--ordem', choices=ORDENS, default='documento',
+                        help='documento (padrão) ou legado: parágrafos e depois tabelas')
+    parser.add_argument('--sqlite', nargs='?', type=Path, metavar='CAMINHO',
+                        const=Path(__file__).parent.parent / 'data' / 'base_conhecimento.sqlite3',
+                        help='grava também a base em SQLite (padrão: data/base_conhecimento.sqlite3)')
+    perfil.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    medicao = perfil.de_argumentos(args, 'extrair_docx_base_conhecimento')
+    
+    base_dir = Path(__file__).parent.parent
+    pdfs_dir = base_dir / 'data' / 'pdfs'
+    output_path = base_dir / 'data' / 'base_conhecimento.json'
+    cache_path = base_dir / 'data' / '.cache' / 'docx_itens.json'
+    
+    print("📚 Extraindo base de conhecimento dos arquivos .docx")
+    print("   Fonte: data/pdfs/*.docx (PDF excluído permanentemente)\n")
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    resultado = construir_base(
+        pdfs_dir, ARQUIVOS_PERMITIDOS, cache_path, usar_cache=not args.no_cache,
+        jobs=max(1, args.jobs), leitor=args.leitor,
+        ordem=args.ordem, perfil=medicao
+    )
+    itens_unicos = resultado['itens']
+    
+    with medicao.etapa('json'):
+        # Gravação atômica: a rota /api/base-conhecimento nunca vê o arquivo pela metade
+        servida = base_servida(resultado)
+        gravacao_json.gravar_json(servida, output_path)
+        
+        # Variantes compactas (minificada e colunar) para leitura mais rápida
+        compactas = base_compacta.exportar(
+            servida, output_path, colunar=base_servida(resultado, CAMPOS_SO_INDEXACAO)
+        )
+        compactas['indices'] = gravacao_json.gravar_json(
+            resultado['indices'], output_path.with_suffix('.indices.json'), 'compacto'
+        )
+    # Índice invertido de busca textual (nome + trecho de origem)
+    with medicao.etapa('busca'):
+        compactas['busca'] = busca_base.exportar_indice_busca(
+            busca_base.construir_indice_busca(itens_unicos), output_path.with_suffix('.busca.json')
+        )
     
     print(f"\n✅ Base salva em: {output_path}")
     print(f"   Total de itens: {len(itens_unicos)}")
+    print(f"   Alimentos canônicos: {len(resultado['alimentos'])}")
+    interpretadas = sum(item['quantidade_valor'] is not None for item in itens_unicos)
+    print(f"   Quantidades normalizadas: {interpretadas}/{len(itens_unicos)}")
+    for caminho in compactas.values():
+        print(f"   Variante compacta: {caminho.name} ({caminho.stat().st_size / 1024:.1f} KB)")
+    
+    if args.sqlite:
+        hashes = {
+            nome: hash_arquivo(pdfs_dir / nome)
+            for nome in ARQUIVOS_PERMITIDOS if (pdfs_dir / nome).exists()
+        }
+        conexao = base_sqlite.abrir(args.sqlite)
+        try:
+            with medicao.etapa('sqlite'):
+                sincronizadas = base_sqlite.sincronizar(conexao, resultado, hashes)
+        finally:
+            conexao.close()
+        print(f"   SQLite: {args.sqlite.name} ({sincronizadas['atualizadas']} fontes atualizadas,"
+              f" {sincronizadas['mantidas']} mantidas, {sincronizadas['removidas']} removidas)")
     
     # Amostra
     if itens_unicos:
         print("\n📄 Amostra (5 primeiros):")
         for item in itens_unicos[:5]:
             print(f"   - {item['nome']} — {item['quantidade']} ({item['tipo']}, {item['condicao_digestiva']})")
+    
+    medicao.finalizar()
 
 if __name__ == '__main__':
     main()
@@ -2,15 +2,28 @@
 """
 Script para extrair TODO o conteúdo do PDF "Cardápios do Planeta Intestino"
 Este script é a ÚNICA FONTE DE VERDADE para extração de dados alimentares.
+
+Uso: python3 scripts/extrair_pdf.py [--formato indentado|compacto|ndjson] [--profile [CAMINHO]]
+       [--workers-tabelas N]
+
+Tabelas só são procuradas nas páginas com linhas de grade (ver
+tabelas_pdf.py); com --workers-tabelas N > 1 a extração delas roda num
+pool de N processos enquanto o texto é lido.
 """
 
 import sys
-import json
 import re
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import gravacao_json
+import perfil
+from perfil import SEM_PERFIL
+
 try:
     import pdfplumber
+    from tabelas_pdf import pode_ter_tabela, extrair_tabelas, tabelas_da_pagina
     HAS_PDFPLUMBER = True
 except ImportError:
     HAS_PDFPLUMBER = False
@@ -20,8 +33,13 @@ except ImportError:
     except ImportError:
         HAS_PYPDF2 = False
 
-def extrair_com_pdfplumber(pdf_path):
-    """Extrai texto usando pdfplumber (melhor para tabelas e formatação)"""
+def extrair_com_pdfplumber(pdf_path, perfil=SEM_PERFIL, workers_tabelas=1):
+    """Extrai texto usando pdfplumber (melhor para tabelas e formatação)
+    
+    Só as páginas com linhas de grade passam por extract_tables; com
+    `workers_tabelas` > 1, elas são processadas num pool separado.
+    Falhas na extração de tabelas vão para 'erros'.
+    """
     dados_extraidos = {
         'total_paginas': 0,
         'paginas': [],
@@ -29,32 +47,53 @@ def extrair_com_pdfplumber(pdf_path):
         'erros': []
     }
     
-    with pdfplumber.open(pdf_path) as pdf:
-        dados_extraidos['total_paginas'] = len(pdf.pages)
-        
-        for num_pagina, pagina in enumerate(pdf.pages, start=1):
-            pagina_data = {
-                'numero': num_pagina,
-                'texto_completo': '',
-                'tabelas': [],
-                'itens': []
-            }
-            
-            # Extrair texto
-            texto = pagina.extract_text()
-            if texto:
-                pagina_data['texto_completo'] = texto
-            
-            # Extrair tabelas
-            tabelas = pagina.extract_tables()
-            if tabelas:
-                pagina_data['tabelas'] = tabelas
+    executor = ProcessPoolExecutor(max_workers=workers_tabelas) if workers_tabelas > 1 else None
+    pendentes = []  # (pagina_data, future) das tabelas enviadas ao pool
+    
+    def registrar_tabelas(pagina_data, tabelas, erro, medida):
+        perfil.registrar('tabelas', medida, pagina=pagina_data['numero'])
+        if tabelas:
+            pagina_data['tabelas'] = tabelas
+        if erro:
+            dados_extraidos['erros'].append(f"Tabelas da página {pagina_data['numero']}: {erro}")
+    
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            dados_extraidos['total_paginas'] = len(pdf.pages)
             
-            dados_extraidos['paginas'].append(pagina_data)
+            for num_pagina, pagina in enumerate(pdf.pages, start=1):
+                pagina_data = {
+                    'numero': num_pagina,
+                    'texto_completo': '',
+                    'tabelas': [],
+                    'itens': []
+                }
+                
+                # Extrair texto
+                with perfil.etapa('texto', pagina=num_pagina):
+                    texto = pagina.extract_text()
+                if texto:
+                    pagina_data['texto_completo'] = texto
+                
+                # Extrair tabelas (só se a página tem linhas de grade)
+                with perfil.etapa('tabelas_checagem', pagina=num_pagina):
+                    candidata = pode_ter_tabela(pagina)
+                if candidata and executor:
+                    pendentes.append((pagina_data, executor.submit(tabelas_da_pagina, pdf_path, num_pagina)))
+                elif candidata:
+                    registrar_tabelas(pagina_data, *extrair_tabelas(pagina))
+                
+                dados_extraidos['paginas'].append(pagina_data)
+        
+        for pagina_data, future in pendentes:
+            registrar_tabelas(pagina_data, *future.result())
+    finally:
+        if executor:
+            executor.shutdown()
     
     return dados_extraidos
 
-def extrair_com_pypdf2(pdf_path):
+def extrair_com_pypdf2(pdf_path, perfil=SEM_PERFIL):
     """Extrai texto usando PyPDF2 (fallback)"""
     dados_extraidos = {
         'total_paginas': 0,
@@ -75,7 +114,8 @@ def extrair_com_pypdf2(pdf_path):
                 'itens': []
             }
             
-            texto = pagina.extract_text()
+            with perfil.etapa('texto', pagina=num_pagina):
+                texto = pagina.extract_text()
             if texto:
                 pagina_data['texto_completo'] = texto
             
@@ -84,6 +124,15 @@ def extrair_com_pypdf2(pdf_path):
     return dados_extraidos
 
 def main():
+    parser = argparse.ArgumentParser(description='Extrai o texto e as tabelas do PDF')
+    parser.add_argument('--formato', choices=gravacao_json.FORMATOS, default='indentado',
+                        help='formato da saída (padrão: indentado; ndjson grava uma página por linha)')
+    parser.add_argument('--workers-tabelas', type=int, default=1,
+                        help='processos para extrair tabelas em paralelo ao texto (padrão: 1, no próprio processo)')
+    perfil.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    medicao = perfil.de_argumentos(args, 'extrair_pdf')
+    
     # Caminho do PDF
     pdf_path = Path(__file__).parent.parent / 'data' / 'pdfs' / 'cardapios-planeta-intestino.pdf'
     
@@ -97,10 +146,10 @@ def main():
     # Tentar extrair com a melhor biblioteca disponível
     if HAS_PDFPLUMBER:
         print("✅ Usando pdfplumber (melhor qualidade)")
-        dados = extrair_com_pdfplumber(pdf_path)
+        dados = extrair_com_pdfplumber(pdf_path, medicao, max(1, args.workers_tabelas))
     elif HAS_PYPDF2:
         print("⚠️  Usando PyPDF2 (qualidade básica)")
-        dados = extrair_com_pypdf2(pdf_path)
+        dados = extrair_com_pypdf2(pdf_path, medicao)
     else:
         print("❌ ERRO: Nenhuma biblioteca PDF disponível", file=sys.stderr)
         print("Instale com: pip install pdfplumber ou pip install PyPDF2", file=sys.stderr)
@@ -108,8 +157,8 @@ def main():
     
     # Salvar dados brutos
     output_path = Path(__file__).parent.parent / 'data' / 'extracao_bruta.json'
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(dados, f, ensure_ascii=False, indent=2)
+    with medicao.etapa('json'):
+        output_path = gravacao_json.gravar_json(dados, output_path, args.formato)
     
     print(f"\n✅ Extração completa!")
     print(f"📄 Total de páginas: {dados['total_paginas']}")
@@ -123,6 +172,7 @@ def main():
     print(f"   - Total de caracteres extraídos: {total_texto:,}")
     print(f"   - Total de tabelas encontradas: {total_tabelas}")
     
+    medicao.finalizar()
     return dados
 
 if __name__ == '__main__':
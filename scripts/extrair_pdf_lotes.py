@@ -2,146 +2,288 @@
 """
 Script para extrair PDF em lotes, salvando progresso.
 Processa páginas em grupos e permite retomar de onde parou.
+
+Uso: python3 scripts/extrair_pdf_lotes.py [inicio fim] [--lote N] [--workers N] [--no-cache] [--formato F] [--profile]
+       [--dpi-inicial N] [--limiar-confianca C] [--sem-preprocessamento]
+Sem `fim`, processa até a última página do PDF; --lote define quantas
+páginas são gravadas no journal de cada vez (padrão: 10).
+O OCR das páginas de cada lote é distribuído entre N processos
+(padrão: número de CPUs); use --workers 1 para o modo sequencial.
+Resultados de OCR ficam em cache (data/.cache/ocr.sqlite3) por hash
+da página rasterizada; --no-cache desliga o cache.
+Cada página é pré-processada e lida primeiro em 150 DPI, e só em 300 DPI
+se a confiança do Tesseract for baixa (ver preprocessamento_ocr.py).
+--profile grava o tempo de rasterização e OCR por página (ver perfil.py).
 """
 
+import os
 import sys
 import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
+import gravacao_json
+import perfil
+from perfil import SEM_PERFIL, cronometro
+
 try:
-    from pdf2image import convert_from_path
+    from pdf2image import convert_from_path, pdfinfo_from_path
     from PIL import Image
     import pytesseract
+    from cache_ocr import CacheOCR, ocr_com_cache
+    import preprocessamento_ocr
+    from preprocessamento_ocr import ocr_adaptativo
     HAS_ALL = True
 except ImportError as e:
     print(f"❌ Dependências faltando: {e}", file=sys.stderr)
     sys.exit(1)
 
-def processar_lote(pdf_path, inicio, fim, arquivo_progresso=None):
-    """Processa um lote de páginas"""
+def rasterizar_pagina(pdf_path, num_pagina, dpi=300):
+    """Imagem de uma única página do PDF"""
+    return convert_from_path(
+        str(pdf_path),
+        dpi=dpi,
+        first_page=num_pagina,
+        last_page=num_pagina
+    )[0]
+
+def ocr_pagina(pdf_path, num_pagina, cache=None, parametros=None):
+    """Rasteriza e aplica OCR em uma única página (executado nos workers)
     
-    print(f"📄 Processando páginas {inicio} a {fim}...")
+    Com `parametros` (preprocessamento_ocr.de_argumentos), a página é
+    pré-processada e o DPI escolhido pela confiança do OCR; sem eles, OCR
+    direto em 300 DPI.
     
-    # Carregar progresso anterior se existir
-    dados_existentes = {'paginas': []}
-    if arquivo_progresso and arquivo_progresso.exists():
-        with open(arquivo_progresso, 'r', encoding='utf-8') as f:
-            dados_existentes = json.load(f)
+    Retorna (num_pagina, texto, erro, medidas, qualidade); medidas tem o
+    tempo de cada etapa medido no próprio worker e qualidade o 'dpi' e a
+    'confianca' usados (vazio sem pré-processamento ou com erro).
+    """
+    if parametros is not None:
+        try:
+            texto, qualidade, medidas = ocr_adaptativo(
+                lambda dpi: rasterizar_pagina(pdf_path, num_pagina, dpi),
+                cache, 'por', '--psm 6', parametros
+            )
+            return num_pagina, texto, None, medidas, qualidade
+        except Exception as e:
+            return num_pagina, f"[ERRO OCR: {str(e)}]", str(e), {}, {}
     
-    # Converter apenas as páginas necessárias
-    imagens = convert_from_path(
-        str(pdf_path),
-        dpi=300,
-        first_page=inicio,
-        last_page=fim
-    )
+    with cronometro() as rasterizar:
+        imagem = rasterizar_pagina(pdf_path, num_pagina)
+    
+    with cronometro() as ocr:
+        try:
+            texto = ocr_com_cache(imagem, cache, lang='por', config='--psm 6', dpi=300)
+            erro = None
+        except Exception as e:
+            texto = f"[ERRO OCR: {str(e)}]"
+            erro = str(e)
+    
+    return num_pagina, texto, erro, {'rasterizar': rasterizar, 'ocr': ocr}, {}
+
+def contar_paginas(pdf_path):
+    """Número de páginas do PDF sem rasterizá-lo"""
+    return int(pdfinfo_from_path(str(pdf_path))['Pages'])
+
+def carregar_progresso(arquivo_journal, arquivo_legado=None):
+    """Lê o progresso salvo como {numero_pagina: pagina}
     
-    paginas_processadas = []
+    O journal tem uma página por linha (JSONL, só recebe appends); se uma
+    página aparecer mais de uma vez vale a última. Um extracao_progresso.json
+    no formato antigo, se existir, é lido antes do journal.
+    """
+    progresso = {}
     
-    for idx, imagem in enumerate(imagens):
-        num_pagina = inicio + idx
-        
+    if arquivo_legado and arquivo_legado.exists():
+        with open(arquivo_legado, 'r', encoding='utf-8') as f:
+            for pagina in json.load(f).get('paginas', []):
+                progresso[pagina['numero']] = pagina
+    
+    if arquivo_journal and arquivo_journal.exists():
+        with open(arquivo_journal, 'rb+') as f:
+            fim_valido = 0
+            for linha in f:
+                if not linha.endswith(b'\n'):
+                    break
+                fim_valido += len(linha)
+                try:
+                    pagina = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                progresso[pagina['numero']] = pagina
+            # Descartar a linha truncada por uma interrupção no meio da
+            # gravação, para que o próximo append comece numa linha nova
+            f.truncate(fim_valido)
+    
+    return progresso
+
+def registrar_paginas(arquivo_journal, paginas):
+    """Acrescenta as páginas ao journal (custo proporcional ao lote)"""
+    with open(arquivo_journal, 'a', encoding='utf-8') as f:
+        for pagina in paginas:
+            f.write(json.dumps(pagina, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+def compactar_journal(arquivo_journal, progresso):
+    """Reescreve o journal com uma linha por página, em ordem"""
+    tmp = arquivo_journal.with_suffix(arquivo_journal.suffix + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for numero in sorted(progresso):
+            f.write(json.dumps(progresso[numero], ensure_ascii=False) + '\n')
+    tmp.replace(arquivo_journal)
+
+def montar_dados(progresso):
+    """Monta o JSON final (páginas ordenadas + metadados) a partir do progresso"""
+    paginas = [progresso[numero] for numero in sorted(progresso)]
+    return {
+        'paginas': paginas,
+        'total_paginas': max(progresso, default=0),
+        'metadados': {
+            'total_caracteres': sum(len(p['texto_completo']) for p in paginas),
+            'paginas_processadas': len(paginas)
+        }
+    }
+
+def processar_lote(pdf_path, inicio, fim, progresso, arquivo_journal=None, executor=None, cache=None,
+                   perfil=SEM_PERFIL, parametros=None):
+    """Processa um lote de páginas
+    
+    `progresso` é o dicionário {numero_pagina: pagina} de carregar_progresso;
+    as páginas novas entram nele e são acrescentadas ao journal. Retorna as
+    páginas do lote, em ordem.
+    
+    Se `executor` for informado, as páginas pendentes são enviadas ao pool
+    de processos; os resultados voltam sempre na ordem das páginas.
+    """
+    
+    print(f"📄 Processando páginas {inicio} a {fim}...")
+    
+    paginas_pendentes = []
+    
+    for num_pagina in range(inicio, fim + 1):
         # Verificar se já foi processada
-        pagina_existente = next(
-            (p for p in dados_existentes['paginas'] if p['numero'] == num_pagina),
-            None
-        )
-        
-        if pagina_existente:
+        if num_pagina in progresso:
             print(f"   ⏭️  Página {num_pagina} já processada, pulando...")
-            paginas_processadas.append(pagina_existente)
             continue
         
+        paginas_pendentes.append(num_pagina)
+    
+    # Rasterizar + OCR apenas das páginas pendentes (map preserva a ordem)
+    mapear = executor.map if executor else map
+    resultados = mapear(ocr_pagina, repeat(pdf_path), paginas_pendentes, repeat(cache), repeat(parametros))
+    
+    paginas_novas = []
+    for num_pagina, texto, erro, medidas, qualidade in resultados:
         print(f"   🔍 OCR página {num_pagina}...", end=' ', flush=True)
-        
-        try:
-            texto = pytesseract.image_to_string(imagem, lang='por', config='--psm 6')
-            print("✅")
-        except Exception as e:
-            texto = f"[ERRO OCR: {str(e)}]"
-            print(f"❌ Erro: {str(e)}")
+        for etapa, medida in medidas.items():
+            perfil.registrar(etapa, medida, pagina=num_pagina)
+        if erro is None:
+            print(f"✅ ({qualidade['dpi']} DPI, confiança {qualidade['confianca']})" if qualidade else "✅")
+        else:
+            print(f"❌ Erro: {erro}")
         
         pagina_data = {
             'numero': num_pagina,
             'texto_completo': texto.strip(),
             'ocr_aplicado': True
         }
+        if qualidade:
+            pagina_data['ocr_dpi'] = qualidade['dpi']
+            pagina_data['ocr_confianca'] = qualidade['confianca']
         
-        paginas_processadas.append(pagina_data)
-    
-    # Atualizar dados existentes
-    for pagina in paginas_processadas:
-        # Remover se já existir
-        dados_existentes['paginas'] = [
-            p for p in dados_existentes['paginas'] 
-            if p['numero'] != pagina['numero']
-        ]
-        # Adicionar nova
-        dados_existentes['paginas'].append(pagina)
-    
-    # Ordenar por número de página
-    dados_existentes['paginas'].sort(key=lambda x: x['numero'])
-    
-    # Atualizar metadados
-    dados_existentes['total_paginas'] = max(
-        dados_existentes.get('total_paginas', 0),
-        max((p['numero'] for p in dados_existentes['paginas']), default=0)
-    )
-    dados_existentes['metadados'] = dados_existentes.get('metadados', {})
-    dados_existentes['metadados']['total_caracteres'] = sum(
-        len(p['texto_completo']) for p in dados_existentes['paginas']
-    )
-    dados_existentes['metadados']['paginas_processadas'] = len(dados_existentes['paginas'])
-    
-    return dados_existentes
+        progresso[num_pagina] = pagina_data
+        paginas_novas.append(pagina_data)
+    
+    if arquivo_journal and paginas_novas:
+        with perfil.etapa('journal'):
+            registrar_paginas(arquivo_journal, paginas_novas)
+    
+    return [progresso[n] for n in range(inicio, fim + 1) if n in progresso]
 
 def main():
     pdf_path = Path(__file__).parent.parent / 'data' / 'pdfs' / 'cardapios-planeta-intestino.pdf'
-    arquivo_progresso = Path(__file__).parent.parent / 'data' / 'extracao_progresso.json'
+    arquivo_progresso = Path(__file__).parent.parent / 'data' / 'extracao_progresso.jsonl'
+    arquivo_legado = Path(__file__).parent.parent / 'data' / 'extracao_progresso.json'
     
     if not pdf_path.exists():
         print(f"❌ PDF não encontrado: {pdf_path}", file=sys.stderr)
         sys.exit(1)
     
     # Parâmetros
-    if len(sys.argv) >= 3:
-        inicio = int(sys.argv[1])
-        fim = int(sys.argv[2])
-    else:
-        # Processar todas as páginas em lotes de 10
-        inicio = 1
-        fim = 191
+    parser = argparse.ArgumentParser(description='Extrai o PDF em lotes via OCR')
+    parser.add_argument('inicio', type=int, nargs='?', default=1)
+    parser.add_argument('fim', type=int, nargs='?', default=None,
+                        help='última página (padrão: a última do PDF)')
+    parser.add_argument('--lote', type=int, default=10,
+                        help='páginas por lote gravado no journal (padrão: 10)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='processos de OCR em paralelo (padrão: nº de CPUs)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='não usa o cache de OCR em data/.cache')
+    parser.add_argument('--formato', choices=gravacao_json.FORMATOS, default='indentado',
+                        help='formato da saída (padrão: indentado; ndjson grava uma página por linha)')
+    preprocessamento_ocr.adicionar_argumentos(parser)
+    perfil.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    medicao = perfil.de_argumentos(args, 'extrair_pdf_lotes')
+    parametros = preprocessamento_ocr.de_argumentos(args)
+    
+    inicio = args.inicio
+    fim = args.fim if args.fim is not None else contar_paginas(pdf_path)
+    workers = max(1, args.workers)
     
     print(f"📄 PDF: {pdf_path.name}")
     print(f"📊 Processando páginas {inicio} a {fim}")
+    print(f"⚙️  Workers de OCR: {workers}")
     print(f"💾 Salvando progresso em: {arquivo_progresso}\n")
     
-    # Processar em lotes de 10 páginas
-    tamanho_lote = 10
-    dados_finais = None
+    # Processar em lotes de --lote páginas (ou um lote por rodada de workers)
+    tamanho_lote = max(args.lote, workers)
+    progresso = carregar_progresso(arquivo_progresso, arquivo_legado)
+    if progresso:
+        print(f"⏭️  {len(progresso)} páginas já processadas\n")
     
-    for lote_inicio in range(inicio, fim + 1, tamanho_lote):
-        lote_fim = min(lote_inicio + tamanho_lote - 1, fim)
-        
-        print(f"\n📦 Lote: páginas {lote_inicio}-{lote_fim}")
-        dados_finais = processar_lote(pdf_path, lote_inicio, lote_fim, arquivo_progresso)
-        
-        # Salvar progresso após cada lote
-        with open(arquivo_progresso, 'w', encoding='utf-8') as f:
-            json.dump(dados_finais, f, ensure_ascii=False, indent=2)
-        
-        print(f"   💾 Progresso salvo: {dados_finais['metadados']['paginas_processadas']} páginas processadas")
+    cache = None if args.no_cache else CacheOCR()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for lote_inicio in range(inicio, fim + 1, tamanho_lote):
+            lote_fim = min(lote_inicio + tamanho_lote - 1, fim)
+            
+            print(f"\n📦 Lote: páginas {lote_inicio}-{lote_fim}")
+            # As páginas novas do lote são acrescentadas ao journal
+            processar_lote(
+                pdf_path, lote_inicio, lote_fim, progresso, arquivo_progresso, executor, cache,
+                perfil=medicao, parametros=parametros
+            )
+            
+            print(f"   💾 Progresso salvo: {len(progresso)} páginas processadas")
+    finally:
+        if executor:
+            executor.shutdown()
+        if cache:
+            cache.fechar()
+    
+    # Uma linha por página no journal; o JSON antigo já foi incorporado
+    with medicao.etapa('journal'):
+        compactar_journal(arquivo_progresso, progresso)
+    if arquivo_legado.exists():
+        arquivo_legado.unlink()
     
     # Salvar arquivo final
+    dados_finais = montar_dados(progresso)
     arquivo_final = Path(__file__).parent.parent / 'data' / 'extracao_ocr_completa.json'
-    with open(arquivo_final, 'w', encoding='utf-8') as f:
-        json.dump(dados_finais, f, ensure_ascii=False, indent=2)
+    with medicao.etapa('json'):
+        arquivo_final = gravacao_json.gravar_json(dados_finais, arquivo_final, args.formato)
     
     print(f"\n✅ Processamento completo!")
     print(f"📄 Total de páginas processadas: {dados_finais['metadados']['paginas_processadas']}")
     print(f"📝 Total de caracteres: {dados_finais['metadados']['total_caracteres']:,}")
     print(f"💾 Arquivo final: {arquivo_final}")
     
+    medicao.finalizar()
     return dados_finais
 
 if __name__ == '__main__':
@@ -2,14 +2,39 @@
 """
 Script para extrair conteúdo do PDF usando OCR quando necessário.
 Este script é a ÚNICA FONTE DE VERDADE para extração de dados alimentares.
+
+O PDF é aberto uma única vez: cada página é classificada (camada de texto
+ou imagem) e só as páginas sem texto são rasterizadas e enviadas a uma
+fila de OCR em paralelo (--workers N, padrão: número de CPUs).
+As páginas em imagem são pré-processadas e lidas primeiro em 150 DPI,
+e só em 300 DPI se a confiança do Tesseract for baixa (ver
+preprocessamento_ocr.py; --sem-preprocessamento volta ao OCR em 300 DPI).
+Resultados de OCR ficam em cache (data/.cache/ocr.sqlite3) por hash
+da página rasterizada; --no-cache desliga o cache.
+Tabelas só são procuradas nas páginas com linhas de grade (ver
+tabelas_pdf.py); --workers-tabelas N > 1 as extrai num pool separado.
+--profile grava o tempo de cada etapa por página (ver perfil.py).
+
+As páginas são gravadas em data/extracao_completa.json à medida que
+ficam prontas (gravação atômica, ver gravacao_json.py); --formato escolhe
+entre indentado (padrão), compacto e ndjson.
 """
 
+import os
 import sys
-import json
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 
+import gravacao_json
+import perfil
+from perfil import SEM_PERFIL, cronometro
+
 try:
     import pdfplumber
+    from pdfs_abertos import pdf_aberto
+    from tabelas_pdf import pode_ter_tabela, extrair_tabelas, tabelas_da_pagina
     HAS_PDFPLUMBER = True
 except ImportError:
     HAS_PDFPLUMBER = False
@@ -19,100 +44,258 @@ except ImportError:
 try:
     from PIL import Image
     import pytesseract
+    from cache_ocr import CacheOCR, ocr_com_cache
+    import preprocessamento_ocr
+    from preprocessamento_ocr import ocr_adaptativo
     HAS_OCR = True
 except ImportError:
     HAS_OCR = False
     print("⚠️  OCR não disponível. Instale com: pip install pytesseract pillow", file=sys.stderr)
     print("   E instale o Tesseract: https://github.com/tesseract-ocr/tesseract", file=sys.stderr)
 
-def extrair_pagina_com_ocr(pdf_path, num_pagina):
-    """Extrai texto de uma página usando OCR se necessário"""
-    with pdfplumber.open(pdf_path) as pdf:
-        pagina = pdf.pages[num_pagina - 1]
-        
-        # Tentar extrair texto direto
-        texto = pagina.extract_text()
-        
-        # Se não houver texto, tentar OCR
-        if not texto or len(texto.strip()) < 10:
-            if HAS_OCR:
-                try:
-                    # Converter página para imagem
-                    imagem = pagina.to_image(resolution=300)
-                    # Aplicar OCR
-                    texto = pytesseract.image_to_string(imagem.original, lang='por')
-                except Exception as e:
-                    texto = f"[ERRO OCR: {str(e)}]"
-            else:
-                texto = "[PÁGINA EM IMAGEM - OCR NÃO DISPONÍVEL]"
-        
-        return texto
+def precisa_ocr(texto):
+    """Página sem camada de texto útil (imagem escaneada)"""
+    return not texto or len(texto.strip()) < 10
+
+def rasterizar_pagina(pagina, dpi=300):
+    """Converte uma página já aberta do pdfplumber em imagem PIL"""
+    return pagina.to_image(resolution=dpi).original
+
+def rasterizar_do_pdf(pdf_path, num_pagina, dpi):
+    """Rasteriza uma página para a nova tentativa de OCR no worker
+    
+    O PDF é aberto uma vez por worker (pdfs_abertos.pdf_aberto), não a
+    cada página refeita.
+    """
+    pagina = pdf_aberto(pdf_path).pages[num_pagina - 1]
+    try:
+        return rasterizar_pagina(pagina, dpi)
+    finally:
+        # Descarta os objetos já interpretados da página (pdfplumber >= 0.10)
+        if hasattr(pagina, 'close'):
+            pagina.close()
+
+def ocr_imagem(imagem, cache=None, parametros=None, pdf_path=None, num_pagina=None):
+    """Aplica OCR em uma imagem de página (executado nos workers)
+    
+    Com `parametros` (preprocessamento_ocr.de_argumentos), a imagem vem no
+    DPI inicial e é pré-processada; se a confiança ficar baixa, a página
+    é rasterizada de novo a partir de `pdf_path`.
+    
+    Retorna (texto, medidas por etapa, qualidade) — as medidas são feitas
+    no worker; qualidade tem o 'dpi' e a 'confianca' (vazia sem
+    pré-processamento ou com erro).
+    """
+    if parametros is not None:
+        try:
+            texto, qualidade, medidas = ocr_adaptativo(
+                lambda dpi: rasterizar_do_pdf(pdf_path, num_pagina, dpi),
+                cache, 'por', '', parametros, imagem=imagem
+            )
+            return texto, medidas, qualidade
+        except Exception as e:
+            return f"[ERRO OCR: {str(e)}]", {}, {}
+    
+    with cronometro() as medida:
+        try:
+            texto = ocr_com_cache(imagem, cache, lang='por', dpi=300)
+        except Exception as e:
+            texto = f"[ERRO OCR: {str(e)}]"
+    return texto, {'ocr': medida}, {}
+
+def registrar_ocr(pagina_data, texto, medidas, qualidade, perfil=SEM_PERFIL):
+    """Guarda o resultado do OCR (e o DPI/confiança usados) na página"""
+    pagina_data['texto_completo'] = texto or ''
+    if qualidade:
+        pagina_data['ocr_dpi'] = qualidade['dpi']
+        pagina_data['ocr_confianca'] = qualidade['confianca']
+    for etapa, medida in medidas.items():
+        perfil.registrar(etapa, medida, pagina=pagina_data['numero'])
 
-def extrair_tudo(pdf_path):
-    """Extrai TODO o conteúdo do PDF"""
+def registrar_tabelas(pagina_data, tabelas, erro, medida, perfil=SEM_PERFIL):
+    """Guarda as tabelas (ou o erro da extração) na página"""
+    if tabelas:
+        pagina_data['tabelas'] = tabelas
+    if erro:
+        pagina_data['erro_tabelas'] = erro
+        print(f"   ⚠️  Tabelas da página {pagina_data['numero']}: {erro}")
+    perfil.registrar('tabelas', medida, pagina=pagina_data['numero'])
+
+def extrair_tudo(pdf_path, workers=1, cache=None, perfil=SEM_PERFIL, gravador=None, parametros=None,
+                 workers_tabelas=1):
+    """Extrai TODO o conteúdo do PDF
+    
+    Páginas com camada de texto são lidas direto; as demais são
+    rasterizadas na hora e o OCR roda num pool de `workers` processos,
+    com no máximo 2 × workers imagens em memória ao mesmo tempo.
+    
+    Com `gravador` (gravacao_json.GravadorPaginas), cada página é gravada
+    assim que fica pronta, na ordem, e não é mantida em 'paginas'.
+    `parametros` são os do pré-processamento (ver ocr_imagem).
+    
+    Só as páginas com linhas de grade passam por extract_tables; com
+    `workers_tabelas` > 1, num pool próprio (a página é emitida quando o
+    OCR e as tabelas dela terminam).
+    """
     dados_extraidos = {
         'total_paginas': 0,
         'paginas': [],
         'metadados': {
             'metodo_extracao': 'pdfplumber',
             'ocr_utilizado': HAS_OCR,
-            'total_caracteres': 0
+            'total_caracteres': 0,
+            'paginas_com_texto': 0,
+            'paginas_com_imagem': 0,
+            'paginas_ocr': 0
         }
     }
+    metadados = dados_extraidos['metadados']
     
-    with pdfplumber.open(pdf_path) as pdf:
-        dados_extraidos['total_paginas'] = len(pdf.pages)
-        
-        print(f"📄 Extraindo {len(pdf.pages)} páginas...")
-        
-        for num_pagina in range(1, len(pdf.pages) + 1):
-            if num_pagina % 10 == 0:
-                print(f"   Processando página {num_pagina}/{len(pdf.pages)}...")
-            
-            pagina_data = {
-                'numero': num_pagina,
-                'texto_completo': '',
-                'tabelas': [],
-                'tem_imagem': False,
-                'ocr_necessario': False
-            }
-            
-            pagina = pdf.pages[num_pagina - 1]
-            
-            # Extrair texto
-            texto = pagina.extract_text()
-            
-            # Verificar se tem imagens
-            if hasattr(pagina, 'images') and len(pagina.images) > 0:
-                pagina_data['tem_imagem'] = True
-            
-            # Se não tem texto suficiente, tentar OCR
-            if not texto or len(texto.strip()) < 10:
-                if HAS_OCR:
-                    pagina_data['ocr_necessario'] = True
-                    try:
-                        texto = extrair_pagina_com_ocr(pdf_path, num_pagina)
-                    except Exception as e:
-                        texto = f"[ERRO ao processar página {num_pagina}: {str(e)}]"
-                else:
-                    texto = f"[PÁGINA {num_pagina} - TEXTO NÃO EXTRAÍDO - INSTALE OCR]"
+    dpi_rasterizacao = parametros['dpi_inicial'] if parametros else 300
+    executor = ProcessPoolExecutor(max_workers=workers) if HAS_OCR and workers > 1 else None
+    executor_tabelas = ProcessPoolExecutor(max_workers=workers_tabelas) if workers_tabelas > 1 else None
+    limite_fila = 2 * workers
+    limite_tabelas = 2 * workers_tabelas
+    fila_ocr = {}  # future -> pagina_data
+    fila_tabelas = {}  # future -> pagina_data
+    aguardando = {}  # número da página -> resultados (OCR, tabelas) ainda na fila
+    prontas = deque()  # páginas em ordem, ainda não emitidas
+    
+    def aguardar(num_pagina):
+        aguardando[num_pagina] = aguardando.get(num_pagina, 0) + 1
+    
+    def emitir():
+        """Entrega as páginas do início da fila que já não esperam OCR nem tabelas"""
+        while prontas and prontas[0]['numero'] not in aguardando:
+            pagina_data = prontas.popleft()
+            metadados['total_caracteres'] += len(pagina_data['texto_completo'])
+            metadados['paginas_com_texto'] += len(pagina_data['texto_completo'].strip()) > 10
+            metadados['paginas_com_imagem'] += pagina_data['tem_imagem']
+            metadados['paginas_ocr'] += pagina_data['ocr_necessario']
+            if gravador:
+                with perfil.etapa('json', pagina=pagina_data['numero']):
+                    gravador.adicionar(pagina_data)
+            else:
+                dados_extraidos['paginas'].append(pagina_data)
+    
+    def concluir(futures):
+        for future in futures:
+            if future in fila_ocr:
+                pagina_data = fila_ocr.pop(future)
+                registrar_ocr(pagina_data, *future.result(), perfil=perfil)
+            else:
+                pagina_data = fila_tabelas.pop(future)
+                registrar_tabelas(pagina_data, *future.result(), perfil=perfil)
+            aguardando[pagina_data['numero']] -= 1
+            if not aguardando[pagina_data['numero']]:
+                del aguardando[pagina_data['numero']]
+        emitir()
+    
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            dados_extraidos['total_paginas'] = len(pdf.pages)
+            if gravador:
+                gravador.iniciar({'total_paginas': len(pdf.pages)})
             
-            pagina_data['texto_completo'] = texto or ''
+            print(f"📄 Extraindo {len(pdf.pages)} páginas...")
             
-            # Tentar extrair tabelas
-            try:
-                tabelas = pagina.extract_tables()
-                if tabelas:
-                    pagina_data['tabelas'] = tabelas
-            except:
-                pass
+            for num_pagina, pagina in enumerate(pdf.pages, start=1):
+                if num_pagina % 10 == 0:
+                    print(f"   Processando página {num_pagina}/{len(pdf.pages)}...")
+                
+                pagina_data = {
+                    'numero': num_pagina,
+                    'texto_completo': '',
+                    'tabelas': [],
+                    'tem_imagem': False,
+                    'ocr_necessario': False
+                }
+                
+                # Extrair texto (uma única vez por página)
+                with perfil.etapa('texto', pagina=num_pagina):
+                    texto = pagina.extract_text()
+                
+                # Verificar se tem imagens
+                if hasattr(pagina, 'images') and len(pagina.images) > 0:
+                    pagina_data['tem_imagem'] = True
+                
+                # Se não tem texto suficiente, enviar para a fila de OCR
+                if precisa_ocr(texto):
+                    if HAS_OCR:
+                        pagina_data['ocr_necessario'] = True
+                        try:
+                            with perfil.etapa('rasterizar', pagina=num_pagina):
+                                imagem = rasterizar_pagina(pagina, dpi_rasterizacao)
+                        except Exception as e:
+                            texto = f"[ERRO ao processar página {num_pagina}: {str(e)}]"
+                        else:
+                            if executor:
+                                if len(fila_ocr) >= limite_fila:
+                                    concluidos, _ = wait(fila_ocr, return_when=FIRST_COMPLETED)
+                                    concluir(concluidos)
+                                futuro = executor.submit(
+                                    ocr_imagem, imagem, cache, parametros, pdf_path, num_pagina
+                                )
+                                fila_ocr[futuro] = pagina_data
+                                aguardar(num_pagina)
+                            else:
+                                registrar_ocr(
+                                    pagina_data,
+                                    *ocr_imagem(imagem, cache, parametros, pdf_path, num_pagina),
+                                    perfil=perfil
+                                )
+                                texto = pagina_data['texto_completo']
+                            del imagem
+                    else:
+                        texto = f"[PÁGINA {num_pagina} - TEXTO NÃO EXTRAÍDO - INSTALE OCR]"
+                
+                pagina_data['texto_completo'] = texto or ''
+                
+                # Extrair tabelas (só se a página tem linhas de grade)
+                with perfil.etapa('tabelas_checagem', pagina=num_pagina):
+                    candidata = pode_ter_tabela(pagina)
+                if candidata and executor_tabelas:
+                    if len(fila_tabelas) >= limite_tabelas:
+                        concluidos, _ = wait(fila_tabelas, return_when=FIRST_COMPLETED)
+                        concluir(concluidos)
+                    fila_tabelas[executor_tabelas.submit(tabelas_da_pagina, pdf_path, num_pagina)] = pagina_data
+                    aguardar(num_pagina)
+                elif candidata:
+                    registrar_tabelas(pagina_data, *extrair_tabelas(pagina), perfil=perfil)
+                
+                prontas.append(pagina_data)
+                emitir()
             
-            dados_extraidos['paginas'].append(pagina_data)
-            dados_extraidos['metadados']['total_caracteres'] += len(pagina_data['texto_completo'])
+            # Aguardar o OCR e as tabelas das páginas que ainda estão na fila
+            concluir(list(fila_ocr) + list(fila_tabelas))
+    finally:
+        if executor:
+            executor.shutdown()
+        if executor_tabelas:
+            executor_tabelas.shutdown()
+    
+    if gravador:
+        gravador.concluir({'metadados': metadados})
     
     return dados_extraidos
 
 def main():
+    parser = argparse.ArgumentParser(description='Extrai o PDF com OCR apenas nas páginas em imagem')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='processos de OCR em paralelo (padrão: nº de CPUs)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='não usa o cache de OCR em data/.cache')
+    parser.add_argument('--formato', choices=gravacao_json.FORMATOS, default='indentado',
+                        help='formato da saída (padrão: indentado; ndjson grava uma página por linha)')
+    parser.add_argument('--workers-tabelas', type=int, default=1,
+                        help='processos para extrair tabelas em paralelo (padrão: 1, no próprio processo)')
+    if HAS_OCR:
+        preprocessamento_ocr.adicionar_argumentos(parser)
+    perfil.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    medicao = perfil.de_argumentos(args, 'extrair_pdf_ocr')
+    parametros = preprocessamento_ocr.de_argumentos(args) if HAS_OCR else None
+    
     pdf_path = Path(__file__).parent.parent / 'data' / 'pdfs' / 'cardapios-planeta-intestino.pdf'
     
     if not pdf_path.exists():
@@ -123,28 +306,32 @@ def main():
     print(f"📊 Tamanho: {pdf_path.stat().st_size / 1024:.2f} KB")
     print(f"🔧 OCR disponível: {'Sim' if HAS_OCR else 'Não'}\n")
     
-    dados = extrair_tudo(pdf_path)
-    
-    # Salvar dados brutos
+    # Páginas gravadas à medida que ficam prontas (arquivo trocado só no fim)
     output_path = Path(__file__).parent.parent / 'data' / 'extracao_completa.json'
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(dados, f, ensure_ascii=False, indent=2)
+    cache = CacheOCR() if HAS_OCR and not args.no_cache else None
+    try:
+        with gravacao_json.GravadorPaginas(output_path, args.formato) as gravador:
+            dados = extrair_tudo(
+                pdf_path, workers=max(1, args.workers), cache=cache, perfil=medicao, gravador=gravador,
+                parametros=parametros, workers_tabelas=max(1, args.workers_tabelas)
+            )
+    finally:
+        if cache:
+            cache.fechar()
     
+    metadados = dados['metadados']
     print(f"\n✅ Extração completa!")
     print(f"📄 Total de páginas: {dados['total_paginas']}")
-    print(f"📝 Total de caracteres: {dados['metadados']['total_caracteres']:,}")
-    print(f"💾 Dados salvos em: {output_path}")
+    print(f"📝 Total de caracteres: {metadados['total_caracteres']:,}")
+    print(f"💾 Dados salvos em: {gravador.caminho}")
     
     # Estatísticas
-    paginas_com_texto = sum(1 for p in dados['paginas'] if len(p['texto_completo'].strip()) > 10)
-    paginas_com_imagem = sum(1 for p in dados['paginas'] if p['tem_imagem'])
-    paginas_ocr = sum(1 for p in dados['paginas'] if p['ocr_necessario'])
-    
     print(f"\n📊 Estatísticas:")
-    print(f"   - Páginas com texto extraído: {paginas_com_texto}/{dados['total_paginas']}")
-    print(f"   - Páginas com imagens: {paginas_com_imagem}")
-    print(f"   - Páginas que precisaram OCR: {paginas_ocr}")
+    print(f"   - Páginas com texto extraído: {metadados['paginas_com_texto']}/{dados['total_paginas']}")
+    print(f"   - Páginas com imagens: {metadados['paginas_com_imagem']}")
+    print(f"   - Páginas que precisaram OCR: {metadados['paginas_ocr']}")
     
+    medicao.finalizar()
     return dados
 
 if __name__ == '__main__':
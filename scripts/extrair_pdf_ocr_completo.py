@@ -2,22 +2,36 @@
 """
 Script COMPLETO para extrair TODO o conteúdo do PDF usando OCR.
 Este é o script DEFINITIVO para extração dos cardápios.
+
+Uso: python3 scripts/extrair_pdf_ocr_completo.py [paginas_limite] [--no-cache] [--formato F] [--profile]
+       [--dpi-inicial N] [--limiar-confianca C] [--sem-preprocessamento]
+Cada página é pré-processada e lida primeiro em 150 DPI, e só em 300 DPI
+se a confiança do Tesseract for baixa (ver preprocessamento_ocr.py).
+Resultados de OCR ficam em cache (data/.cache/ocr.sqlite3) por hash
+da página rasterizada; --no-cache desliga o cache.
+--profile grava o tempo de rasterização e OCR por página (ver perfil.py).
 """
 
 import sys
-import json
+import argparse
 from pathlib import Path
 
+import gravacao_json
+import perfil
+from perfil import SEM_PERFIL
+
 try:
-    import pdfplumber
-    from pdf2image import convert_from_path
+    from pdf2image import convert_from_path, pdfinfo_from_path
     from PIL import Image
     import pytesseract
+    from cache_ocr import CacheOCR, ocr_com_cache
+    import preprocessamento_ocr
+    from preprocessamento_ocr import ocr_adaptativo
     HAS_ALL = True
 except ImportError as e:
     HAS_ALL = False
     print(f"❌ Dependências faltando: {e}", file=sys.stderr)
-    print("Instale com: pip install pdfplumber pdf2image pillow pytesseract", file=sys.stderr)
+    print("Instale com: pip install pdf2image pillow pytesseract", file=sys.stderr)
     sys.exit(1)
 
 def verificar_tesseract():
@@ -28,8 +42,45 @@ def verificar_tesseract():
     except:
         return False
 
-def extrair_com_ocr_completo(pdf_path, paginas_limite=None):
-    """Extrai TODO o conteúdo usando OCR em todas as páginas"""
+def contar_paginas(pdf_path):
+    """Retorna o número de páginas do PDF sem rasterizá-lo"""
+    return int(pdfinfo_from_path(str(pdf_path))['Pages'])
+
+def rasterizar_paginas(pdf_path, primeira, ultima, janela=1, dpi=300, perfil=SEM_PERFIL):
+    """Gera (numero, imagem) rasterizando `janela` páginas por vez.
+    
+    Apenas a janela corrente fica em memória: cada imagem é fechada assim
+    que o consumidor pede a próxima, então o pico de memória não depende
+    do total de páginas do documento.
+    """
+    for inicio in range(primeira, ultima + 1, janela):
+        fim = min(inicio + janela - 1, ultima)
+        with perfil.etapa('rasterizar', pagina=inicio):
+            imagens = convert_from_path(
+                str(pdf_path),
+                dpi=dpi,
+                first_page=inicio,
+                last_page=fim
+            )
+        for num_pagina, imagem in enumerate(imagens, start=inicio):
+            try:
+                yield num_pagina, imagem
+            finally:
+                imagem.close()
+        del imagens
+
+def rasterizar_pagina(pdf_path, num_pagina, dpi):
+    """Imagem de uma única página (nova tentativa de OCR em DPI maior)"""
+    return convert_from_path(str(pdf_path), dpi=dpi, first_page=num_pagina, last_page=num_pagina)[0]
+
+def extrair_com_ocr_completo(pdf_path, paginas_limite=None, janela=1, cache=None, perfil=SEM_PERFIL,
+                             parametros=None):
+    """Extrai TODO o conteúdo usando OCR em todas as páginas
+    
+    Com `parametros` (preprocessamento_ocr.de_argumentos), as páginas são
+    rasterizadas no DPI inicial, pré-processadas e refeitas em 300 DPI só
+    quando a confiança do OCR fica abaixo do limiar.
+    """
     
     if not verificar_tesseract():
         print("❌ Tesseract OCR não encontrado!", file=sys.stderr)
@@ -46,28 +97,30 @@ def extrair_com_ocr_completo(pdf_path, paginas_limite=None):
             'resolucao': 300
         }
     }
+    if parametros:
+        dados_extraidos['metadados']['resolucao_inicial'] = parametros['dpi_inicial']
     
     print(f"📄 Convertendo PDF para imagens...")
     
-    # Converter PDF para imagens
+    # Contar páginas (a conversão é feita página a página, sob demanda)
     try:
-        imagens = convert_from_path(
-            str(pdf_path),
-            dpi=300,
-            first_page=1,
-            last_page=paginas_limite
-        )
-        dados_extraidos['total_paginas'] = len(imagens)
+        total_paginas = contar_paginas(pdf_path)
+        if paginas_limite:
+            total_paginas = min(total_paginas, paginas_limite)
+        dados_extraidos['total_paginas'] = total_paginas
     except Exception as e:
         print(f"❌ Erro ao converter PDF: {e}", file=sys.stderr)
         sys.exit(1)
     
-    print(f"🔍 Aplicando OCR em {len(imagens)} páginas...")
+    print(f"🔍 Aplicando OCR em {total_paginas} páginas...")
     print(f"   (Isso pode levar vários minutos...)\n")
     
-    for num_pagina, imagem in enumerate(imagens, start=1):
+    dpi = parametros['dpi_inicial'] if parametros else 300
+    paginas = rasterizar_paginas(pdf_path, 1, total_paginas, janela=janela, dpi=dpi, perfil=perfil)
+    
+    for num_pagina, imagem in paginas:
         if num_pagina % 10 == 0:
-            print(f"   Processando página {num_pagina}/{len(imagens)}...")
+            print(f"   Processando página {num_pagina}/{total_paginas}...")
         
         pagina_data = {
             'numero': num_pagina,
@@ -77,13 +130,26 @@ def extrair_com_ocr_completo(pdf_path, paginas_limite=None):
         }
         
         try:
-            # Aplicar OCR
-            texto = pytesseract.image_to_string(
-                imagem,
-                lang='por',  # Português
-                config='--psm 6'  # Assume um único bloco uniforme de texto
-            )
-            
+            if parametros:
+                texto, qualidade, medidas = ocr_adaptativo(
+                    lambda dpi: rasterizar_pagina(pdf_path, num_pagina, dpi),
+                    cache, 'por', '--psm 6', parametros, imagem=imagem
+                )
+                for etapa, medida in medidas.items():
+                    perfil.registrar(etapa, medida, pagina=num_pagina)
+                pagina_data['ocr_dpi'] = qualidade['dpi']
+                pagina_data['ocr_confianca'] = qualidade['confianca']
+            else:
+                # Aplicar OCR
+                with perfil.etapa('ocr', pagina=num_pagina):
+                    texto = ocr_com_cache(
+                        imagem,
+                        cache,
+                        lang='por',  # Português
+                        config='--psm 6',  # Assume um único bloco uniforme de texto
+                        dpi=300
+                    )
+
             pagina_data['texto_completo'] = texto.strip()
             
         except Exception as e:
@@ -112,24 +178,48 @@ def main():
     print(f"📊 Tamanho: {pdf_path.stat().st_size / 1024:.2f} KB")
     print(f"🔧 Tesseract: {'✅ Instalado' if verificar_tesseract() else '❌ Não encontrado'}\n")
     
+    parser = argparse.ArgumentParser(description='Extrai todo o PDF via OCR')
+    parser.add_argument('paginas_limite', nargs='?', default=None,
+                        help='processa apenas as N primeiras páginas (modo teste)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='não usa o cache de OCR em data/.cache')
+    parser.add_argument('--formato', choices=gravacao_json.FORMATOS, default='indentado',
+                        help='formato da saída (padrão: indentado; ndjson grava uma página por linha)')
+    preprocessamento_ocr.adicionar_argumentos(parser)
+    perfil.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    medicao = perfil.de_argumentos(args, 'extrair_pdf_ocr_completo')
+    
     # Perguntar se quer processar todas as páginas ou apenas algumas (para teste)
-    if len(sys.argv) > 1:
+    if args.paginas_limite is not None:
         try:
-            paginas_limite = int(sys.argv[1])
+            paginas_limite = int(args.paginas_limite)
             print(f"⚠️  Modo teste: processando apenas {paginas_limite} páginas\n")
-        except:
+        except ValueError:
             paginas_limite = None
     else:
         paginas_limite = None
-        print(f"📋 Processando TODAS as páginas (191 páginas)\n")
+        try:
+            print(f"📋 Processando TODAS as páginas ({contar_paginas(pdf_path)} páginas)\n")
+        except Exception:
+            # pdfinfo falhou: extrair_com_ocr_completo mostra o erro
+            print(f"📋 Processando TODAS as páginas\n")
         print(f"💡 Dica: Para testar, execute: python3 {sys.argv[0]} 5\n")
     
-    dados = extrair_com_ocr_completo(pdf_path, paginas_limite)
+    cache = None if args.no_cache else CacheOCR()
+    try:
+        dados = extrair_com_ocr_completo(
+            pdf_path, paginas_limite, cache=cache, perfil=medicao,
+            parametros=preprocessamento_ocr.de_argumentos(args)
+        )
+    finally:
+        if cache:
+            cache.fechar()
     
     # Salvar dados
     output_path = Path(__file__).parent.parent / 'data' / 'extracao_ocr_completa.json'
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(dados, f, ensure_ascii=False, indent=2)
+    with medicao.etapa('json'):
+        output_path = gravacao_json.gravar_json(dados, output_path, args.formato)
     
     print(f"\n✅ Extração OCR completa!")
     print(f"📄 Total de páginas processadas: {dados['total_paginas']}")
@@ -145,6 +235,7 @@ def main():
         print(primeira['texto_completo'][:300])
         print("-" * 60)
     
+    medicao.finalizar()
     return dados
 
 if __name__ == '__main__':
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Fila de OCR em arquivos para dividir PDFs grandes entre várias máquinas.
+
+O coordenador divide um PDF (ou todos os PDFs de um diretório) em
+unidades de trabalho por intervalo de páginas; workers independentes —
+no mesmo host ou em hosts que compartilham o diretório da fila —
+reservam unidades com arquivos de trava e gravam o resultado de cada
+uma; no fim, `juntar` monta o extracao_ocr_completa.json.
+
+Estrutura do diretório da fila (padrão: data/.cache/fila_ocr):
+    fila.json                   documentos (id -> nome, pdf, páginas)
+    unidades/<id>.json          {'id', 'documento', 'pdf', 'inicio', 'fim'}
+    reservas/<id>.lock          trava do worker que está na unidade
+    resultados/<id>.json        páginas da unidade concluída
+
+A trava é criada com O_CREAT | O_EXCL (só um worker consegue) e tem o
+mtime renovado a cada página. Uma trava sem renovação há mais de
+--expiracao segundos é de um worker que morreu: outro worker a renomeia
+(só um consegue) e reserva a unidade de novo. Resultados são gravados
+atomicamente e o OCR é determinístico, então no pior caso (duas
+retomadas simultâneas) uma unidade é processada duas vezes com o mesmo
+resultado, nunca deixando arquivo pela metade.
+
+Uso:
+    python3 scripts/fila_ocr.py criar data/pdfs/livro.pdf --paginas-por-unidade 10
+    python3 scripts/fila_ocr.py trabalhar --workers 4      # em cada host
+        (aceita --dpi-inicial, --limiar-confianca e --sem-preprocessamento,
+        ver preprocessamento_ocr.py)
+    python3 scripts/fila_ocr.py status
+    python3 scripts/fila_ocr.py juntar                     # -> data/extracao_ocr_completa.json
+
+O id de cada documento é o nome do PDF mais um hash do caminho
+(livro-1a2b3c4d), então PDFs de mesmo nome em diretórios diferentes não
+se misturam; `juntar --documento` aceita o id ou, se não houver
+ambiguidade, só o nome.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import time
+import socket
+import argparse
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import gravacao_json
+import preprocessamento_ocr
+from cache_ocr import CacheOCR
+from extrair_pdf_lotes import contar_paginas, ocr_pagina, montar_dados
+
+DIR_PADRAO = Path(__file__).parent.parent / 'data' / '.cache' / 'fila_ocr'
+SAIDA_PADRAO = Path(__file__).parent.parent / 'data' / 'extracao_ocr_completa.json'
+EXPIRACAO_PADRAO = 600  # segundos sem renovar a trava
+
+def _ler_json(caminho: Path) -> Dict[str, Any]:
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def id_documento(pdf_path: Path) -> str:
+    """Nome do PDF + hash do caminho absoluto (único entre diretórios)"""
+    caminho = str(Path(pdf_path).resolve())
+    return f"{Path(pdf_path).stem}-{hashlib.sha1(caminho.encode('utf-8')).hexdigest()[:8]}"
+
+def criar_fila(fila: Path, pdfs: List[Path], paginas_por_unidade: int = 10) -> int:
+    """Divide os PDFs em unidades de `paginas_por_unidade` páginas.
+
+    Unidades já existentes (mesmo id) são mantidas, assim como os
+    resultados já gravados. Retorna o total de unidades da fila.
+    """
+    (fila / 'unidades').mkdir(parents=True, exist_ok=True)
+    (fila / 'reservas').mkdir(exist_ok=True)
+    (fila / 'resultados').mkdir(exist_ok=True)
+
+    caminho_fila = fila / 'fila.json'
+    estado = _ler_json(caminho_fila) if caminho_fila.exists() else {'documentos': {}}
+    for pdf_path in pdfs:
+        documento = id_documento(pdf_path)
+        total = contar_paginas(pdf_path)
+        estado['documentos'][documento] = {
+            'nome': pdf_path.stem, 'pdf': str(pdf_path.resolve()), 'paginas': total,
+        }
+        for inicio in range(1, total + 1, paginas_por_unidade):
+            fim = min(inicio + paginas_por_unidade - 1, total)
+            id_unidade = f"{documento}-p{inicio:05d}-{fim:05d}"
+            caminho = fila / 'unidades' / f"{id_unidade}.json"
+            if not caminho.exists():
+                gravacao_json.gravar_json({
+                    'id': id_unidade, 'documento': documento, 'pdf': str(pdf_path.resolve()),
+                    'inicio': inicio, 'fim': fim,
+                }, caminho)
+    gravacao_json.gravar_json(estado, caminho_fila)
+    return len(list((fila / 'unidades').glob('*.json')))
+
+def _criar_trava(trava: Path) -> bool:
+    """Cria a trava se ninguém a tiver (atômico também em NFS v3+)"""
+    try:
+        fd = os.open(trava, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({'host': socket.gethostname(), 'pid': os.getpid(), 'inicio': time.time()}, f)
+    return True
+
+def reservar_unidade(fila: Path, expiracao: float = EXPIRACAO_PADRAO) -> Optional[Dict[str, Any]]:
+    """Reserva a próxima unidade sem resultado e sem trava válida (None se não houver)"""
+    for caminho in sorted((fila / 'unidades').glob('*.json')):
+        id_unidade = caminho.stem
+        if (fila / 'resultados' / f"{id_unidade}.json").exists():
+            continue
+        trava = fila / 'reservas' / f"{id_unidade}.lock"
+        if not _criar_trava(trava):
+            try:
+                parada = time.time() - trava.stat().st_mtime > expiracao
+            except FileNotFoundError:
+                parada = True  # liberada agora há pouco
+            if not parada:
+                continue
+            # Trava de um worker que morreu: só quem conseguir renomeá-la a descarta
+            expirada = trava.with_name(f"{trava.name}.expirada-{uuid.uuid4().hex}")
+            try:
+                trava.rename(expirada)
+            except FileNotFoundError:
+                pass
+            else:
+                if time.time() - expirada.stat().st_mtime <= expiracao:
+                    # Outro worker retomou a unidade primeiro: devolve a trava dele
+                    expirada.rename(trava)
+                    continue
+                expirada.unlink()
+            if not _criar_trava(trava):
+                continue
+        # Outro worker pode ter concluído entre a checagem e a trava
+        if (fila / 'resultados' / f"{id_unidade}.json").exists():
+            trava.unlink(missing_ok=True)
+            continue
+        return _ler_json(caminho)
+    return None
+
+def processar_unidade(fila: Path, unidade: Dict[str, Any], executor=None, cache=None,
+                      parametros: Optional[Dict[str, Any]] = None) -> int:
+    """Faz o OCR das páginas da unidade, grava o resultado e libera a trava
+
+    `parametros` são os do pré-processamento (ver ocr_pagina).
+    """
+    trava = fila / 'reservas' / f"{unidade['id']}.lock"
+    paginas = range(unidade['inicio'], unidade['fim'] + 1)
+    mapear = executor.map if executor else map
+
+    resultado = []
+    resultados = mapear(ocr_pagina, repeat(unidade['pdf']), paginas, repeat(cache), repeat(parametros))
+    for num_pagina, texto, erro, _, qualidade in resultados:
+        status = '✅' if erro is None else f"❌ {erro}"
+        print(f"   🔍 {unidade['documento']} página {num_pagina}... {status}")
+        pagina = {'numero': num_pagina, 'texto_completo': texto.strip(), 'ocr_aplicado': True}
+        if qualidade:
+            pagina['ocr_dpi'] = qualidade['dpi']
+            pagina['ocr_confianca'] = qualidade['confianca']
+        resultado.append(pagina)
+        # Renova a trava: a unidade continua viva
+        try:
+            os.utime(trava)
+        except FileNotFoundError:
+            pass
+
+    gravacao_json.gravar_json(
+        {'unidade': unidade, 'paginas': resultado},
+        fila / 'resultados' / f"{unidade['id']}.json", 'compacto'
+    )
+    trava.unlink(missing_ok=True)
+    return len(resultado)
+
+def situacao(fila: Path, expiracao: float = EXPIRACAO_PADRAO) -> Dict[str, int]:
+    """Quantas unidades estão pendentes, reservadas (e paradas) e concluídas"""
+    contagem = {'pendentes': 0, 'reservadas': 0, 'paradas': 0, 'concluidas': 0}
+    agora = time.time()
+    for caminho in (fila / 'unidades').glob('*.json'):
+        id_unidade = caminho.stem
+        trava = fila / 'reservas' / f"{id_unidade}.lock"
+        if (fila / 'resultados' / f"{id_unidade}.json").exists():
+            contagem['concluidas'] += 1
+        elif trava.exists():
+            parada = agora - trava.stat().st_mtime > expiracao
+            contagem['paradas' if parada else 'reservadas'] += 1
+        else:
+            contagem['pendentes'] += 1
+    return contagem
+
+def _resolver_documento(documentos: Dict[str, Any], documento: Optional[str]) -> str:
+    """Id do documento a partir do id ou do nome do PDF"""
+    if documento is None:
+        if len(documentos) != 1:
+            raise ValueError(f"A fila tem {len(documentos)} documentos; informe --documento")
+        return next(iter(documentos))
+    if documento in documentos:
+        return documento
+    candidatos = [id_doc for id_doc, info in documentos.items() if info.get('nome') == documento]
+    if not candidatos:
+        raise ValueError(f"Documento fora da fila: {documento}")
+    if len(candidatos) > 1:
+        raise ValueError(f"Mais de um PDF chamado {documento}; informe o id ({', '.join(sorted(candidatos))})")
+    return candidatos[0]
+
+def juntar(fila: Path, documento: Optional[str] = None) -> Dict[str, Any]:
+    """Monta o JSON final do documento (mesmo formato de extrair_pdf_lotes.py)
+
+    Levanta ValueError se faltar alguma unidade.
+    """
+    documentos = _ler_json(fila / 'fila.json')['documentos']
+    documento = _resolver_documento(documentos, documento)
+
+    progresso = {}
+    faltando = []
+    for caminho in sorted((fila / 'unidades').glob('*.json')):
+        # O documento vem da própria unidade: um id pode ser prefixo de outro
+        if _ler_json(caminho)['documento'] != documento:
+            continue
+        resultado = fila / 'resultados' / caminho.name
+        if not resultado.exists():
+            faltando.append(caminho.stem)
+            continue
+        for pagina in _ler_json(resultado)['paginas']:
+            progresso[pagina['numero']] = pagina
+    if faltando:
+        raise ValueError(f"{len(faltando)} unidades sem resultado: {', '.join(faltando[:5])}...")
+    if len(progresso) != documentos[documento]['paginas']:
+        raise ValueError(f"{documento}: {len(progresso)} de {documentos[documento]['paginas']} páginas")
+    return montar_dados(progresso)
+
+def main():
+    parser = argparse.ArgumentParser(description='Fila de OCR por intervalos de páginas')
+    parser.add_argument('--fila', type=Path, default=DIR_PADRAO,
+                        help='diretório da fila (compartilhado entre os hosts)')
+    parser.add_argument('--expiracao', type=float, default=EXPIRACAO_PADRAO,
+                        help='segundos sem progresso até uma reserva ser retomada por outro worker')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    criar = comandos.add_parser('criar', help='divide PDFs em unidades de trabalho')
+    criar.add_argument('entrada', type=Path, help='um PDF ou um diretório com PDFs')
+    criar.add_argument('--paginas-por-unidade', type=int, default=10)
+
+    trabalhar = comandos.add_parser('trabalhar', help='processa unidades até a fila esvaziar')
+    trabalhar.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                           help='processos de OCR por unidade (padrão: nº de CPUs)')
+    trabalhar.add_argument('--no-cache', action='store_true',
+                           help='não usa o cache de OCR em data/.cache')
+    preprocessamento_ocr.adicionar_argumentos(trabalhar)
+
+    comandos.add_parser('status', help='mostra o andamento da fila')
+
+    juntar_cmd = comandos.add_parser('juntar', help='monta o JSON final de um documento')
+    juntar_cmd.add_argument('--documento', help='id do documento ou nome do PDF sem extensão (se houver mais de um)')
+    juntar_cmd.add_argument('--saida', type=Path, default=SAIDA_PADRAO)
+    juntar_cmd.add_argument('--formato', choices=gravacao_json.FORMATOS, default='indentado')
+
+    args = parser.parse_args()
+
+    if args.comando == 'criar':
+        pdfs = sorted(args.entrada.glob('*.pdf')) if args.entrada.is_dir() else [args.entrada]
+        if not pdfs:
+            print(f"❌ Nenhum PDF em {args.entrada}", file=sys.stderr)
+            sys.exit(1)
+        total = criar_fila(args.fila, pdfs, max(1, args.paginas_por_unidade))
+        print(f"📦 Fila em {args.fila}: {len(pdfs)} documento(s), {total} unidades")
+
+    elif args.comando == 'trabalhar':
+        workers = max(1, args.workers)
+        print(f"⚙️  {socket.gethostname()} (pid {os.getpid()}): {workers} processo(s) de OCR")
+        cache = None if args.no_cache else CacheOCR()
+        parametros = preprocessamento_ocr.de_argumentos(args)
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        unidades = 0
+        try:
+            while True:
+                unidade = reservar_unidade(args.fila, args.expiracao)
+                if unidade is None:
+                    break
+                print(f"\n📦 Unidade {unidade['id']}")
+                processar_unidade(args.fila, unidade, executor, cache, parametros)
+                unidades += 1
+        finally:
+            if executor:
+                executor.shutdown()
+            if cache:
+                cache.fechar()
+        print(f"\n✅ {unidades} unidade(s) processada(s); nenhuma outra disponível")
+
+    elif args.comando == 'status':
+        contagem = situacao(args.fila, args.expiracao)
+        total = sum(contagem.values())
+        print(f"📊 {contagem['concluidas']}/{total} unidades concluídas")
+        print(f"   - Pendentes: {contagem['pendentes']}")
+        print(f"   - Em processamento: {contagem['reservadas']}")
+        print(f"   - Paradas (trava expirada): {contagem['paradas']}")
+
+    elif args.comando == 'juntar':
+        try:
+            dados = juntar(args.fila, args.documento)
+        except ValueError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+        saida = gravacao_json.gravar_json(dados, args.saida, args.formato)
+        print(f"✅ {dados['metadados']['paginas_processadas']} páginas juntadas em {saida}")
+
+if __name__ == '__main__':
+    main()
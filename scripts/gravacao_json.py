@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Gravação dos JSON de saída dos scripts (extração, estruturação, base).
+
+- Atômica: tudo é escrito num arquivo .tmp ao lado do destino, com fsync,
+  e só então renomeado por cima; uma interrupção no meio deixa o arquivo
+  anterior intacto (a rota /api/base-conhecimento nunca lê JSON truncado).
+- Formatos (FORMATOS): 'indentado' (indent=2, o padrão de sempre),
+  'compacto' (sem espaços) e 'ndjson' (um objeto por linha, em .ndjson).
+- Usa orjson quando instalado (pip install orjson), bem mais rápido.
+  Para os dados deste repositório (strings, inteiros, floats comuns,
+  listas e dicionários) o JSON é equivalente ao do json da stdlib — o
+  mesmo conteúdo ao ser lido — mas não byte a byte: floats podem sair
+  escritos de outro jeito (a stdlib escreve 1e+16 e 1e-05, o orjson
+  1e16 e 0.00001) e
+  NaN/Infinity viram null (a stdlib escreve NaN/Infinity, que não é
+  JSON válido). tests/test_gravacao_json.py fixa esse comportamento.
+
+GravadorPaginas grava documentos {..., 'paginas': [...], ...} página a
+página, enquanto elas ainda estão sendo produzidas, sem montar a lista
+inteira em memória. No NDJSON a primeira linha tem as chaves anteriores à
+lista, cada página ocupa uma linha e a última linha tem as chaves
+posteriores; ler_ndjson remonta o documento. Ao lado do NDJSON fica um
+índice (<arquivo>.ndjson.idx) com o deslocamento em bytes de cada linha,
+para leitura sob demanda com mmap (ver paginas_ndjson.py).
+"""
+
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+FORMATOS = ['indentado', 'compacto', 'ndjson']
+VERSAO_INDICE = 2
+
+def serializar(dados: Any, formato: str = 'indentado') -> bytes:
+    """JSON em UTF-8 (sem escapar acentos), indentado ou compacto"""
+    indentado = formato == 'indentado'
+    if HAS_ORJSON:
+        try:
+            return orjson.dumps(dados, option=orjson.OPT_INDENT_2 if indentado else 0)
+        except TypeError:
+            pass  # tipos que o orjson recusa (chaves não-string...): stdlib
+    if indentado:
+        return json.dumps(dados, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(dados, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def caminho_saida(caminho: Path, formato: str) -> Path:
+    """Destino efetivo: NDJSON vai para .ndjson"""
+    caminho = Path(caminho)
+    return caminho.with_suffix('.ndjson') if formato == 'ndjson' else caminho
+
+def caminho_indice(caminho: Path) -> Path:
+    """Índice de deslocamentos de um .ndjson (<arquivo>.ndjson.idx)"""
+    caminho = Path(caminho)
+    return caminho.with_name(caminho.name + '.idx')
+
+def gravar_indice(caminho: Path, chave: str, campo_numero: str, numeros: List[Any],
+                  deslocamentos: List[int]) -> Path:
+    """Grava o índice do NDJSON `caminho`.
+
+    `deslocamentos` tem o início de cada linha (cabeçalho, elementos,
+    rodapé) e o tamanho do arquivo; `numeros` o `campo_numero` de cada
+    elemento. O mtime do NDJSON vai junto, para reconhecer um arquivo
+    regravado com o mesmo tamanho. Sem cabeçalho e rodapé, o NDJSON está
+    incompleto: ValueError, sem gravar nada.
+    """
+    if len(deslocamentos) < 3 or len(numeros) != len(deslocamentos) - 3:
+        raise ValueError(f"NDJSON incompleto: {caminho}")
+    destino = caminho_indice(caminho)
+    indice = {
+        'versao': VERSAO_INDICE,
+        'tamanho': deslocamentos[-1],
+        'mtime_ns': Path(caminho).stat().st_mtime_ns,
+        'chave': chave,
+        'campo_numero': campo_numero,
+        'numeros': numeros,
+        'deslocamentos': deslocamentos,
+    }
+    with arquivo_atomico(destino) as f:
+        f.write(serializar(indice, 'compacto'))
+    return destino
+
+@contextmanager
+def arquivo_atomico(caminho: Path) -> Iterator[Any]:
+    """Arquivo binário temporário que substitui `caminho` só se o bloco terminar sem erro"""
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    tmp = caminho.with_suffix(caminho.suffix + '.tmp')
+    try:
+        with open(tmp, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.replace(caminho)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+def gravar_json(dados: Dict[str, Any], caminho: Path, formato: str = 'indentado',
+                chave: str = 'paginas', campo_numero: str = 'numero') -> Path:
+    """Grava `dados` atomicamente e retorna o caminho gravado.
+
+    Em 'ndjson', `chave` é a lista gravada um elemento por linha e
+    `campo_numero` o campo dos elementos usado no índice.
+    """
+    if formato == 'ndjson':
+        with GravadorPaginas(caminho, formato, chave, campo_numero) as gravador:
+            posicao = list(dados).index(chave) if chave in dados else len(dados)
+            chaves = list(dados)
+            gravador.iniciar({k: dados[k] for k in chaves[:posicao]})
+            for elemento in dados.get(chave, []):
+                gravador.adicionar(elemento)
+            gravador.concluir({k: dados[k] for k in chaves[posicao + 1:]})
+        return gravador.caminho
+
+    caminho = Path(caminho)
+    with arquivo_atomico(caminho) as f:
+        f.write(serializar(dados, formato))
+    return caminho
+
+def _indentar(texto: bytes, nivel: int) -> bytes:
+    # Linhas internas de um valor serializado com indent=2, deslocadas para `nivel` espaços
+    return texto.replace(b'\n', b'\n' + b' ' * nivel)
+
+class GravadorPaginas:
+    """Grava um documento com uma lista longa (`chave`) elemento por elemento.
+
+    Uso:
+        with GravadorPaginas(caminho, 'indentado') as gravador:
+            gravador.iniciar({'total_paginas': n})   # chaves antes da lista
+            for pagina in ...:
+                gravador.adicionar(pagina)
+            gravador.concluir({'metadados': {...}})  # chaves depois da lista
+
+    O resultado em 'indentado' e 'compacto' é idêntico ao de gravar_json
+    com o documento inteiro. Se o bloco falhar (ou concluir() não for
+    chamado), o destino não é alterado. Em 'ndjson', o índice é gravado
+    depois do arquivo, indexando cada elemento pelo `campo_numero`.
+    """
+
+    def __init__(self, caminho: Path, formato: str = 'indentado', chave: str = 'paginas',
+                 campo_numero: str = 'numero'):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato desconhecido: {formato}")
+        self.caminho = caminho_saida(caminho, formato)
+        self.formato = formato
+        self.chave = chave
+        self.campo_numero = campo_numero
+        self.total = 0
+        self._numeros: List[Any] = []
+        self._deslocamentos: List[int] = []
+        self._posicao = 0
+        self._contexto = None
+        self._arquivo = None
+        self._concluido = False
+
+    def __enter__(self):
+        self._contexto = arquivo_atomico(self.caminho)
+        self._arquivo = self._contexto.__enter__()
+        return self
+
+    def __exit__(self, tipo, valor, rastro):
+        if tipo is None and not self._concluido:
+            erro = RuntimeError('GravadorPaginas fechado sem concluir()')
+            self._contexto.__exit__(RuntimeError, erro, None)
+            raise erro
+        # Com erro, o temporário é descartado e o destino fica como estava
+        suprimir = self._contexto.__exit__(tipo, valor, rastro)
+        if tipo is None and self.formato == 'ndjson':
+            # Depois da troca do arquivo: um índice antigo tem outro tamanho/mtime e é ignorado
+            gravar_indice(self.caminho, self.chave, self.campo_numero, self._numeros,
+                          self._deslocamentos)
+        return suprimir
+
+    def _linha(self, dados: Any) -> None:
+        # Uma linha do NDJSON, registrando onde ela começa
+        linha = serializar(dados, 'compacto') + b'\n'
+        self._deslocamentos.append(self._posicao)
+        self._arquivo.write(linha)
+        self._posicao += len(linha)
+
+    def _campos(self, campos: Dict[str, Any], primeiro: bool) -> None:
+        f = self._arquivo
+        for nome, valor in campos.items():
+            f.write(b'' if primeiro else b',')
+            if self.formato == 'indentado':
+                f.write(b'\n  ' + serializar(nome) + b': ' + _indentar(serializar(valor), 2))
+            else:
+                f.write(serializar(nome, 'compacto') + b':' + serializar(valor, 'compacto'))
+            primeiro = False
+
+    def iniciar(self, cabecalho: Optional[Dict[str, Any]] = None) -> None:
+        """Grava as chaves que vêm antes da lista e abre a lista"""
+        cabecalho = cabecalho or {}
+        f = self._arquivo
+        if self.formato == 'ndjson':
+            self._linha(cabecalho)
+            return
+        f.write(b'{')
+        self._campos(cabecalho, primeiro=True)
+        separador = b',' if cabecalho else b''
+        if self.formato == 'indentado':
+            f.write(separador + b'\n  ' + serializar(self.chave) + b': [')
+        else:
+            f.write(separador + serializar(self.chave, 'compacto') + b':[')
+
+    def adicionar(self, elemento: Any) -> None:
+        """Grava um elemento da lista"""
+        f = self._arquivo
+        if self.formato == 'ndjson':
+            self._linha(elemento)
+            self._numeros.append(elemento.get(self.campo_numero) if isinstance(elemento, dict) else None)
+        elif self.formato == 'indentado':
+            f.write((b',' if self.total else b'') + b'\n    ' + _indentar(serializar(elemento), 4))
+        else:
+            f.write((b',' if self.total else b'') + serializar(elemento, 'compacto'))
+        self.total += 1
+
+    def concluir(self, rodape: Optional[Dict[str, Any]] = None) -> None:
+        """Fecha a lista e grava as chaves que vêm depois dela"""
+        rodape = rodape or {}
+        f = self._arquivo
+        if self.formato == 'ndjson':
+            self._linha(rodape)
+            self._deslocamentos.append(self._posicao)
+        else:
+            if self.formato == 'indentado':
+                f.write(b'\n  ]' if self.total else b']')
+            else:
+                f.write(b']')
+            self._campos(rodape, primeiro=False)
+            f.write(b'\n}' if self.formato == 'indentado' else b'}')
+        self._concluido = True
+
+def ler_ndjson(caminho: Path, chave: str = 'paginas') -> Dict[str, Any]:
+    """Remonta o documento gravado em NDJSON por GravadorPaginas/gravar_json"""
+    with open(caminho, 'rb') as f:
+        linhas = [json.loads(linha) for linha in f if linha.strip()]
+    if len(linhas) < 2:
+        raise ValueError(f"NDJSON incompleto: {caminho}")
+    dados = dict(linhas[0])
+    dados[chave] = linhas[1:-1]
+    dados.update(linhas[-1])
+    return dados
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Índices de busca gravados junto com os itens em base_conhecimento.json.
+
+Todos guardam IDs de itens na ordem da lista 'itens':
+- por_condicao_tipo: {condicao_digestiva: {tipo: [ids]}}
+- por_condicao:      {condicao_digestiva: [ids]}
+- por_nome:          {nome_normalizado: [ids]}
+
+Junto vão 'total_itens' e 'hash_ids' (SHA-256 dos IDs da base, em ordem,
+separados por '\n'): os índices ficam num arquivo à parte, e
+lib/base_conhecimento.ts só os usa se os dois baterem com a base carregada.
+
+Os montadores de cardápio (lib/base_conhecimento.ts) consultam os
+buckets diretamente em vez de filtrar a base inteira a cada requisição.
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import Any, Dict, List
+
+# Pontuação/espaços removidos do fim do nome ("Banana madura:" -> "banana madura")
+_PADRAO_SUFIXO = re.compile(r'[\s:;,.\-–—(]+$')
+_PADRAO_ESPACOS = re.compile(r'\s+')
+
+def normalizar_nome(nome: str) -> str:
+    """Nome em minúsculas, sem acentos, espaços colapsados e sem pontuação final"""
+    decomposto = unicodedata.normalize('NFKD', nome)
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    texto = _PADRAO_ESPACOS.sub(' ', sem_acentos.lower()).strip()
+    return _PADRAO_SUFIXO.sub('', texto)
+
+def hash_ids(itens: List[Dict[str, Any]]) -> str:
+    """SHA-256 dos IDs dos itens na ordem da lista (o mesmo de lib/base_conhecimento.ts)"""
+    return hashlib.sha256('\n'.join(item['id'] for item in itens).encode('utf-8')).hexdigest()
+
+def construir_indices(itens: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Monta os índices por (condição, tipo), por condição e por nome normalizado"""
+    por_condicao_tipo: Dict[str, Dict[str, List[str]]] = {}
+    por_condicao: Dict[str, List[str]] = {}
+    por_nome: Dict[str, List[str]] = {}
+
+    for item in itens:
+        condicao = item['condicao_digestiva']
+        por_condicao_tipo.setdefault(condicao, {}).setdefault(item['tipo'], []).append(item['id'])
+        por_condicao.setdefault(condicao, []).append(item['id'])
+        por_nome.setdefault(normalizar_nome(item['nome']), []).append(item['id'])
+
+    return {
+        'total_itens': len(itens),
+        'hash_ids': hash_ids(itens),
+        'por_condicao_tipo': por_condicao_tipo,
+        'por_condicao': por_condicao,
+        'por_nome': por_nome,
+    }
+
+def verificar_indices(itens: List[Dict[str, Any]], indices: Dict[str, Any]) -> None:
+    """Confere se os índices cobrem cada item exatamente uma vez, no bucket
+    certo e na ordem da lista. Levanta ValueError na primeira divergência.
+    """
+    posicao = {}
+    for i, item in enumerate(itens):
+        if item['id'] in posicao:
+            raise ValueError(f"ID duplicado na base: {item['id']}")
+        posicao[item['id']] = i
+
+    def conferir(nome_indice, chave, ids, pertence):
+        anterior = -1
+        for id_item in ids:
+            if id_item not in posicao:
+                raise ValueError(f"{nome_indice}[{chave}]: ID inexistente {id_item}")
+            item = itens[posicao[id_item]]
+            if not pertence(item):
+                raise ValueError(f"{nome_indice}[{chave}]: {id_item} no bucket errado")
+            if posicao[id_item] <= anterior:
+                raise ValueError(f"{nome_indice}[{chave}]: IDs fora da ordem da base")
+            anterior = posicao[id_item]
+        return len(ids)
+
+    if indices.get('total_itens') != len(itens) or indices.get('hash_ids') != hash_ids(itens):
+        raise ValueError("total_itens/hash_ids não correspondem à base")
+
+    total = 0
+    for condicao, por_tipo in indices['por_condicao_tipo'].items():
+        for tipo, ids in por_tipo.items():
+            total += conferir(
+                'por_condicao_tipo', (condicao, tipo), ids,
+                lambda item: item['condicao_digestiva'] == condicao and item['tipo'] == tipo
+            )
+    if total != len(itens):
+        raise ValueError(f"por_condicao_tipo cobre {total} de {len(itens)} itens")
+
+    for nome_indice, campo in (('por_condicao', 'condicao_digestiva'), ('por_nome', 'nome')):
+        total = 0
+        for chave, ids in indices[nome_indice].items():
+            if campo == 'nome':
+                pertence = lambda item: normalizar_nome(item['nome']) == chave
+            else:
+                pertence = lambda item: item[campo] == chave
+            total += conferir(nome_indice, chave, ids, pertence)
+        if total != len(itens):
+            raise ValueError(f"{nome_indice} cobre {total} de {len(itens)} itens")
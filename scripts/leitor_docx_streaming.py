@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Leitor leve de .docx: lê word/document.xml direto do zip com iterparse,
+sem montar o Document do python-docx.
+
+Gera um bloco por parágrafo do corpo e por célula de tabela, na ordem do
+documento, descartando os elementos já lidos para manter a memória
+constante. Os blocos têm o mesmo formato de iterar_blocos_docx em
+extrair_docx_base_conhecimento.py:
+    {'bloco': 'paragrafo', 'texto': ...}
+    {'bloco': 'celula', 'texto': ..., 'tabela': n, 'linha': n}
+
+Segue as mesmas regras de texto do python-docx:
+- parágrafo: runs (w:r) e hyperlinks diretos do w:p; w:tab/w:ptab -> '\\t',
+  w:br (quebra de linha) e w:cr -> '\\n', w:noBreakHyphen -> '-';
+- célula: parágrafos diretos do w:tc unidos por '\\n' (tabelas aninhadas
+  e conteúdo de revisões/caixas de texto ficam de fora).
+
+Uma célula mesclada (gridSpan/vMerge) sai uma única vez, como em
+iterar_blocos_docx (row.cells do python-docx a repete por coluna).
+
+Uso (em extrair_docx_base_conhecimento.py): --leitor streaming
+"""
+
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from xml.etree.ElementTree import iterparse
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+# Conteúdo de run com equivalente em texto (w:t e w:br são tratados à parte)
+TEXTO_FIXO = {
+    W + 'tab': '\t',
+    W + 'ptab': '\t',
+    W + 'cr': '\n',
+    W + 'noBreakHyphen': '-',
+}
+
+def _texto_run(elemento) -> Optional[str]:
+    if elemento.tag == W + 't':
+        return elemento.text or ''
+    if elemento.tag == W + 'br':
+        return '\n' if elemento.get(W + 'type', 'textWrapping') == 'textWrapping' else ''
+    return TEXTO_FIXO.get(elemento.tag)
+
+def iterar_blocos(caminho: Path) -> Iterator[Dict[str, Any]]:
+    """Blocos de parágrafo e de célula, em ordem (textos vazios omitidos)"""
+    with zipfile.ZipFile(caminho) as pacote, pacote.open('word/document.xml') as xml:
+        pilha: List[str] = []              # tags abertas, da raiz até o elemento atual
+        paragrafos: List[Optional[list]] = []  # partes do texto de cada w:p aberto (None = ignorado)
+        celula: Optional[List[str]] = None  # parágrafos da célula de tabela aberta
+        corpo = None
+        num_tabela = num_linha = -1
+
+        for evento, elemento in iterparse(xml, events=('start', 'end')):
+            tag = elemento.tag
+            if evento == 'start':
+                if tag == W + 'p':
+                    no_corpo = pilha[-1:] == [W + 'body']
+                    na_celula = (
+                        pilha[-4:] == [W + 'body', W + 'tbl', W + 'tr', W + 'tc']
+                    )
+                    paragrafos.append([] if no_corpo or na_celula else None)
+                elif tag == W + 'tc' and pilha[-3:] == [W + 'body', W + 'tbl', W + 'tr']:
+                    celula = []
+                elif tag == W + 'tr' and pilha[-2:] == [W + 'body', W + 'tbl']:
+                    num_linha += 1
+                elif tag == W + 'tbl' and pilha[-1:] == [W + 'body']:
+                    num_tabela += 1
+                    num_linha = -1
+                elif tag == W + 'body':
+                    corpo = elemento
+                pilha.append(tag)
+                continue
+
+            pilha.pop()
+            if tag == W + 'p':
+                partes = paragrafos.pop()
+                if partes is not None:
+                    texto = ''.join(partes)
+                    if celula is not None and pilha[-1:] == [W + 'tc']:
+                        celula.append(texto)
+                    elif texto.strip():
+                        yield {'bloco': 'paragrafo', 'texto': texto}
+            elif tag == W + 'tc' and celula is not None and pilha[-3:] == [W + 'body', W + 'tbl', W + 'tr']:
+                texto = '\n'.join(celula)
+                celula = None
+                if texto.strip():
+                    yield {'bloco': 'celula', 'texto': texto, 'tabela': num_tabela, 'linha': num_linha}
+            elif paragrafos and paragrafos[-1] is not None and pilha[-1:] == [W + 'r']:
+                # Run direto do parágrafo ou dentro de um w:hyperlink direto dele
+                dono = pilha[-2:-1]
+                if dono == [W + 'p'] or (dono == [W + 'hyperlink'] and pilha[-3:-2] == [W + 'p']):
+                    texto = _texto_run(elemento)
+                    if texto is not None:
+                        paragrafos[-1].append(texto)
+
+            # Blocos do corpo (e linhas de tabela) já lidos não são mais necessários
+            if corpo is not None and pilha[-1:] == [W + 'body']:
+                elemento.clear()
+                corpo.remove(elemento)
+            elif pilha[-2:] == [W + 'body', W + 'tbl']:
+                elemento.clear()
+
+def iterar_textos(caminho: Path) -> Iterator[str]:
+    """Só o texto de cada bloco, em ordem"""
+    for bloco in iterar_blocos(caminho):
+        yield bloco['texto']
+
+def extrair_texto(caminho: Path) -> str:
+    """Um bloco de texto por linha, na ordem do documento"""
+    return '\n'.join(iterar_textos(caminho))
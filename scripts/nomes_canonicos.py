@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Canonicalização dos nomes de alimentos para deduplicação em escala.
+
+1. chave_canonica: remove rótulos ("Sobremesa:", "Recheio:", "Para 2
+   pessoas:"), a descrição de porção depois dos dois-pontos ("Frango
+   grelhado: 1 filé médio (" -> "frango grelhado"), acentos, caixa,
+   pontuação e contagem inicial, e reduz plurais (stemming leve do
+   português: "Batatas cozidas" -> "batata cozida"). Palavras que só
+   parecem plural ("lápis", "ananás", "nobres") ficam como estão, e nomes
+   que não passam de rótulo ("Para 2 pessoas: 1/") ficam com o nome
+   normalizado inteiro.
+2. agrupar_chaves: junta chaves quase iguais ("sopa cremosa de abobora" /
+   "sopa de abobora cremosa") com MinHash + LSH sobre trigramas de
+   caracteres — só pares que caem no mesmo bucket são comparados, então
+   o custo não cresce quadraticamente com o número de nomes. Cada par
+   candidato é confirmado pela similaridade de Jaccard exata.
+3. atribuir_alimentos: grava em cada item um 'alimento_id' estável
+   (alimento_NNNN, na ordem da primeira ocorrência).
+"""
+
+import random
+import re
+import zlib
+from typing import Any, Dict, List
+
+from indices_base import normalizar_nome
+
+# Rótulos que precedem o nome do alimento no texto dos cardápios
+PADRAO_ROTULO = re.compile(r'^(?:sobremesa|recheio|para \d+ pessoas?)\s*:\s*')
+# Descrição de porção depois do último ':' ("...: 1 filé médio (", "...: 5-")
+PADRAO_PORCAO = re.compile(r'\s*:\s*\d[^:]*$')
+PADRAO_PONTUACAO = re.compile(r'[^\w%+\-]+')
+PADRAO_CONTAGEM = re.compile(r'^\d+ ')
+PADRAO_PALAVRA = re.compile(r'\w+')
+
+# Plurais (já sem acento) -> singular, do sufixo mais longo ao mais curto
+SUFIXOS_PLURAL = [
+    ('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'), ('eis', 'el'), ('ois', 'ol'),
+    ('res', 'r'), ('zes', 'z'), ('ns', 'm'), ('s', ''),
+]
+# Sufixos que só são plural depois de vogal: "flores" -> "flor", mas
+# "nobres" -> "nobre"; "uvas" -> "uva", mas "chips" fica
+SUFIXOS_APOS_VOGAL = {'res', 'zes', 'ns', 's'}
+VOGAIS = set('aeiou')
+# Terminadas em s no singular (sem acento): oxítonas em -ás/-ês, nomes
+# próprios, numerais e palavras que aparecem sem acento no texto
+INVARIAVEIS = frozenset({
+    'ananas', 'gas', 'pais', 'mes', 'holandes', 'ingles', 'frances', 'portugues',
+    'japones', 'chines', 'paris', 'lapis', 'tenis', 'pires', 'simples', 'oculos', 'brocolis',
+    'virus', 'onibus', 'atlas', 'mais', 'menos', 'tres', 'seis',
+})
+# Acento gráfico antes do -is/-us final: paroxítona, logo singular ("lápis", "brócolis")
+PADRAO_PAROXITONA = re.compile(r'\b\w*[áéíóúâêô]\w*[iu]s\b')
+# Chaves com menos letras que isso são restos de rótulo/porção ("1", "g")
+MINIMO_LETRAS_CHAVE = 3
+
+# MinHash: NUM_BANDAS x LINHAS_POR_BANDA funções; com 8 x 4 pares acima de
+# ~0,6 de similaridade quase sempre viram candidatos
+NUM_BANDAS = 8
+LINHAS_POR_BANDA = 4
+LIMIAR_SIMILARIDADE = 0.85
+_PRIMO = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMUTACOES = [
+    (_rng.randrange(1, _PRIMO), _rng.randrange(0, _PRIMO))
+    for _ in range(NUM_BANDAS * LINHAS_POR_BANDA)
+]
+
+def singular(palavra: str) -> str:
+    """Reduz o plural de uma palavra sem acentos ("limoes" -> "limao")"""
+    if len(palavra) <= 3 or not palavra.endswith('s') or palavra in INVARIAVEIS:
+        return palavra
+    for sufixo, troca in SUFIXOS_PLURAL:
+        if palavra.endswith(sufixo):
+            radical = palavra[:-len(sufixo)]
+            if sufixo in SUFIXOS_APOS_VOGAL and radical[-1:] not in VOGAIS:
+                continue
+            return radical + troca
+    return palavra
+
+def chave_canonica(nome: str) -> str:
+    """Nome normalizado e sem porção/rótulo/pontuação, com as palavras no singular"""
+    texto = normalizar_nome(nome)
+    texto = PADRAO_ROTULO.sub('', texto)
+    texto = PADRAO_PORCAO.sub('', texto)
+    texto = PADRAO_PONTUACAO.sub(' ', texto).strip()
+    texto = PADRAO_CONTAGEM.sub('', texto)  # "2 bananas maduras" (Para 2 pessoas: ...)
+    if sum(c.isalpha() for c in texto) < MINIMO_LETRAS_CHAVE:
+        # Só rótulo/porção ("Para 2 pessoas: 1/"): o nome inteiro é a chave
+        return normalizar_nome(nome)
+    # O acento só existe no nome original
+    paroxitonas = {normalizar_nome(p) for p in PADRAO_PAROXITONA.findall(nome.lower())}
+    return PADRAO_PALAVRA.sub(
+        lambda m: m.group() if m.group() in paroxitonas else singular(m.group()), texto
+    )
+
+def _trigramas(chave: str) -> set:
+    texto = f'  {chave} '
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+def _hashes_trigrama(trigrama: str, memo: Dict[str, tuple]) -> tuple:
+    """As NUM_BANDAS x LINHAS_POR_BANDA funções de hash de um trigrama
+    (o vocabulário de trigramas é pequeno, então cada um é calculado uma vez)"""
+    hashes = memo.get(trigrama)
+    if hashes is None:
+        h = zlib.crc32(trigrama.encode('utf-8'))
+        hashes = memo[trigrama] = tuple((a * h + b) % _PRIMO for a, b in _PERMUTACOES)
+    return hashes
+
+def _assinatura(trigramas: set, memo: Dict[str, tuple]) -> List[int]:
+    return list(map(min, zip(*(_hashes_trigrama(t, memo) for t in trigramas))))
+
+def similaridade(a: set, b: set) -> float:
+    """Jaccard entre dois conjuntos de trigramas"""
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+def agrupar_chaves(chaves: List[str], limiar: float = LIMIAR_SIMILARIDADE) -> List[int]:
+    """Grupo de cada chave (índice da primeira chave do grupo na lista).
+
+    Chaves iguais caem sempre no mesmo grupo; chaves diferentes se juntam
+    quando a similaridade de trigramas é >= `limiar`.
+    """
+    pai = list(range(len(chaves)))
+
+    def raiz(i):
+        while pai[i] != i:
+            pai[i] = pai[pai[i]]
+            i = pai[i]
+        return i
+
+    def unir(i, j):
+        ri, rj = raiz(i), raiz(j)
+        if ri != rj:
+            # A raiz é sempre a primeira ocorrência do grupo
+            pai[max(ri, rj)] = min(ri, rj)
+
+    # Chaves idênticas: união direta, MinHash só entre as distintas
+    primeira: Dict[str, int] = {}
+    for i, chave in enumerate(chaves):
+        unir(primeira.setdefault(chave, i), i)
+
+    distintas = list(primeira.items())
+    trigramas = [_trigramas(chave) for chave, _ in distintas]
+    buckets: Dict[Any, List[int]] = {}
+    memo: Dict[str, tuple] = {}
+    for d, conjunto in enumerate(trigramas):
+        assinatura = _assinatura(conjunto, memo)
+        for banda in range(NUM_BANDAS):
+            inicio = banda * LINHAS_POR_BANDA
+            faixa = (banda, *assinatura[inicio:inicio + LINHAS_POR_BANDA])
+            buckets.setdefault(faixa, []).append(d)
+
+    comparados = set()
+    for membros in buckets.values():
+        for x in range(len(membros)):
+            for y in range(x + 1, len(membros)):
+                par = (membros[x], membros[y])
+                i, j = distintas[par[0]][1], distintas[par[1]][1]
+                if par in comparados or raiz(i) == raiz(j):
+                    continue
+                comparados.add(par)
+                if similaridade(trigramas[par[0]], trigramas[par[1]]) >= limiar:
+                    unir(i, j)
+
+    return [raiz(i) for i in range(len(chaves))]
+
+def atribuir_alimentos(itens: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Grava 'alimento_id' em cada item (in-place) e retorna
+    {alimento_id: chave canônica da primeira ocorrência}.
+    """
+    chaves = [chave_canonica(item['nome']) for item in itens]
+    grupos = agrupar_chaves(chaves)
+
+    ids: Dict[int, str] = {}
+    alimentos: Dict[str, str] = {}
+    for item, grupo in zip(itens, grupos):
+        if grupo not in ids:
+            ids[grupo] = f"alimento_{len(ids) + 1:04d}"
+            alimentos[ids[grupo]] = chaves[grupo]
+        item['alimento_id'] = ids[grupo]
+    return alimentos
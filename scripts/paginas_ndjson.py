@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Leitura sob demanda dos dumps de extração gravados em NDJSON.
+
+Com --formato ndjson, os extratores gravam uma página por linha e, ao
+lado, o índice <arquivo>.ndjson.idx com o deslocamento em bytes de cada
+linha (ver gravacao_json.GravadorPaginas). PaginasNDJSON mapeia o arquivo
+com mmap e só interpreta a linha pedida: iterar as páginas mantém a
+memória constante e ir direto à página N não lê as outras.
+
+    with PaginasNDJSON(Path('data/extracao_completa.ndjson')) as paginas:
+        paginas.campos['total_paginas']   # chaves fora da lista
+        paginas.pagina(42)                 # pelo 'numero' da página (campo_numero)
+        for pagina in paginas: ...
+
+Se o índice estiver ausente ou não corresponder ao arquivo (tamanho ou
+mtime diferente, outro campo de número, nenhum número encontrado), ele é
+refeito percorrendo o arquivo uma vez, com a chave e o campo de número
+gravados no índice anterior.
+
+abrir_paginas() aceita tanto o .json de sempre quanto o .ndjson, para os
+scripts que consomem os dumps (estruturar_dados, processar_base_conhecimento).
+"""
+
+import json
+import mmap
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from gravacao_json import VERSAO_INDICE, caminho_indice, gravar_indice
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+def _interpretar(linha: bytes) -> Any:
+    return orjson.loads(linha) if HAS_ORJSON else json.loads(linha)
+
+class PaginasNDJSON:
+    """Elementos de um NDJSON de GravadorPaginas, lidos sob demanda via mmap"""
+
+    def __init__(self, caminho: Path, campo_numero: Optional[str] = None):
+        self.caminho = Path(caminho)
+        self._arquivo = open(self.caminho, 'rb')
+        estado = os.fstat(self._arquivo.fileno())
+        self._mapa = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ) if estado.st_size else b''
+
+        # Sem campo_numero, vale o que o gravador registrou no índice
+        anterior = self._ler_indice()
+        indice = anterior if self._indice_valido(anterior, estado, campo_numero) else None
+        if indice is None:
+            indice = self._indexar(
+                anterior.get('chave', 'paginas') if anterior else 'paginas',
+                campo_numero or (anterior or {}).get('campo_numero') or 'numero',
+            )
+        self.chave = indice['chave']
+        self.campo_numero = indice['campo_numero']
+        self.numeros: List[Any] = indice['numeros']
+        self._deslocamentos: List[int] = indice['deslocamentos']
+        if len(self._deslocamentos) < 3:
+            self.fechar()
+            raise ValueError(f"NDJSON incompleto: {self.caminho}")
+        self._posicoes = {numero: i for i, numero in enumerate(self.numeros) if numero is not None}
+
+        # Cabeçalho (primeira linha) e rodapé (última) juntos
+        self.campos: Dict[str, Any] = dict(self._ler_linha(0))
+        self.campos.update(self._ler_linha(len(self._deslocamentos) - 2))
+
+    def _ler_indice(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(caminho_indice(self.caminho), 'rb') as f:
+                indice = _interpretar(f.read())
+        except (OSError, ValueError):
+            return None
+        return indice if isinstance(indice, dict) else None
+
+    @staticmethod
+    def _indice_valido(indice: Optional[Dict[str, Any]], estado: os.stat_result,
+                       campo_numero: Optional[str]) -> bool:
+        if not indice or indice.get('versao') != VERSAO_INDICE:
+            return False
+        if indice.get('tamanho') != estado.st_size or indice.get('mtime_ns') != estado.st_mtime_ns:
+            return False
+        if campo_numero and indice.get('campo_numero') != campo_numero:
+            return False
+        numeros = indice.get('numeros') or []
+        # Um índice sem nenhum número não localiza página alguma
+        return not numeros or any(numero is not None for numero in numeros)
+
+    def _indexar(self, chave: str, campo_numero: str) -> Dict[str, Any]:
+        """Refaz o índice lendo o arquivo (e tenta gravá-lo para a próxima vez)"""
+        deslocamentos = [0]
+        fim = len(self._mapa)
+        while deslocamentos[-1] < fim:
+            quebra = self._mapa.find(b'\n', deslocamentos[-1])
+            deslocamentos.append(fim if quebra < 0 else quebra + 1)
+        numeros = []
+        for i in range(1, len(deslocamentos) - 2):
+            elemento = _interpretar(self._mapa[deslocamentos[i]:deslocamentos[i + 1]])
+            numeros.append(elemento.get(campo_numero) if isinstance(elemento, dict) else None)
+        # Arquivo incompleto (__init__ recusa) ou campo errado (nenhum elemento
+        # o tem): não grava, para não deixar um índice inútil no disco
+        completo = len(deslocamentos) >= 3
+        if completo and (not numeros or any(numero is not None for numero in numeros)):
+            try:
+                gravar_indice(self.caminho, chave, campo_numero, numeros, deslocamentos)
+            except OSError:
+                pass  # diretório só de leitura: o índice fica só em memória
+        return {'chave': chave, 'campo_numero': campo_numero, 'numeros': numeros,
+                'deslocamentos': deslocamentos}
+
+    def _ler_linha(self, i: int) -> Any:
+        return _interpretar(self._mapa[self._deslocamentos[i]:self._deslocamentos[i + 1]])
+
+    def __len__(self) -> int:
+        return len(self.numeros)
+
+    def elemento(self, i: int) -> Any:
+        """i-ésimo elemento da lista (0 = primeira página gravada)"""
+        if not 0 <= i < len(self.numeros):
+            raise IndexError(i)
+        return self._ler_linha(i + 1)
+
+    def pagina(self, numero: Any) -> Dict[str, Any]:
+        """Página pelo seu número; KeyError se não estiver no arquivo"""
+        return self.elemento(self._posicoes[numero])
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in range(len(self.numeros)):
+            yield self._ler_linha(i + 1)
+
+    def fechar(self) -> None:
+        if isinstance(self._mapa, mmap.mmap):
+            self._mapa.close()
+        self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+def resolver_entrada(caminho: Path) -> Path:
+    """O próprio caminho, ou o .ndjson equivalente se só ele existir"""
+    caminho = Path(caminho)
+    ndjson = caminho.with_suffix('.ndjson')
+    if not caminho.exists() and ndjson.exists():
+        return ndjson
+    return caminho
+
+@contextmanager
+def abrir_paginas(caminho: Path, chave: str = 'paginas') -> Iterator[Tuple[Dict[str, Any], Iterable[Any]]]:
+    """(campos, páginas) de um dump de extração.
+
+    Em .ndjson as páginas são lidas sob demanda; em .json o documento é
+    carregado inteiro, como antes.
+    """
+    caminho = Path(caminho)
+    if caminho.suffix == '.ndjson':
+        with PaginasNDJSON(caminho) as paginas:
+            yield paginas.campos, paginas
+        return
+    with open(caminho, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    yield {k: v for k, v in dados.items() if k != chave}, dados.get(chave, [])
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+PDFs abertos uma única vez por processo (pdfplumber).
+
+Os workers de OCR (nova rasterização em DPI maior, extrair_pdf_ocr.py) e
+de tabelas (tabelas_pdf.py) recebem só o caminho do PDF: pdf_aberto()
+guarda o objeto aberto no processo, e cada página pedida não paga de
+novo a abertura e a leitura da estrutura do arquivo.
+"""
+
+from typing import Any, Dict
+
+import pdfplumber
+
+# PDFs abertos neste processo, pelo caminho
+_PDFS_ABERTOS: Dict[str, Any] = {}
+
+def pdf_aberto(pdf_path):
+    """O PDF aberto uma única vez por processo (fica aberto até o worker terminar)"""
+    chave = str(pdf_path)
+    if chave not in _PDFS_ABERTOS:
+        _PDFS_ABERTOS[chave] = pdfplumber.open(pdf_path)
+    return _PDFS_ABERTOS[chave]
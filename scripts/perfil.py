@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Instrumentação comum dos scripts de ingestão (flag --profile).
+
+Mede tempo de parede e de CPU por etapa (rasterizar, ocr, texto,
+tabelas, regex, json...) e por página, e o pico de RSS do processo e dos
+workers. O relatório é gravado em JSON (padrão:
+data/.cache/perfil/<script>-<data>.json); com --profile-pstats o
+processo principal também roda sob cProfile e o dump (.pstats) fica ao
+lado do JSON.
+
+Uso num script:
+    perfil.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    p = perfil.de_argumentos(args, 'extrair_pdf_ocr')
+    with p.etapa('ocr', pagina=num_pagina):
+        ...
+    p.finalizar()
+
+Sem --profile, de_argumentos devolve SEM_PERFIL, em que etapa() não
+mede nada. Trabalho feito em outros processos é medido lá com
+cronometro() e registrado no processo principal com registrar().
+
+Ler um dump: python3 -m pstats data/.cache/perfil/<arquivo>.pstats
+"""
+
+import cProfile
+import json
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DIR_PADRAO = Path(__file__).parent.parent / 'data' / '.cache' / 'perfil'
+
+def _rss_pico_mb(quem) -> float:
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    rss = resource.getrusage(quem).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024, 1)
+
+@contextmanager
+def cronometro():
+    """Mede o bloco: ao sair, o dicionário tem 'parede_s' e 'cpu_s'"""
+    medida = {'parede_s': 0.0, 'cpu_s': 0.0}
+    inicio_parede = time.perf_counter()
+    inicio_cpu = time.process_time()
+    try:
+        yield medida
+    finally:
+        medida['parede_s'] = time.perf_counter() - inicio_parede
+        medida['cpu_s'] = time.process_time() - inicio_cpu
+
+class Perfil:
+    """Acumula as medições de uma execução de um script"""
+
+    def __init__(self, script: str, caminho: Optional[Path] = None, pstats: bool = False,
+                 ativo: bool = True):
+        self.script = script
+        self.ativo = ativo
+        self.caminho = Path(caminho) if caminho else None
+        self.etapas: Dict[str, Dict[str, float]] = {}
+        self.paginas: Dict[int, Dict[str, float]] = {}
+        self.inicio = datetime.now()
+        self._inicio_parede = time.perf_counter()
+        self._inicio_cpu = time.process_time()
+        self._profiler = None
+        if ativo and pstats:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def registrar(self, nome: str, medida: Dict[str, float], pagina: Optional[int] = None) -> None:
+        """Soma uma medição (de cronometro()) à etapa e, se informada, à página"""
+        if not self.ativo:
+            return
+        etapa = self.etapas.setdefault(nome, {'chamadas': 0, 'parede_s': 0.0, 'cpu_s': 0.0})
+        etapa['chamadas'] += 1
+        etapa['parede_s'] += medida['parede_s']
+        etapa['cpu_s'] += medida['cpu_s']
+        if pagina is not None:
+            por_etapa = self.paginas.setdefault(pagina, {})
+            por_etapa[nome] = por_etapa.get(nome, 0.0) + medida['parede_s']
+
+    @contextmanager
+    def etapa(self, nome: str, pagina: Optional[int] = None):
+        """Mede o bloco como uma chamada da etapa `nome`"""
+        if not self.ativo:
+            yield
+            return
+        with cronometro() as medida:
+            yield
+        self.registrar(nome, medida, pagina)
+
+    def relatorio(self) -> Dict[str, Any]:
+        """Medições acumuladas até agora, prontas para JSON"""
+        parede = time.perf_counter() - self._inicio_parede
+        etapas = {
+            nome: {
+                'chamadas': etapa['chamadas'],
+                'parede_s': round(etapa['parede_s'], 4),
+                'cpu_s': round(etapa['cpu_s'], 4),
+                'fracao_parede': round(etapa['parede_s'] / parede, 4) if parede > 0 else None,
+            }
+            for nome, etapa in sorted(self.etapas.items(), key=lambda e: -e[1]['parede_s'])
+        }
+        return {
+            'script': self.script,
+            'inicio': self.inicio.isoformat(timespec='seconds'),
+            'parede_s': round(parede, 4),
+            'cpu_s': round(time.process_time() - self._inicio_cpu, 4),
+            'rss_pico_mb': _rss_pico_mb(resource.RUSAGE_SELF),
+            'rss_pico_workers_mb': _rss_pico_mb(resource.RUSAGE_CHILDREN),
+            'etapas': etapas,
+            'paginas': {
+                str(numero): {nome: round(s, 4) for nome, s in por_etapa.items()}
+                for numero, por_etapa in sorted(self.paginas.items())
+            },
+        }
+
+    def finalizar(self) -> Optional[Path]:
+        """Grava o relatório (e o .pstats), imprime o resumo e retorna o caminho do JSON"""
+        if not self.ativo:
+            return None
+        if self._profiler:
+            self._profiler.disable()
+
+        relatorio = self.relatorio()
+        caminho = self.caminho or DIR_PADRAO / f"{self.script}-{self.inicio:%Y%m%d-%H%M%S}.json"
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        if self._profiler:
+            self._profiler.dump_stats(caminho.with_suffix('.pstats'))
+
+        print(f"\n⏱️  Perfil: {relatorio['parede_s']:.2f} s de parede, {relatorio['cpu_s']:.2f} s de CPU,"
+              f" pico de RSS {relatorio['rss_pico_mb']} MB")
+        for nome, etapa in relatorio['etapas'].items():
+            print(f"   - {nome}: {etapa['parede_s']:.3f} s ({etapa['chamadas']}×, CPU {etapa['cpu_s']:.3f} s)")
+        print(f"   Relatório: {caminho}")
+        if self._profiler:
+            print(f"   cProfile: {caminho.with_suffix('.pstats')}")
+        return caminho
+
+SEM_PERFIL = Perfil('', ativo=False)
+
+def adicionar_argumentos(parser) -> None:
+    """Acrescenta --profile [CAMINHO] e --profile-pstats ao argparse do script"""
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='CAMINHO',
+                        help='mede o tempo de cada etapa e grava um relatório JSON'
+                             ' (padrão: data/.cache/perfil/)')
+    parser.add_argument('--profile-pstats', action='store_true',
+                        help='com --profile, grava também um dump do cProfile (.pstats)')
+
+def de_argumentos(args, script: str) -> Perfil:
+    """Perfil ativo se o script foi chamado com --profile, senão SEM_PERFIL"""
+    if args.profile is None:
+        return SEM_PERFIL
+    return Perfil(script, caminho=args.profile or None, pstats=args.profile_pstats)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Pré-processamento das páginas antes do OCR e escolha adaptativa de DPI.
+
+preprocessar() converte a página para tons de cinza, binariza (limiar de
+Otsu), corrige a inclinação (deskew) e corta as margens em branco. Com
+NumPy (pip install numpy) isso é feito com operações de array; sem ele,
+só com o PIL e sem deskew (de_argumentos avisa no início da execução).
+
+ocr_adaptativo() rasteriza primeiro em DPI_INICIAL e só rasteriza de novo
+em DPI_FINAL se a confiança média do Tesseract (image_to_data) ficar
+abaixo do limiar. O texto é o de image_to_string, lido uma vez, da
+tentativa mais confiável. Imagens menores e limpas deixam o OCR de cada
+página bem mais rápido; o DPI e a confiança usados vão para o JSON da
+página ('ocr_dpi', 'ocr_confianca').
+
+Nos scripts:
+    preprocessamento_ocr.adicionar_argumentos(parser)
+    parametros = preprocessamento_ocr.de_argumentos(args)
+    texto, qualidade, medidas = ocr_adaptativo(rasterizar, cache, 'por', '--psm 6', parametros)
+
+Com --sem-preprocessamento, de_argumentos devolve None e os scripts
+voltam ao OCR direto da página em 300 DPI.
+"""
+
+import math
+import sys
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from cache_ocr import confianca_ocr, ocr_com_cache
+from perfil import cronometro
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+DPI_INICIAL = 150
+DPI_FINAL = 300
+LIMIAR_CONFIANCA = 70.0
+
+# Inclinações testadas no deskew (graus) e largura da amostra usada na estimativa
+ANGULOS_DESKEW = [passo / 4 for passo in range(-20, 21)]
+LARGURA_AMOSTRA = 800
+INCLINACAO_MINIMA = 0.25
+
+def limiar_otsu(histograma) -> int:
+    """Nível de cinza que melhor separa tinta e papel (método de Otsu)"""
+    total = sum(histograma)
+    soma_total = sum(nivel * n for nivel, n in enumerate(histograma))
+    soma_fundo = peso_fundo = 0
+    melhor, melhor_variancia = 127, -1.0
+    for nivel, n in enumerate(histograma):
+        peso_fundo += n
+        if peso_fundo == 0:
+            continue
+        peso_frente = total - peso_fundo
+        if peso_frente == 0:
+            break
+        soma_fundo += nivel * n
+        media_fundo = soma_fundo / peso_fundo
+        media_frente = (soma_total - soma_fundo) / peso_frente
+        variancia = peso_fundo * peso_frente * (media_fundo - media_frente) ** 2
+        if variancia > melhor_variancia:
+            melhor, melhor_variancia = nivel, variancia
+    return melhor
+
+def estimar_inclinacao(tinta) -> float:
+    """Ângulo (graus) que deixa as linhas de texto na horizontal.
+
+    `tinta` é o array booleano da página (True = pixel escuro). Para cada
+    ângulo candidato, as coordenadas dos pixels de tinta são cisalhadas e
+    projetadas nas linhas; o ângulo certo concentra a tinta em poucas
+    linhas (maior soma dos quadrados do perfil de projeção).
+    """
+    passo = max(1, tinta.shape[1] // LARGURA_AMOSTRA)
+    ys, xs = np.nonzero(tinta[::passo, ::passo])
+    if len(ys) < 100:
+        return 0.0
+    ys = ys.astype(np.float64)
+    xs = xs.astype(np.float64)
+    melhor, melhor_pontuacao = 0.0, -1.0
+    for angulo in ANGULOS_DESKEW:
+        linhas = np.rint(ys - xs * math.tan(math.radians(angulo))).astype(np.int64)
+        perfil = np.bincount(linhas - linhas.min())
+        pontuacao = float(np.dot(perfil, perfil))
+        # Empate (página sem linhas definidas): fica o menor ângulo
+        if pontuacao > melhor_pontuacao or (pontuacao == melhor_pontuacao and abs(angulo) < abs(melhor)):
+            melhor, melhor_pontuacao = angulo, pontuacao
+    return melhor
+
+def _cortar_margens(tinta, margem: int) -> Optional[Tuple[int, int, int, int]]:
+    """Caixa (esq, topo, dir, base) com a tinta da página, ignorando bordas
+    pretas de digitalização (linhas/colunas quase todas escuras)"""
+    altura, largura = tinta.shape
+    por_linha = tinta.sum(axis=1)
+    por_coluna = tinta.sum(axis=0)
+    linhas = np.nonzero((por_linha > 0) & (por_linha < 0.9 * largura))[0]
+    colunas = np.nonzero((por_coluna > 0) & (por_coluna < 0.9 * altura))[0]
+    if not len(linhas) or not len(colunas):
+        return None
+    return (
+        max(0, int(colunas[0]) - margem), max(0, int(linhas[0]) - margem),
+        min(largura, int(colunas[-1]) + 1 + margem), min(altura, int(linhas[-1]) + 1 + margem),
+    )
+
+def preprocessar(imagem, dpi: int = DPI_FINAL):
+    """Página pronta para o OCR: tons de cinza, binarizada, sem inclinação e
+    sem margens. Retorna None se a página está em branco."""
+    cinza = imagem.convert('L')
+    margem = max(4, dpi // 30)
+
+    if not HAS_NUMPY:
+        limiar = limiar_otsu(cinza.histogram())
+        binaria = cinza.point(lambda v: 255 if v > limiar else 0)
+        caixa = ImageOps.invert(binaria).getbbox()
+        if caixa is None:
+            return None
+        esquerda, topo, direita, base = caixa
+        return binaria.crop((
+            max(0, esquerda - margem), max(0, topo - margem),
+            min(binaria.width, direita + margem), min(binaria.height, base + margem),
+        ))
+
+    pixels = np.asarray(cinza)
+    limiar = limiar_otsu(np.bincount(pixels.ravel(), minlength=256).tolist())
+    tinta = pixels <= limiar
+    if not tinta.any() or tinta.all():
+        return None
+
+    angulo = estimar_inclinacao(tinta)
+    if abs(angulo) >= INCLINACAO_MINIMA:
+        girada = Image.fromarray(np.where(tinta, 0, 255).astype(np.uint8)).rotate(
+            angulo, resample=Image.NEAREST, expand=True, fillcolor=255
+        )
+        tinta = np.asarray(girada) < 128
+
+    caixa = _cortar_margens(tinta, margem)
+    if caixa is None:
+        return None
+    esquerda, topo, direita, base = caixa
+    return Image.fromarray(np.where(tinta[topo:base, esquerda:direita], 0, 255).astype(np.uint8))
+
+def _acumular(medidas: Dict[str, Dict[str, float]], nome: str, medida: Dict[str, float]) -> None:
+    total = medidas.setdefault(nome, {'parede_s': 0.0, 'cpu_s': 0.0})
+    total['parede_s'] += medida['parede_s']
+    total['cpu_s'] += medida['cpu_s']
+
+def ocr_adaptativo(
+    rasterizar: Callable[[int], Any], cache, lang: str, config: str,
+    parametros: Dict[str, Any], imagem=None
+) -> Tuple[str, Dict[str, Any], Dict[str, Dict[str, float]]]:
+    """OCR da página começando em parametros['dpi_inicial'].
+
+    `rasterizar(dpi)` devolve a imagem da página no DPI pedido; `imagem`,
+    se informada, é a página já rasterizada no DPI inicial. Retorna
+    (texto, {'dpi', 'confianca'}, medidas) da tentativa de maior
+    confiança — medidas tem o tempo de 'rasterizar', 'preprocessar' e
+    'ocr' somado entre as tentativas. Erros do Tesseract são propagados.
+    """
+    dpis = [parametros['dpi_inicial']]
+    if parametros['dpi_final'] > parametros['dpi_inicial']:
+        dpis.append(parametros['dpi_final'])
+
+    medidas: Dict[str, Dict[str, float]] = {}
+    melhor = None  # (imagem pré-processada, confianca, dpi)
+    for dpi in dpis:
+        if imagem is None:
+            with cronometro() as medida:
+                imagem = rasterizar(dpi)
+            _acumular(medidas, 'rasterizar', medida)
+
+        with cronometro() as medida:
+            limpa = preprocessar(imagem, dpi)
+        _acumular(medidas, 'preprocessar', medida)
+        imagem.close()
+        imagem = None
+        if limpa is None:
+            if melhor is not None:
+                break
+            # Página em branco: nada a ler em nenhum DPI
+            return '', {'dpi': dpi, 'confianca': None}, medidas
+
+        # --dpi: a imagem pré-processada não carrega a resolução original
+        with cronometro() as medida:
+            confianca = confianca_ocr(limpa, cache, lang, f"{config} --dpi {dpi}".strip(), dpi)
+        _acumular(medidas, 'ocr', medida)
+        # A nova tentativa só substitui a anterior se for mais confiável
+        if melhor is None or (confianca is not None and (melhor[1] is None or confianca > melhor[1])):
+            if melhor is not None:
+                melhor[0].close()
+            melhor = (limpa, confianca, dpi)
+        else:
+            limpa.close()
+        if confianca is not None and confianca >= parametros['limiar']:
+            break
+
+    limpa, confianca, dpi = melhor
+    try:
+        with cronometro() as medida:
+            texto = ocr_com_cache(limpa, cache, lang, f"{config} --dpi {dpi}".strip(), dpi)
+        _acumular(medidas, 'ocr', medida)
+    finally:
+        limpa.close()
+    confianca = None if confianca is None else round(confianca, 1)
+    return texto, {'dpi': dpi, 'confianca': confianca}, medidas
+
+def adicionar_argumentos(parser) -> None:
+    """Acrescenta --dpi-inicial, --limiar-confianca e --sem-preprocessamento"""
+    parser.add_argument('--dpi-inicial', type=int, default=DPI_INICIAL,
+                        help=f'DPI da primeira tentativa de OCR (padrão: {DPI_INICIAL};'
+                             f' refaz em {DPI_FINAL} se a confiança for baixa)')
+    parser.add_argument('--limiar-confianca', type=float, default=LIMIAR_CONFIANCA,
+                        help=f'confiança média (0-100) abaixo da qual a página é refeita'
+                             f' em {DPI_FINAL} DPI (padrão: {LIMIAR_CONFIANCA:g})')
+    parser.add_argument('--sem-preprocessamento', action='store_true',
+                        help=f'OCR direto da página em {DPI_FINAL} DPI, sem binarizar/deskew')
+
+def de_argumentos(args) -> Optional[Dict[str, Any]]:
+    """Parâmetros de ocr_adaptativo, ou None com --sem-preprocessamento"""
+    if args.sem_preprocessamento:
+        return None
+    if not HAS_NUMPY:
+        print("⚠️  NumPy não instalado: páginas sem deskew antes do OCR (pip install numpy)",
+              file=sys.stderr)
+    return {
+        'dpi_inicial': min(args.dpi_inicial, DPI_FINAL),
+        'dpi_final': DPI_FINAL,
+        'limiar': args.limiar_confianca,
+    }
@@ -11,6 +11,8 @@ import re
 from pathlib import Path
 from typing import List, Dict, Any
 
+from paginas_ndjson import abrir_paginas, resolver_entrada
+
 def identificar_refeicoes(texto: str) -> Dict[str, bool]:
     """Identifica tipos de refeições no texto"""
     padroes = {
@@ -64,56 +66,60 @@ def extrair_itens_alimentares(texto: str, pagina: int) -> List[Dict[str, Any]]:
     return itens
 
 def processar_pdf_extraido(arquivo_extraido: Path) -> Dict[str, Any]:
-    """Processa o arquivo de extração e cria base de conhecimento"""
-    
-    print(f"📖 Carregando dados de: {arquivo_extraido}")
+    """Processa o arquivo de extração e cria base de conhecimento
     
-    with open(arquivo_extraido, 'r', encoding='utf-8') as f:
-        dados = json.load(f)
+    Aceita o .json ou o .ndjson da extração; no NDJSON as páginas são
+    lidas uma a uma (paginas_ndjson.py).
+    """
     
-    base_conhecimento = []
-    total_itens = 0
-    
-    print(f"📄 Processando {len(dados.get('paginas', []))} páginas...\n")
+    print(f"📖 Carregando dados de: {arquivo_extraido}")
     
-    for pagina_data in dados.get('paginas', []):
-        num_pagina = pagina_data.get('numero', 0)
-        texto = pagina_data.get('texto_completo', '')
+    with abrir_paginas(arquivo_extraido) as (_, paginas):
+        base_conhecimento = []
+        total_itens = 0
+        paginas_com_texto = 0
         
-        if not texto or len(texto.strip()) < 10:
-            continue
-        
-        # Identificar tipo de refeição na página
-        refeicoes = identificar_refeicoes(texto)
+        print(f"📄 Processando {len(paginas)} páginas...\n")
         
-        # Extrair itens alimentares
-        itens = extrair_itens_alimentares(texto, num_pagina)
-        
-        # Adicionar à base de conhecimento
-        for item in itens:
-            # Determinar tipo de refeição
-            tipo_refeicao = None
-            for refeicao, encontrado in refeicoes.items():
-                if encontrado:
-                    tipo_refeicao = refeicao
-                    break
+        for pagina_data in paginas:
+            paginas_com_texto += len(pagina_data.get('texto_completo', '')) > 10
+            num_pagina = pagina_data.get('numero', 0)
+            texto = pagina_data.get('texto_completo', '')
+            
+            if not texto or len(texto.strip()) < 10:
+                continue
             
-            # Se não encontrou tipo específico, tentar inferir do contexto
-            if not tipo_refeicao:
-                # Padrão simples: primeira parte do texto geralmente indica refeição
-                tipo_refeicao = 'almoco'  # Default
+            # Identificar tipo de refeição na página
+            refeicoes = identificar_refeicoes(texto)
             
-            item_completo = {
-                'id': f"item_{num_pagina}_{len(base_conhecimento)}",
-                'nome': item['nome'],
-                'quantidade': item['quantidade'],
-                'tipo': tipo_refeicao,
-                'condicao_digestiva': 'azia_refluxo',  # Assumindo do contexto do PDF
-                'pagina_origem': num_pagina
-            }
+            # Extrair itens alimentares
+            itens = extrair_itens_alimentares(texto, num_pagina)
             
-            base_conhecimento.append(item_completo)
-            total_itens += 1
+            # Adicionar à base de conhecimento
+            for item in itens:
+                # Determinar tipo de refeição
+                tipo_refeicao = None
+                for refeicao, encontrado in refeicoes.items():
+                    if encontrado:
+                        tipo_refeicao = refeicao
+                        break
+                
+                # Se não encontrou tipo específico, tentar inferir do contexto
+                if not tipo_refeicao:
+                    # Padrão simples: primeira parte do texto geralmente indica refeição
+                    tipo_refeicao = 'almoco'  # Default
+                
+                item_completo = {
+                    'id': f"item_{num_pagina}_{len(base_conhecimento)}",
+                    'nome': item['nome'],
+                    'quantidade': item['quantidade'],
+                    'tipo': tipo_refeicao,
+                    'condicao_digestiva': 'azia_refluxo',  # Assumindo do contexto do PDF
+                    'pagina_origem': num_pagina
+                }
+                
+                base_conhecimento.append(item_completo)
+                total_itens += 1
     
     print(f"✅ Processamento completo!")
     print(f"📊 Total de itens extraídos: {total_itens}")
@@ -121,12 +127,12 @@ def processar_pdf_extraido(arquivo_extraido: Path) -> Dict[str, Any]:
     return {
         'itens': base_conhecimento,
         'total_itens': total_itens,
-        'total_paginas_processadas': len([p for p in dados.get('paginas', []) if len(p.get('texto_completo', '')) > 10])
+        'total_paginas_processadas': paginas_com_texto
     }
 
 def main():
     # Caminhos
-    arquivo_extraido = Path(__file__).parent.parent / 'data' / 'extracao_ocr_completa.json'
+    arquivo_extraido = resolver_entrada(Path(__file__).parent.parent / 'data' / 'extracao_ocr_completa.json')
     arquivo_base = Path(__file__).parent.parent / 'data' / 'base_conhecimento.json'
     
     if not arquivo_extraido.exists():
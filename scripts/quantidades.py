@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Normalização em lote das quantidades dos itens ("3 colheres", "120 g",
+"1,5 xícara") em valor numérico + unidade canônica + estimativa em gramas.
+
+As unidades canônicas e as conversões são as mesmas de
+lib/gerador_lista_compras.ts (UNIDADE_MAP / GRAMAS_POR_MEDIDA / paraGramas),
+para que a lista de compras e o ajuste de porções possam usar os números
+gravados na base em vez de reinterpretar o texto a cada requisição.
+
+Cada texto distinto é interpretado e convertido uma única vez.
+
+Os campos quantidade_* não vão para o base_conhecimento.json servido,
+só para a variante colunar e para o SQLite (ver
+extrair_docx_base_conhecimento.CAMPOS_SO_COLUNAR).
+"""
+
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+PADRAO_QUANTIDADE = re.compile(r'^(\d+(?:[.,]\d*)?)\s*(.*)$')
+
+# Unidade lida -> unidade canônica (UNIDADE_MAP da lista de compras)
+UNIDADES = {
+    'g': 'g', 'grama': 'g', 'gramas': 'g',
+    'kg': 'kg', 'kilo': 'kg', 'quilos': 'kg',
+    'ml': 'ml',
+    'l': 'l',
+    'colher': 'colheres de sopa', 'colheres': 'colheres de sopa',
+    'colher de sopa': 'colheres de sopa', 'colheres de sopa': 'colheres de sopa',
+    'colher de chá': 'colheres de chá', 'colheres de chá': 'colheres de chá',
+    'fatia': 'fatias', 'fatias': 'fatias',
+    'unidade': 'unidades', 'unidades': 'unidades',
+    'unidade média': 'unidades', 'unidades médias': 'unidades',
+    'xícara': 'xícaras', 'xícaras': 'xícaras',
+    'copo': 'copos', 'copos': 'copos',
+    'prato': 'pratos', 'pratos': 'pratos',
+    'porção': 'porções', 'porções': 'porções',
+}
+
+# Unidade canônica -> (gramas por unidade, arredondar para inteiro)
+GRAMAS_POR_UNIDADE = {
+    'g': (1, False),
+    'kg': (1000, False),
+    'ml': (1.03, True),  # líquidos ~1 g/ml
+    'l': (1030, True),
+    'colheres de sopa': (15, True),
+    'colheres de chá': (5, True),
+    'fatias': (30, True),
+    'unidades': (120, True),
+    'xícaras': (150, True),
+    'copos': (240, True),
+    'pratos': (300, True),
+    'porções': (150, True),
+}
+GRAMAS_FALLBACK = (100, True)  # unidade desconhecida: ~100 g
+
+def interpretar_quantidade(texto: str) -> Tuple[Optional[float], Optional[str]]:
+    """("3 colheres") -> (3.0, 'colheres de sopa'); (None, None) se não houver número"""
+    match = PADRAO_QUANTIDADE.match(texto.strip().replace('(', '').replace(')', ''))
+    if not match:
+        return None, None
+    valor = float(match.group(1).replace(',', '.'))
+    unidade = match.group(2).strip().lower()
+    return valor, UNIDADES.get(unidade, unidade) or 'unidades'
+
+def _numero(valor: float) -> Any:
+    """3.0 -> 3 (JSON mais enxuto)"""
+    return int(valor) if valor.is_integer() else valor
+
+def normalizar_quantidades(quantidades: List[str]) -> Dict[str, List[Any]]:
+    """Normaliza um lote de quantidades.
+
+    Retorna listas alinhadas com a entrada: 'valor' (número), 'unidade'
+    (canônica) e 'gramas' (estimativa); None onde o texto não tem número.
+    """
+    # Cada texto distinto é interpretado uma vez; `codigos` aponta cada item para o seu
+    distintas: Dict[str, int] = {}
+    codigos = [distintas.setdefault(q, len(distintas)) for q in quantidades]
+
+    valores, unidades, gramas = [], [], []
+    for texto in distintas:
+        valor, unidade = interpretar_quantidade(texto)
+        fator, inteiro = GRAMAS_POR_UNIDADE.get(unidade, GRAMAS_FALLBACK)
+        if valor is None:
+            estimativa = None
+        elif inteiro:
+            # Math.round do JS (meio para cima), como em paraGramas
+            estimativa = _numero(float(math.floor(valor * fator + 0.5)))
+        else:
+            estimativa = _numero(valor * fator)
+        valores.append(None if valor is None else _numero(valor))
+        unidades.append(unidade)
+        gramas.append(estimativa)
+
+    return {
+        'valor': [valores[c] for c in codigos],
+        'unidade': [unidades[c] for c in codigos],
+        'gramas': [gramas[c] for c in codigos],
+    }
+
+def anexar_quantidades(itens: List[Dict[str, Any]]) -> int:
+    """Grava quantidade_valor / quantidade_unidade / quantidade_gramas em cada
+    item (in-place). Retorna quantos itens tiveram a quantidade interpretada.
+    """
+    normalizadas = normalizar_quantidades([item['quantidade'] for item in itens])
+    for item, valor, unidade, gramas in zip(
+        itens, normalizadas['valor'], normalizadas['unidade'], normalizadas['gramas']
+    ):
+        item['quantidade_valor'] = valor
+        item['quantidade_unidade'] = unidade
+        item['quantidade_gramas'] = gramas
+    return sum(valor is not None for valor in normalizadas['valor'])
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Extração de tabelas das páginas do PDF (pdfplumber) com pré-checagem.
+
+extract_tables() é uma das operações mais caras do pdfplumber e, na
+maior parte das páginas, não encontra nada. Com as configurações padrão
+(estratégia "lines"), uma tabela só existe onde há linhas de grade: são
+as arestas dos objetos `lines`, `rects` e `curves` da página, e uma célula
+precisa de pelo menos duas arestas horizontais e duas verticais. Juntar e
+alinhar arestas (o que o pdfplumber faz depois) só diminui essa
+contagem, então pode_ter_tabela() pula extract_tables() sem mudar o
+resultado.
+
+As páginas candidatas podem ir para um pool de processos separado
+(--workers-tabelas N): cada worker abre o PDF uma vez e extrai as
+tabelas das páginas que recebe, medindo o tempo de cada uma.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from pdfs_abertos import pdf_aberto
+from perfil import cronometro
+
+def _contar_arestas(pagina) -> Tuple[int, int]:
+    """(horizontais, verticais) entre as arestas que o pdfplumber usa para tabelas"""
+    horizontais = verticais = 0
+    for linha in pagina.lines:
+        # Como em pdfplumber.utils.line_to_edge: o que não é horizontal conta como vertical
+        if linha['top'] == linha['bottom']:
+            horizontais += 1
+        else:
+            verticais += 1
+    # Cada retângulo tem duas arestas de cada orientação
+    horizontais += 2 * len(pagina.rects)
+    verticais += 2 * len(pagina.rects)
+    for curva in getattr(pagina, 'curves', []):
+        pontos = curva.get('pts')
+        if pontos is None:
+            # Versão do pdfplumber sem os pontos da curva: não dá para descartar
+            return 2, 2
+        # Como em pdfplumber.utils.curve_to_edges: trechos diagonais não contam
+        for (x_a, topo_a), (x_b, topo_b) in zip(pontos, pontos[1:]):
+            if x_a == x_b:
+                verticais += 1
+            elif topo_a == topo_b:
+                horizontais += 1
+    return horizontais, verticais
+
+def pode_ter_tabela(pagina) -> bool:
+    """False quando a página não tem linhas de grade suficientes para uma tabela"""
+    horizontais, verticais = _contar_arestas(pagina)
+    return horizontais >= 2 and verticais >= 2
+
+def extrair_tabelas(pagina) -> Tuple[List[Any], Optional[str], Dict[str, float]]:
+    """(tabelas, erro, medida) de uma página já aberta.
+
+    Erros do pdfplumber não interrompem a extração: voltam como texto.
+    """
+    with cronometro() as medida:
+        try:
+            tabelas = pagina.extract_tables() or []
+            erro = None
+        except Exception as e:
+            tabelas = []
+            erro = str(e)
+    return tabelas, erro, medida
+
+def tabelas_da_pagina(pdf_path, num_pagina) -> Tuple[List[Any], Optional[str], Dict[str, float]]:
+    """extrair_tabelas de uma página do PDF (executado nos workers de tabelas)"""
+    pagina = pdf_aberto(pdf_path).pages[num_pagina - 1]
+    try:
+        return extrair_tabelas(pagina)
+    finally:
+        # Descarta os objetos já interpretados da página (pdfplumber >= 0.10)
+        if hasattr(pagina, 'close'):
+            pagina.close()
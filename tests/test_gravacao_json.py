@@ -0,0 +1,59 @@
+"""Saída de gravacao_json com e sem orjson (ver a docstring do módulo)"""
+
+import json
+import math
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import gravacao_json  # noqa: E402
+
+DADOS = {
+    'total_itens': 2,
+    'itens': [
+        {'nome': 'Maçã cozida', 'quantidade': '1 unidade', 'quantidade_valor': 1,
+         'quantidade_gramas': 130.5, 'alimento_id': None},
+        {'nome': 'Aveia', 'quantidade': '2 colheres', 'quantidade_valor': 2.0,
+         'quantidade_gramas': 0.1, 'alimento_id': 'alimento_0001'},
+    ],
+    'origem': 'data/pdfs/*.docx',
+}
+
+@pytest.fixture(params=['stdlib', 'orjson'])
+def implementacao(request, monkeypatch):
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+        monkeypatch.setattr(gravacao_json, 'HAS_ORJSON', True)
+    else:
+        monkeypatch.setattr(gravacao_json, 'HAS_ORJSON', False)
+    return request.param
+
+@pytest.mark.parametrize('formato', ['indentado', 'compacto'])
+def test_dados_do_repositorio_equivalentes(implementacao, formato):
+    # Mesmo conteúdo; com esses valores, também os mesmos bytes
+    saida = gravacao_json.serializar(DADOS, formato)
+    assert json.loads(saida) == DADOS
+    if formato == 'indentado':
+        esperado = json.dumps(DADOS, ensure_ascii=False, indent=2)
+    else:
+        esperado = json.dumps(DADOS, ensure_ascii=False, separators=(',', ':'))
+    assert saida == esperado.encode('utf-8')
+
+def test_floats_extremos_mesmo_valor(implementacao):
+    valores = [1e16, 1e-05, 123456789.125]
+    assert json.loads(gravacao_json.serializar(valores, 'compacto')) == valores
+
+def test_nao_finitos(implementacao):
+    saida = gravacao_json.serializar([math.nan, math.inf], 'compacto')
+    if implementacao == 'orjson':
+        assert saida == b'[null,null]'
+    else:
+        assert saida == b'[NaN,Infinity]'
+
+def test_gravar_json_atomico(implementacao, tmp_path):
+    destino = gravacao_json.gravar_json(DADOS, tmp_path / 'base.json', 'compacto')
+    assert json.loads(destino.read_bytes()) == DADOS
+    assert not list(tmp_path.glob('*.tmp'))
@@ -0,0 +1,34 @@
+"""NDJSON incompleto: erro sem deixar índice (.idx) para trás"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import gravacao_json  # noqa: E402
+from paginas_ndjson import PaginasNDJSON  # noqa: E402
+
+@pytest.mark.parametrize('conteudo', [b'', b'{"total_paginas": 0}\n'])
+def test_ndjson_incompleto_sem_indice(tmp_path, conteudo):
+    caminho = tmp_path / 'paginas.ndjson'
+    caminho.write_bytes(conteudo)
+    with pytest.raises(ValueError):
+        PaginasNDJSON(caminho)
+    assert not gravacao_json.caminho_indice(caminho).exists()
+
+def test_gravar_indice_recusa_deslocamentos_incompletos(tmp_path):
+    caminho = tmp_path / 'paginas.ndjson'
+    caminho.write_bytes(b'')
+    with pytest.raises(ValueError):
+        gravacao_json.gravar_indice(caminho, 'paginas', 'numero', [], [0])
+    assert not gravacao_json.caminho_indice(caminho).exists()
+
+def test_ndjson_completo_indexado(tmp_path):
+    dados = {'total_paginas': 2, 'paginas': [{'numero': 1}, {'numero': 2}], 'fim': True}
+    caminho = gravacao_json.gravar_json(dados, tmp_path / 'paginas.json', 'ndjson')
+    assert gravacao_json.caminho_indice(caminho).exists()
+    with PaginasNDJSON(caminho) as paginas:
+        assert paginas.pagina(2) == {'numero': 2}
+        assert paginas.campos == {'total_paginas': 2, 'fim': True}